@@ -6,7 +6,11 @@ import shutil
 import datetime
 import json
 import gc
+import tempfile
 from backend import ISPProcessor, BankLetterProcessor
+from reply_grid import GridView, ReplyStore, evidence_preview, evidence_row_count
+from session_matching import SessionMatcher, requests_from_grouped, session_columns
+from zip_bundle import BundleBuilder
 
 # Set page config
 st.set_page_config(page_title="IFSO ISP Tool", page_icon="🚔", layout="wide")
@@ -37,7 +41,7 @@ def render_pagination(df, page_key, page_size=10000, render_controls=True):
     Render pagination controls and return the current page slice of the dataframe.
     
     Args:
-        df: Full dataframe to paginate
+        df: Full dataframe (or reply GridView) to paginate
         page_key: Unique key for this pagination instance (e.g., 'airtel_page', 'jio_page')
         page_size: Number of rows per page (default 10000)
         render_controls: Whether to render the UI controls (default True)
@@ -62,8 +66,8 @@ def render_pagination(df, page_key, page_size=10000, render_controls=True):
     start_idx = current_page * page_size
     end_idx = min(start_idx + page_size, total_rows)
     
-    # Get current page slice
-    page_df = df.iloc[start_idx:end_idx]
+    # Get current page slice (a GridView reads only this window from disk)
+    page_df = df.window(start_idx, end_idx) if isinstance(df, GridView) else df.iloc[start_idx:end_idx]
     
     # Only render controls if requested
     if render_controls:
@@ -110,6 +114,204 @@ def render_pagination(df, page_key, page_size=10000, render_controls=True):
     
     return page_df, start_idx + 1, end_idx, total_rows, current_page + 1, total_pages
 
+# --- REPLY GRID HELPERS ---
+def store_reply_results(results_dict, name, excel_name):
+    """
+    Move reply hits out of memory into an on-disk columnar store.
+    
+    The combined Excel is written once here so reruns only serve the file.
+    
+    Returns:
+        Dict with 'store' (ReplyStore), 'misses' and 'excel_path' (None when no hits)
+    """
+    hits_df = results_dict['hits_df']
+    directory = session_store_dir()
+    store = ReplyStore.from_frame(hits_df, directory, name)
+    excel_path = None
+    if not hits_df.empty:
+        excel_path = os.path.join(directory, excel_name)
+        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
+            hits_df.to_excel(writer, index=False)
+    return {'store': store, 'misses': results_dict['misses'], 'excel_path': excel_path}
+
+def session_store_dir():
+    """This session's own directory for reply stores (other sessions never write or delete in it)."""
+    directory = st.session_state.get('reply_store_dir')
+    if not directory or not os.path.isdir(directory):
+        root = os.path.join(st.session_state.processor.output_dir, "reply_store")
+        os.makedirs(root, exist_ok=True)
+        directory = tempfile.mkdtemp(prefix="session_", dir=root)
+        st.session_state['reply_store_dir'] = directory
+    return directory
+
+def discard_reply_results(results_key):
+    """Drop one ISP's reply results from the session and delete its on-disk store and Excel."""
+    results = st.session_state.pop(results_key, None)
+    if not results:
+        return
+    results['store'].delete()
+    if results['excel_path'] and os.path.exists(results['excel_path']):
+        try:
+            os.remove(results['excel_path'])
+        except OSError:
+            pass
+
+def render_grid_controls(store, key_prefix, columns=None, labels=None):
+    """
+    Render sort / filter controls for a reply grid and return the matching view.
+    
+    Args:
+        store: ReplyStore holding the reply hits
+        key_prefix: Prefix for widget keys
+        columns: Columns to show (default all)
+        labels: Display names for columns
+    """
+    columns = columns or [c for c in store.columns if c != "CSV_Path"]
+    labels = labels or {}
+    col1, col2, col3, col4 = st.columns([2, 1, 2, 2])
+    sort_by = col1.selectbox("Sort by", [None] + columns, key=f"{key_prefix}_sort",
+                             format_func=lambda c: "(file order)" if c is None else labels.get(c, c))
+    order = col2.selectbox("Order", ["Ascending", "Descending"], key=f"{key_prefix}_order")
+    filter_column = col3.selectbox("Filter column", columns, key=f"{key_prefix}_filter_col",
+                                   format_func=lambda c: labels.get(c, c))
+    text = col4.text_input("Contains", key=f"{key_prefix}_filter_text")
+    return store.view(sort_by, order == "Ascending", filter_column, text.strip(), columns=columns)
+
+def render_evidence_files(store, kind, key_prefix):
+    """
+    Render download buttons and lazily parsed previews for the raw evidence CSVs.
+    
+    Args:
+        store: ReplyStore holding the reply hits
+        kind: 'airtel' (header search + footer filter) or 'jio' (plain CSV)
+        key_prefix: Prefix for widget keys
+    """
+    if 'CSV_Path' not in store.columns:
+        return
+    unique_files = store.distinct(['Source_File', 'CSV_Path'])
+    for idx, row in unique_files.iterrows():
+        fpath = row['CSV_Path']
+        if fpath and os.path.exists(fpath):
+            bname = os.path.basename(fpath)
+            
+            # Download Button
+            with open(fpath, "rb") as f:
+                st.download_button(
+                    label=f"📥 Download {bname}",
+                    data=f,
+                    file_name=bname,
+                    mime="text/csv",
+                    key=f"ev_{key_prefix}_{idx}"
+                )
+            
+            # Preview is parsed only when opened, and once per file
+            if st.toggle(f"👁️ View Content: {bname}", key=f"ev_{key_prefix}_view_{idx}"):
+                try:
+                    sub_df, head = evidence_preview(fpath, kind)
+                    if sub_df is not None:
+                        st.dataframe(sub_df, width='stretch')
+                        total_rows = evidence_row_count(fpath, kind)
+                        if total_rows > len(sub_df):
+                            st.caption(f"Showing the first {len(sub_df):,} of {total_rows:,} rows - "
+                                       f"use 📥 Download {bname} above for the full file")
+                    else:
+                        st.warning("No standard Airtel header found.")
+                        st.text(head)
+                except Exception as e:
+                    st.error(f"Error parsing: {e}")
+
+# --- DOWNLOAD ALL HELPER ---
+def render_bundle_download(members, state_key, file_name, key):
+    """
+    "Download All as ZIP" for one result set, built only when asked for.
+    
+    Nothing is hashed or zipped on reruns: a "Prepare ZIP" click builds the
+    bundle (or reuses it from the on-disk cache) and its path is kept in
+    session_state for this result set; the download button then serves that
+    file through an open file handle.
+    
+    Args:
+        members: [(file path, archive name)] to bundle
+        state_key: session_state key holding this result set's bundle path
+        file_name: Download file name
+        key: Widget key prefix
+    """
+    # Result set identity: member names plus each file's size and mtime
+    signature = tuple((path, arcname, os.path.getsize(path), os.path.getmtime(path))
+                      for path, arcname in members if os.path.exists(path))
+    entry = st.session_state.get(state_key)
+    if entry is None or entry['signature'] != signature:
+        entry = {'signature': signature, 'path': None}
+        st.session_state[state_key] = entry
+    
+    if entry['path'] is None or not os.path.exists(entry['path']):
+        entry['path'] = None
+        if not st.button("📦 Prepare ZIP of All Files", key=f"{key}_prepare", type="primary"):
+            return
+        if 'bundle_builder' not in st.session_state:
+            st.session_state.bundle_builder = BundleBuilder()
+        with st.spinner("Building ZIP..."):
+            entry['path'] = st.session_state.bundle_builder.build(members)
+    else:
+        os.utime(entry['path'])  # keep bundles in use out of pruning
+    
+    with open(entry['path'], "rb") as bundle:
+        st.download_button(
+            label="📦 Download All as ZIP",
+            data=bundle,
+            file_name=file_name,
+            mime="application/zip",
+            key=key,
+            type="primary"
+        )
+
+# --- REQUEST MATCHING HELPER ---
+def render_request_matches(store, isp, key_prefix):
+    """
+    Show which requested (IP, time ± 5 min) windows from the Generator hit a reply session.
+    
+    Args:
+        store: ReplyStore holding the reply hits for this ISP
+        isp: ISP code used by the Generator ('AIRTEL', 'JIO', 'VI')
+        key_prefix: Prefix for widget keys
+    """
+    results = st.session_state.get('results')
+    grouped = results.get('grouped_data', {}) if results else {}
+    if not grouped.get(isp):
+        st.caption("💡 Generate the request letters in the Generator tab first to see which requested IP windows hit a subscriber.")
+        return
+    
+    # Match once per (reply store, requests); reruns reuse the summary and matrix
+    requests = requests_from_grouped(grouped, isp)
+    cache_key = (store.path, pd.util.hash_pandas_object(requests, index=False).to_numpy().tobytes())
+    cached = st.session_state.get(f"{key_prefix}_request_matches")
+    if cached is None or cached['key'] != cache_key:
+        matcher = SessionMatcher.from_reply(requests, store.frame(session_columns(store.columns)))
+        cached = {'key': cache_key, 'summary': matcher.summary(), 'matrix': matcher.hit_matrix().reset_index(),
+                  'match_time': matcher.timings.get('match', 0)}
+        st.session_state[f"{key_prefix}_request_matches"] = cached
+    summary = cached['summary']
+    hit_count = int(summary['hit'].sum())
+    
+    st.subheader("🎯 Request Hit / Miss")
+    c1, c2, c3 = st.columns(3)
+    c1.metric(label="Requested Windows", value=len(summary))
+    c2.metric(label="Hit a Session", value=hit_count)
+    c3.metric(label="No Session", value=len(summary) - hit_count)
+    st.caption(f"Matched in {cached['match_time']:.3f}s")
+    st.dataframe(summary, width='stretch', hide_index=True)
+    
+    with st.expander("Request × Subscriber Matrix"):
+        matrix = cached['matrix']
+        st.dataframe(matrix, width='stretch', hide_index=True)
+        st.download_button(
+            label="📥 Download Hit/Miss Matrix",
+            data=matrix.to_csv(index=False),
+            file_name=f"{isp}_request_hits.csv",
+            mime="text/csv",
+            key=f"{key_prefix}_hit_matrix"
+        )
+
 # ----------------------
 
 st.title("🚔 IFSO ISP Letter Generator")
@@ -126,10 +328,12 @@ with st.sidebar:
     st.caption("Clear memory if app becomes slow after processing large files")
     
     if st.button("🗑️ Clear Memory", type="secondary"):
-        # Clear large data from session state
+        # Clear large data from session state (and this session's reply stores on disk)
+        discard_reply_results('airtel_results')
+        discard_reply_results('jio_results')
         keys_to_clear = []
         for key in st.session_state.keys():
-            if key not in ['authenticated', 'processor', 'bank_processor']:
+            if key not in ['authenticated', 'processor', 'bank_processor', 'reply_store_dir']:
                 keys_to_clear.append(key)
         
         for key in keys_to_clear:
@@ -280,40 +484,28 @@ with gen_tab:
             col_zip, col_spacer = st.columns([1, 3])
             
             with col_zip:
-                # Create ZIP file with all generated files
-                import zipfile
-                import io
+                # Bundle all generated files, organized by ISP (built on request, once per result set)
                 from datetime import datetime
                 
-                zip_buffer = io.BytesIO()
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 suspect_name = res.get("suspect_name", "Unknown")
                 
-                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    for file_path in res["generated_files"]:
-                        if os.path.exists(file_path):
-                            file_name = os.path.basename(file_path)
-                            # Organize by ISP
-                            if "JIO" in file_name:
-                                zip_path = f"JIO/{file_name}"
-                            elif "AIRTEL" in file_name:
-                                zip_path = f"AIRTEL/{file_name}"
-                            elif "VI" in file_name:
-                                zip_path = f"VI/{file_name}"
-                            else:
-                                zip_path = file_name
-                            zip_file.write(file_path, zip_path)
-                
-                zip_buffer.seek(0)
+                members = []
+                for file_path in res["generated_files"]:
+                    file_name = os.path.basename(file_path)
+                    # Organize by ISP
+                    if "JIO" in file_name:
+                        zip_path = f"JIO/{file_name}"
+                    elif "AIRTEL" in file_name:
+                        zip_path = f"AIRTEL/{file_name}"
+                    elif "VI" in file_name:
+                        zip_path = f"VI/{file_name}"
+                    else:
+                        zip_path = file_name
+                    members.append((file_path, zip_path))
                 
-                st.download_button(
-                    label="📦 Download All as ZIP",
-                    data=zip_buffer,
-                    file_name=f"{suspect_name}_ISP_Letters_{timestamp}.zip",
-                    mime="application/zip",
-                    key="download_all_isp_letters",
-                    type="primary"
-                )
+                render_bundle_download(members, "isp_bundle", f"{suspect_name}_ISP_Letters_{timestamp}.zip",
+                                       "download_all_isp_letters")
             
             st.write("---")
             
@@ -422,8 +614,7 @@ with reply_tab:
         with col_reset:
             if st.button("🔄 Reset", key="reset_airtel_btn"):
                 # Clear Airtel-specific session state
-                if 'airtel_results' in st.session_state:
-                    del st.session_state['airtel_results']
+                discard_reply_results('airtel_results')
                 if 'airtel_page' in st.session_state:
                     del st.session_state['airtel_page']
                 gc.collect()
@@ -442,140 +633,98 @@ with reply_tab:
                 if results_dict is None:
                     st.error(msg)
                 else:
+                    # Keep only a handle to the on-disk hits across reruns
+                    discard_reply_results('airtel_results')
+                    st.session_state['airtel_results'] = store_reply_results(results_dict, "airtel", "Airtel_Hits_Combined.xlsx")
+                    st.session_state['airtel_page'] = 0
+                    del results_dict
+                    gc.collect()
                     st.success("Analysis Complete!")
-                    
-                    hits_df = results_dict['hits_df']
-                    misses = results_dict['misses']
-                    
-                    c1, c2 = st.columns(2)
-                    c1.metric(label="Valid Hits", value=len(hits_df))
-                    c2.metric(label="Empty/Skipped Files", value=len(misses))
-                    
-                    # Show Hits
-                    if not hits_df.empty:
-                        st.subheader("✅ Valid Data Found")
-                        
-                        # Show summary statistics
-                        total_rows = len(hits_df)
-                        st.info(f"📊 **Total Records Found:** {total_rows:,} rows")
-                        
-                        # Show summary table with relevant columns
-                        # Support both old format (DSL_User_ID) and new format (MSISDN_userID)
-                        display_df = hits_df.drop(columns=["CSV_Path"], errors="ignore")
-                        if 'MSISDN_userID' in display_df.columns:
-                            # New IPDR format - show key columns
-                            key_cols = ['Source_File', 'MSISDN_userID', 'IMEI', 'Source_Public_IPv6', 'Source_Public_IPv4',
-                                       'Event_Start_Time', 'Session_Start_Time', 'Session_End_Time',
-                                       'CGI Latitude', 'CGI Longitude', 'CGI', '2g/4g/5g',
-                                       'Access_Point_Name', 'Roaming_Circle', 'Home_Circle']
-                            key_cols = [c for c in key_cols if c in display_df.columns]
-                            summary_df = display_df[key_cols].rename(columns={
-                                'Source_File': 'IP File',
-                                'MSISDN_userID': 'Phone No.',
-                                'Source_Public_IPv6': 'IPv6',
-                                'Source_Public_IPv4': 'IPv4',
-                                'Event_Start_Time': 'Event Time',
-                                'Session_Start_Time': 'Session Start',
-                                'Session_End_Time': 'Session End',
-                                'CGI Latitude': 'Lat',
-                                'CGI Longitude': 'Long',
-                                '2g/4g/5g': 'Network',
-                                'Access_Point_Name': 'APN',
-                                'Roaming_Circle': 'Circle',
-                                'Home_Circle': 'Home',
-                            })
-                        else:
-                            # Old format
-                            summary_df = display_df
-                        
-                        # Use pagination for large datasets
-                        if total_rows > 10000:
-                            st.write("---")
-                            st.subheader("📄 Paginated Data View")
-                            page_df, start_row, end_row, total, current_page, total_pages = render_pagination(
-                                summary_df, 
-                                'airtel_page', 
-                                page_size=10000
-                            )
-                            st.dataframe(page_df, width='stretch', height=500)
-                        else:
-                            # For small datasets, show all data
-                            st.dataframe(summary_df, width='stretch', height=500)
-                        
-                        # Evidence Downloads
-                        st.subheader("📂 Raw Evidence Files")
-                        if 'CSV_Path' in hits_df.columns:
-                            unique_files = hits_df[['Source_File', 'CSV_Path']].drop_duplicates()
-                            for idx, row in unique_files.iterrows():
-                                fname = row['Source_File']
-                                fpath = row['CSV_Path']
-                                if fpath and os.path.exists(fpath):
-                                    bname = os.path.basename(fpath)
-                                    
-                                    # Download Button
-                                    with open(fpath, "rb") as f:
-                                        st.download_button(
-                                            label=f"📥 Download {bname}",
-                                            data=f,
-                                            file_name=bname,
-                                            mime="text/csv",
-                                            key=f"ev_airtel_{idx}"
-                                        )
-                                    
-                                    # Preview Content (Airtel Specific)
-                                    with st.expander(f"👁️ View Content: {bname}"):
-                                        try:
-                                            # Read lines to find header
-                                            with open(fpath, "r", encoding="latin1") as f2:
-                                                lines = f2.readlines()
-                                            
-                                            header_idx = -1
-                                            for i, line in enumerate(lines):
-                                                if "DSL_User_ID" in line or "MSISDN_userID" in line:
-                                                    header_idx = i
-                                                    break
-                                            
-                                            if header_idx != -1:
-                                                try:
-                                                    sub_df = pd.read_csv(fpath, skiprows=header_idx, header=0, encoding='latin1', quotechar="'", skipinitialspace=True, on_bad_lines='skip', engine='python')
-                                                except:
-                                                    sub_df = pd.read_csv(fpath, skiprows=header_idx, header=0, encoding='latin1', quotechar="'", skipinitialspace=True, engine='python')
-                                                
-                                                # Filter footer for both formats
-                                                if 'DSL_User_ID' in sub_df.columns:
-                                                    sub_df = sub_df[~sub_df['DSL_User_ID'].astype(str).str.contains("System generated", case=False, na=False)]
-                                                    sub_df = sub_df[~sub_df['MSISDN_userID'].astype(str).str.contains("System generated|This is System", case=False, na=False)]
-                                                st.dataframe(sub_df, width='stretch')
-                                            else:
-                                                st.warning("No standard Airtel header found.")
-                                                st.text("".join(lines[:20]))
-                                        except Exception as e:
-                                            st.error(f"Error parsing: {e}")
-
-                        # Combined Excel
-                        import io
-                        buffer = io.BytesIO()
-                        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                             hits_df.to_excel(writer, index=False)
-                        
+        
+        if 'airtel_results' in st.session_state:
+            airtel_results = st.session_state['airtel_results']
+            store = airtel_results['store']
+            misses = airtel_results['misses']
+            
+            c1, c2 = st.columns(2)
+            c1.metric(label="Valid Hits", value=len(store))
+            c2.metric(label="Empty/Skipped Files", value=len(misses))
+            
+            # Show Hits
+            if len(store):
+                st.subheader("✅ Valid Data Found")
+                
+                # Show summary statistics
+                total_rows = len(store)
+                st.info(f"📊 **Total Records Found:** {total_rows:,} rows")
+                
+                # Show summary table with relevant columns
+                # Support both old format (DSL_User_ID) and new format (MSISDN_userID)
+                key_cols, labels = None, None
+                if 'MSISDN_userID' in store.columns:
+                    # New IPDR format - show key columns
+                    key_cols = ['Source_File', 'MSISDN_userID', 'IMEI', 'Source_Public_IPv6', 'Source_Public_IPv4',
+                               'Event_Start_Time', 'Session_Start_Time', 'Session_End_Time',
+                               'CGI Latitude', 'CGI Longitude', 'CGI', '2g/4g/5g',
+                               'Access_Point_Name', 'Roaming_Circle', 'Home_Circle']
+                    key_cols = [c for c in key_cols if c in store.columns]
+                    labels = {
+                        'Source_File': 'IP File',
+                        'MSISDN_userID': 'Phone No.',
+                        'Source_Public_IPv6': 'IPv6',
+                        'Source_Public_IPv4': 'IPv4',
+                        'Event_Start_Time': 'Event Time',
+                        'Session_Start_Time': 'Session Start',
+                        'Session_End_Time': 'Session End',
+                        'CGI Latitude': 'Lat',
+                        'CGI Longitude': 'Long',
+                        '2g/4g/5g': 'Network',
+                        'Access_Point_Name': 'APN',
+                        'Roaming_Circle': 'Circle',
+                        'Home_Circle': 'Home',
+                    }
+                
+                # Sorting / filtering run on the store; only the visible window is loaded
+                view = render_grid_controls(store, "airtel", columns=key_cols, labels=labels)
+                
+                # Use pagination for large datasets
+                if len(view) > 10000:
+                    st.write("---")
+                    st.subheader("📄 Paginated Data View")
+                    page_df, start_row, end_row, total, current_page, total_pages = render_pagination(
+                        view, 
+                        'airtel_page', 
+                        page_size=10000
+                    )
+                else:
+                    # For small datasets, show all data
+                    page_df = view.window(0, len(view))
+                st.dataframe(page_df.rename(columns=labels or {}), width='stretch', height=500)
+                
+                # Which Generator requests were answered
+                render_request_matches(store, "AIRTEL", "airtel")
+                
+                # Evidence Downloads
+                st.subheader("📂 Raw Evidence Files")
+                render_evidence_files(store, "airtel", "airtel")
+                
+                # Combined Excel
+                if airtel_results['excel_path'] and os.path.exists(airtel_results['excel_path']):
+                    with open(airtel_results['excel_path'], "rb") as f:
                         st.download_button(
                             label="📥 Download Combined Airtel Excel",
-                            data=buffer.getvalue(),
+                            data=f,
                             file_name="Airtel_Hits_Combined.xlsx",
                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                             key="dl_airtel_comb"
                         )
-                        
-                        # Clean up large dataframe from memory
-                        del hits_df, display_df, buffer
-                        gc.collect()
-                        
-                    else:
-                        st.warning("No valid data rows found in this file.")
-                        
-                    if misses:
-                        with st.expander("See Empty/No-Record Files"):
-                            st.write(misses)
+                
+            else:
+                st.warning("No valid data rows found in this file.")
+                
+            if misses:
+                with st.expander("See Empty/No-Record Files"):
+                    st.write(misses)
 
     # -----------------------------------------------------------
     # JIO LOGIC (RIGHT COLUMN)
@@ -595,8 +744,7 @@ with reply_tab:
         with col_reset:
             if st.button("🔄 Reset", key="reset_jio_btn"):
                 # Clear Jio-specific session state
-                if 'jio_results' in st.session_state:
-                    del st.session_state['jio_results']
+                discard_reply_results('jio_results')
                 if 'jio_page' in st.session_state:
                     del st.session_state['jio_page']
                 gc.collect()
@@ -617,96 +765,72 @@ with reply_tab:
                 if results_dict is None:
                     st.error(msg)
                 else:
+                    # Keep only a handle to the on-disk hits across reruns
+                    discard_reply_results('jio_results')
+                    st.session_state['jio_results'] = store_reply_results(results_dict, "jio", "Jio_Hits_Combined.xlsx")
+                    st.session_state['jio_page'] = 0
+                    del results_dict
+                    gc.collect()
                     st.success("Analysis Complete!")
+        
+        if 'jio_results' in st.session_state:
+            jio_results = st.session_state['jio_results']
+            store = jio_results['store']
+            misses = jio_results['misses']
+            
+            c1, c2 = st.columns(2)
+            c1.metric(label="Valid Hits", value=len(store))
+            c2.metric(label="Empty/Skipped Files", value=len(misses))
+            
+            if len(store):
+                st.subheader("✅ Valid Data Found")
+                
+                # Show summary statistics
+                total_rows = len(store)
+                st.info(f"📊 **Total Records Found:** {total_rows:,} rows")
+                
+                # Sorting / filtering run on the store; only the visible window is loaded
+                view = render_grid_controls(store, "jio")
+                
+                # Use pagination for large datasets
+                if len(view) > 10000:
+                    st.write("---")
+                    st.subheader("📄 Paginated Data View")
                     
-                    hits_df = results_dict['hits_df']
-                    misses = results_dict['misses']
-                    
-                    c1, c2 = st.columns(2)
-                    c1.metric(label="Valid Hits", value=len(hits_df))
-                    c2.metric(label="Empty/Skipped Files", value=len(misses))
-                    
-                    if not hits_df.empty:
-                        st.subheader("✅ Valid Data Found")
-                        
-                        # Show summary statistics
-                        total_rows = len(hits_df)
-                        st.info(f"📊 **Total Records Found:** {total_rows:,} rows")
-                        
-                        # Prepare display dataframe
-                        display_df = hits_df.drop(columns=["CSV_Path"], errors="ignore")
-                        
-                        # Use pagination for large datasets
-                        if total_rows > 10000:
-                            st.write("---")
-                            st.subheader("📄 Paginated Data View")
-                            
-                            # Render pagination controls and get current page
-                            page_df, start_row, end_row, total, current_page, total_pages = render_pagination(
-                                display_df, 
-                                'jio_page', 
-                                page_size=10000
-                            )
-                            
-                            # Display current page
-                            st.dataframe(page_df, width='stretch', height=500)
-                        else:
-                            # For small datasets, show all data
-                            st.dataframe(display_df, width='stretch', height=500)
-                        
-                        st.subheader("📂 Raw Evidence Files")
-                        if 'CSV_Path' in hits_df.columns:
-                            unique_files = hits_df[['Source_File', 'CSV_Path']].drop_duplicates()
-                            for idx, row in unique_files.iterrows():
-                                fname = row['Source_File']
-                                fpath = row['CSV_Path']
-                                if fpath and os.path.exists(fpath):
-                                    bname = os.path.basename(fpath)
-                                    
-                                    # Download
-                                    with open(fpath, "rb") as f:
-                                        st.download_button(
-                                            label=f"📥 Download {bname}",
-                                            data=f,
-                                            file_name=bname,
-                                            mime="text/csv", 
-                                            key=f"ev_jio_{idx}"
-                                        )
-                                    
-                                    # Preview (Standard CSV)
-                                    with st.expander(f"👁️ View Content: {bname}"):
-                                        try:
-                                            # Jio is simpler, just read csv
-                                            # Read all columns as strings to prevent Arrow serialization errors
-                                            sub_df = pd.read_csv(fpath, on_bad_lines='skip', encoding='latin1', low_memory=False, dtype=str)
-                                            st.dataframe(sub_df, width='stretch')
-                                        except Exception as e:
-                                            st.error(f"Error previewing: {e}")
-
-                        # Combined Excel
-                        import io
-                        buffer = io.BytesIO()
-                        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                             hits_df.to_excel(writer, index=False)
-                        
+                    # Render pagination controls and get current page
+                    page_df, start_row, end_row, total, current_page, total_pages = render_pagination(
+                        view, 
+                        'jio_page', 
+                        page_size=10000
+                    )
+                else:
+                    # For small datasets, show all data
+                    page_df = view.window(0, len(view))
+                st.dataframe(page_df, width='stretch', height=500)
+                
+                # Which Generator requests were answered
+                render_request_matches(store, "JIO", "jio")
+                
+                st.subheader("📂 Raw Evidence Files")
+                render_evidence_files(store, "jio", "jio")
+                
+                # Combined Excel
+                if jio_results['excel_path'] and os.path.exists(jio_results['excel_path']):
+                    with open(jio_results['excel_path'], "rb") as f:
                         st.download_button(
                             label="📥 Download Combined Jio Excel",
-                            data=buffer.getvalue(),
+                            data=f,
                             file_name="Jio_Hits_Combined.xlsx",
                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                             key="dl_jio_comb"
                         )
-                        
-                        # Clean up large dataframe from memory
-                        del hits_df, display_df, buffer
-                        gc.collect()
-                        
-                    else:
-                         st.warning("No valid data rows found.")
-                         
-                    if misses:
-                        with st.expander("See Missed Files"):
-                            st.write(misses)
+                
+            else:
+                 st.warning("No valid data rows found.")
+                 
+            if misses:
+                with st.expander("See Missed Files"):
+                    st.write(misses)
 
     # -----------------------------------------------------------
     # VI LOGIC (RIGHT COLUMN)
@@ -1056,35 +1180,20 @@ Branch : Rajouri Garden, New Delhi"""
                 col_zip, col_spacer = st.columns([1, 3])
                 
                 with col_zip:
-                    # Create ZIP file with all generated letters
-                    import zipfile
-                    import io
+                    # Bundle all generated letters by transaction type (built on request, once per result set)
                     from datetime import datetime
                     
-                    zip_buffer = io.BytesIO()
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     
-                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                        for file_info in st.session_state.bank_generated_files:
-                            if os.path.exists(file_info['path']):
-                                # Add file to ZIP with organized folder structure
-                                file_name = os.path.basename(file_info['path'])
-                                txn_type = file_info['type']
-                                # Create a clean folder name
-                                folder_name = txn_type.replace(" ", "_")
-                                zip_path = f"{folder_name}/{file_name}"
-                                zip_file.write(file_info['path'], zip_path)
+                    members = []
+                    for file_info in st.session_state.bank_generated_files:
+                        file_name = os.path.basename(file_info['path'])
+                        # Create a clean folder name
+                        folder_name = file_info['type'].replace(" ", "_")
+                        members.append((file_info['path'], f"{folder_name}/{file_name}"))
                     
-                    zip_buffer.seek(0)
-                    
-                    st.download_button(
-                        label="📦 Download All as ZIP",
-                        data=zip_buffer,
-                        file_name=f"Bank_Letters_{timestamp}.zip",
-                        mime="application/zip",
-                        key="download_all_bank_letters",
-                        type="primary"
-                    )
+                    render_bundle_download(members, "bank_bundle", f"Bank_Letters_{timestamp}.zip",
+                                           "download_all_bank_letters")
                 
                 st.write("---")
                 
@@ -1,19 +1,24 @@
 import os
 import json
 import datetime
-from bs4 import BeautifulSoup
-from ipwhois import IPWhois
-import openpyxl
-from docx import Document
-from docx.shared import Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
 from collections import defaultdict
 import warnings
 
 import zipfile
-import pandas as pd
+
+# Heavy dependencies are imported on first use (see lazy_imports.py), so
+# opening the app does not pay for the document, HTML and WHOIS stacks
+from lazy_imports import lazy_from, lazy_import
+
+pd = lazy_import('pandas')
+openpyxl = lazy_import('openpyxl')
+BeautifulSoup = lazy_from('bs4', 'BeautifulSoup')
+IPWhois = lazy_from('ipwhois', 'IPWhois')
+Document = lazy_from('docx', 'Document')
+Pt = lazy_from('docx.shared', 'Pt')
+WD_ALIGN_PARAGRAPH = lazy_from('docx.enum.text', 'WD_ALIGN_PARAGRAPH')
+OxmlElement = lazy_from('docx.oxml', 'OxmlElement')
+qn = lazy_from('docx.oxml.ns', 'qn')
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
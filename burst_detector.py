@@ -0,0 +1,257 @@
+"""
+Burst Detection Module
+Rolling-window burst detection with robust (median/MAD) baselines
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BurstDetector:
+    """
+    Detect bursts of activity in a CDR using rolling time windows
+
+    Events are bucketed into fixed slots (one minute by default) on a sorted
+    time axis. The rolling-window count only changes where an event slot
+    enters or leaves the window, so each window size is scored over those
+    breakpoints: one vectorized O(n log n) pass whose memory does not depend
+    on the CDR's time span (a single malformed 1970 or 2099 date does not
+    allocate millions of empty slots).
+
+    Windows are scored with a robust z-score, (x - median) / (MAD / 0.6745),
+    against the typical *active* window (one with at least one event), so a
+    handful of extreme bursts cannot inflate the threshold the way mean + 2σ
+    does. Sparse CDRs often have MAD = 0, so the scale is floored at the
+    Poisson noise of the median count. Per-contact bursts use the same score
+    against each contact's own baseline.
+    """
+
+    DEFAULT_WINDOWS = (5, 15, 60)  # minutes
+
+    def __init__(self, df: pd.DataFrame, contact_column: Optional[str] = None,
+                 slot_seconds: int = 60):
+        if contact_column is None:
+            contact_column = 'B_Party_Clean' if 'B_Party_Clean' in df.columns else 'Called Party Telephone Number'
+
+        self.slot_seconds = slot_seconds
+
+        times = df['DateTime'].to_numpy(dtype='datetime64[ns]')
+        valid = ~np.isnat(times)
+        seconds = times[valid].astype('datetime64[s]').astype(np.int64)
+        order = np.argsort(seconds, kind='stable')
+        seconds = seconds[order]
+
+        if contact_column in df.columns:
+            codes, contacts = pd.factorize(df[contact_column])
+            codes = codes[valid][order]
+        else:
+            codes, contacts = np.full(len(seconds), -1, dtype=np.int64), np.array([], dtype=object)
+        self.contact_codes = codes
+        self.contacts = np.asarray(contacts, dtype=object)
+
+        if len(seconds) > 0:
+            self.origin = seconds[0] - seconds[0] % slot_seconds
+            self.slots = (seconds - self.origin) // slot_seconds
+        else:
+            self.origin = 0
+            self.slots = np.empty(0, dtype=np.int64)
+        # Occupied slots and their event counts (sparse slot histogram)
+        self.slot_ids, self.slot_counts = np.unique(self.slots, return_counts=True)
+
+    @property
+    def n_slots(self) -> int:
+        return int(self.slots[-1]) + 1 if len(self.slots) else 0
+
+    def _window_slots(self, window_minutes: int) -> int:
+        return max(1, int(window_minutes * 60 // self.slot_seconds))
+
+    def window_segments(self, window_minutes: int):
+        """
+        Rolling-window counts as constant runs: (run starts, run ends, counts)
+
+        A window starting at slot t counts the events in [t, t + width); every
+        start in [run_start, run_end) has the same count. Runs with no events
+        are included, so the runs tile [0, n_slots).
+        """
+        width = self._window_slots(window_minutes)
+        if len(self.slot_ids) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+        # A slot's events are counted by windows starting in [slot - width + 1, slot]
+        points = np.concatenate([np.maximum(self.slot_ids - width + 1, 0), self.slot_ids + 1])
+        deltas = np.concatenate([self.slot_counts, -self.slot_counts])
+        order = np.argsort(points, kind='stable')
+        points, deltas = points[order], deltas[order]
+        bounds, first = np.unique(points, return_index=True)
+        counts = np.cumsum(np.add.reduceat(deltas, first))
+        starts = np.concatenate([[0], bounds]) if bounds[0] > 0 else bounds
+        counts = np.concatenate([[0], counts]) if bounds[0] > 0 else counts
+        ends = np.append(starts[1:], self.n_slots)
+        keep = starts < self.n_slots
+        return starts[keep], ends[keep], counts[keep]
+
+    def tiled_counts(self, window_minutes: int) -> np.ndarray:
+        """Event counts of the non-overlapping windows (aligned to the first slot) that saw any activity"""
+        width = self._window_slots(window_minutes)
+        return np.unique(self.slots // width, return_counts=True)[1]
+
+    @staticmethod
+    def _robust_scale(median, mad):
+        """MAD-based sigma, floored at the Poisson noise of the median count"""
+        return np.maximum(mad / 0.6745, np.sqrt(np.maximum(median, 1.0)))
+
+    @classmethod
+    def robust_z(cls, values: np.ndarray, baseline: np.ndarray) -> np.ndarray:
+        """Robust z-score of `values` against the median/MAD of `baseline`"""
+        if len(baseline) == 0:
+            return np.zeros(len(values))
+        median = np.median(baseline)
+        mad = np.median(np.abs(baseline - median))
+        return (values - median) / cls._robust_scale(median, mad)
+
+    def _to_timestamp(self, slot: int) -> str:
+        return pd.Timestamp(int(self.origin + slot * self.slot_seconds), unit='s').strftime('%Y-%m-%d %H:%M:%S')
+
+    def _top_contacts(self, lo: int, hi: int, n: int = 5) -> Dict:
+        codes = self.contact_codes[lo:hi]
+        codes = codes[codes >= 0]
+        if len(codes) == 0:
+            return {}
+        counts = np.bincount(codes, minlength=len(self.contacts))
+        top = np.argsort(-counts, kind='stable')[:n]
+        return {self.contacts[c]: int(counts[c]) for c in top if counts[c] > 0}
+
+    def detect_intervals(self, window_minutes: int = 15, z_threshold: float = 3.5,
+                         min_events: int = 3, top_n: int = 20) -> List[Dict]:
+        """
+        Ranked burst intervals for one window size
+
+        Overlapping flagged windows are merged into a single interval.
+        """
+        if self.n_slots == 0:
+            return []
+
+        width = self._window_slots(window_minutes)
+        run_starts, run_ends, counts = self.window_segments(window_minutes)
+
+        # Baseline: non-overlapping windows that saw any activity
+        baseline = self.tiled_counts(window_minutes)
+        z = self.robust_z(counts, baseline)
+
+        flagged = np.flatnonzero((z >= z_threshold) & (counts >= min_events))
+        if len(flagged) == 0:
+            return []
+
+        # Merge overlapping windows into intervals: consecutive flagged runs
+        # join when the next flagged start is within `width` of the previous one
+        gaps = run_starts[flagged[1:]] - (run_ends[flagged[:-1]] - 1)
+        breaks = np.flatnonzero(gaps > width) + 1
+        group_starts = np.concatenate([[0], breaks])
+        first = run_starts[flagged[group_starts]]
+        last = run_ends[flagged[np.concatenate([breaks - 1, [len(flagged) - 1]])]] - 1
+        peak_count = np.maximum.reduceat(counts[flagged], group_starts)
+        peak_z = np.maximum.reduceat(z[flagged], group_starts)
+
+        ranked = np.lexsort((-peak_count, -peak_z))[:top_n]
+
+        intervals = []
+        for g in ranked:
+            start_slot = int(first[g])
+            end_slot = int(min(last[g] + width, self.n_slots))
+            lo, hi = np.searchsorted(self.slots, [start_slot, end_slot])
+            intervals.append({
+                'window_minutes': int(window_minutes),
+                'start': self._to_timestamp(start_slot),
+                'end': self._to_timestamp(end_slot),
+                'count': int(hi - lo),
+                'peak_count': int(peak_count[g]),
+                'baseline': float(np.median(baseline)) if len(baseline) else 0.0,
+                'z_score': float(peak_z[g]),
+                'contacts': self._top_contacts(lo, hi),
+            })
+        return intervals
+
+    def detect_contact_bursts(self, window_minutes: int = 60, z_threshold: float = 3.5,
+                              min_events: int = 3, min_active_windows: int = 3,
+                              top_n: int = 20) -> List[Dict]:
+        """
+        Windows in which a contact was far busier than its own usual rate
+
+        Each contact's baseline is the median/MAD of its event counts over the
+        (non-overlapping) windows in which it was active at all.
+        """
+        valid = self.contact_codes >= 0
+        if not valid.any():
+            return []
+
+        width = self._window_slots(window_minutes)
+        n_bins = int(self.slots[-1] // width) + 1
+
+        # Events per (contact, window) from one sort of packed integer keys
+        keys, events = np.unique(self.contact_codes[valid] * n_bins + self.slots[valid] // width,
+                                 return_counts=True)
+        contact = keys // n_bins
+        window = keys % n_bins
+
+        # Keys are sorted, so each contact's windows form a contiguous block
+        _, starts, active_windows = np.unique(contact, return_index=True, return_counts=True)
+        block = np.repeat(np.arange(len(starts)), active_windows)
+        median = self._block_median(events, block, starts, active_windows)[block]
+        abs_dev = np.abs(events - median)
+        mad = self._block_median(abs_dev, block, starts, active_windows)[block]
+        z = (events - median) / self._robust_scale(median, mad)
+
+        hits = np.flatnonzero(
+            (z >= z_threshold)
+            & (events >= min_events)
+            & (active_windows[block] >= min_active_windows)
+        )
+        hits = hits[np.lexsort((-events[hits], -z[hits]))][:top_n]
+
+        return [
+            {
+                'contact': self.contacts[int(contact[i])],
+                'window_minutes': int(window_minutes),
+                'start': self._to_timestamp(int(window[i]) * width),
+                'end': self._to_timestamp(int(window[i] + 1) * width),
+                'count': int(events[i]),
+                'baseline': float(median[i]),
+                'z_score': float(z[i]),
+            }
+            for i in hits
+        ]
+
+    @staticmethod
+    def _block_median(values: np.ndarray, block: np.ndarray, starts: np.ndarray,
+                      sizes: np.ndarray) -> np.ndarray:
+        """Median of each contiguous block of `values`"""
+        ordered = values[np.lexsort((values, block))]
+        lo = ordered[starts + (sizes - 1) // 2]
+        hi = ordered[starts + sizes // 2]
+        return (lo + hi) / 2
+
+    def detect(self, windows: Sequence[int] = DEFAULT_WINDOWS, z_threshold: float = 3.5,
+               min_events: int = 3, top_n: int = 20) -> Dict:
+        """
+        Run interval and per-contact detection for several window sizes
+
+        Returns:
+            dict with 'intervals' (ranked across windows) and 'contact_bursts'
+        """
+        intervals = []
+        contact_bursts = []
+        for window in windows:
+            intervals.extend(self.detect_intervals(window, z_threshold, min_events, top_n))
+            contact_bursts.extend(self.detect_contact_bursts(window, z_threshold, min_events, top_n=top_n))
+
+        intervals.sort(key=lambda x: (x['z_score'], x['peak_count']), reverse=True)
+        contact_bursts.sort(key=lambda x: (x['z_score'], x['count']), reverse=True)
+        return {
+            'windows': [int(w) for w in windows],
+            'intervals': intervals[:top_n],
+            'contact_bursts': contact_bursts[:top_n],
+        }
@@ -6,73 +6,238 @@ Advanced analytics and pattern detection for CDR data
 import pandas as pd
 import numpy as np
 from datetime import datetime, time, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from collections import Counter
 import logging
 
+from contact_index import ContactIndex
+from burst_detector import BurstDetector
+from cdr_dataset import shared_frame
+
 logger = logging.getLogger(__name__)
 
 
 class CDRAnalyzer:
     """Advanced analysis of Call Detail Records"""
     
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
+    # Period codes used by the shared aggregates (flags are mutually exclusive)
+    PERIODS = ('night', 'day', 'evening', 'other')
+    
+    def __init__(self, df: pd.DataFrame, sql_backend=None):
+        # Optional cdr_sql.CDRSqlBackend: aggregates become GROUP BY queries
+        self.sql_backend = sql_backend
+        self.df = shared_frame(df)
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._df
+    
+    @df.setter
+    def df(self, value: pd.DataFrame):
+        self._df = value
+        self.invalidate()
+    
+    def invalidate(self):
+        """Drop memoized aggregates and results (call after changing values of self.df)"""
+        self._results = {}
+        self._frame_key = None
+    
+    def _current_frame_key(self) -> Tuple:
+        """
+        Cheap key for the frame's identity and shape (not its values)
+
+        Assigning a new frame, or adding / dropping rows or columns, resets
+        the memoized results. Editing or replacing the values of an existing
+        column does not: call invalidate() afterwards.
+        """
+        return (id(self._df), len(self._df), tuple(self._df.columns))
+    
+    def _memoized(self, name: str, builder):
+        """Return the cached result for `name`, building it on first use"""
+        key = self._current_frame_key()
+        if key != self._frame_key:
+            self._results = {}
+            self._frame_key = key
+        if name not in self._results:
+            self._results[name] = builder()
+        return self._results[name]
+    
+    @property
+    def contact_index(self) -> ContactIndex:
+        """Shared contact -> rows index for per-contact drilldowns"""
+        return self._memoized('_contact_index', lambda: ContactIndex(self.df))
+    
+    @property
+    def burst_detector(self) -> BurstDetector:
+        """Rolling-window burst detector over the sorted DateTime axis"""
+        return self._memoized('_burst_detector', lambda: BurstDetector(self.df))
+    
+    def get_burst_analysis(self, windows: Tuple[int, ...] = BurstDetector.DEFAULT_WINDOWS,
+                           z_threshold: float = 3.5, min_events: int = 3) -> Dict:
+        """
+        Ranked burst intervals and per-contact bursts for the given windows (minutes)
+        
+        Uses robust (median/MAD) z-scores; see BurstDetector.
+        """
+        key = f"bursts_{tuple(windows)}_{z_threshold}_{min_events}"
+        return self._memoized(key, lambda: self.burst_detector.detect(
+            tuple(windows), z_threshold=z_threshold, min_events=min_events
+        ))
+    
+    def get_aggregates(self) -> Dict:
+        """
+        Shared aggregates computed in a single pass over the frame
+        
+        The temporal, contact and communication-pattern counts derive from
+        this set, so switching between those analyses does not rescan the
+        CDR. With a SQL backend only this set is computed by the embedded
+        engine; location, device, duration, new-contact and burst analyses
+        always run in pandas on self.df.
+        """
+        if self.sql_backend is not None:
+            return self._memoized('_aggregates', lambda: self.sql_backend.cdr_aggregates(self.df))
+        return self._memoized('_aggregates', self._compute_aggregates)
+    
+    def _compute_aggregates(self) -> Dict:
+        """Build hour histograms, per-contact and per-period counts and daily counts"""
+        df = self.df
+        n = len(df)
+        
+        hours = pd.to_numeric(df['Hour'], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+        hours = np.where((hours >= 0) & (hours < 24), hours, 24)  # 24 = unknown hour bucket
+        
+        period = np.full(n, 3, dtype=np.int64)
+        for code, flag in enumerate(['Is_Night', 'Is_Day', 'Is_Evening']):
+            if flag in df.columns:
+                period[df[flag].to_numpy() == 1] = code
+        
+        # Hour histogram per period: one bincount over a combined key
+        period_hour = np.bincount(period * 25 + hours, minlength=4 * 25).reshape(4, 25)
+        
+        # Call categories per period
+        cat_codes, categories = pd.factorize(df['Call_Category'])
+        n_cat = len(categories)
+        cat_valid = cat_codes >= 0
+        period_category = np.bincount(
+            period[cat_valid] * n_cat + cat_codes[cat_valid], minlength=4 * n_cat
+        ).reshape(4, n_cat)
+        
+        # Duration per period
+        durations = pd.to_numeric(df['Dur(s)'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        period_duration = np.bincount(period, weights=durations, minlength=4)
+        
+        # Per-contact counts by period and by raw call type (IN / OUT / SMS / other)
+        contact_codes, contacts = pd.factorize(df['B_Party_Clean'])
+        n_contacts = len(contacts)
+        contact_valid = contact_codes >= 0
+        call_type = df['Call Type'].astype(str) if 'Call Type' in df.columns else pd.Series('', index=df.index)
+        type_code = np.full(n, 3, dtype=np.int64)
+        type_code[call_type.str.contains('SM', na=False).to_numpy()] = 2
+        type_code[(call_type == 'OUT').to_numpy()] = 1
+        type_code[(call_type == 'IN').to_numpy()] = 0
+        
+        cc = contact_codes[contact_valid]
+        contact_period = np.bincount(cc * 4 + period[contact_valid], minlength=n_contacts * 4).reshape(n_contacts, 4)
+        contact_type = np.bincount(cc * 4 + type_code[contact_valid], minlength=n_contacts * 4).reshape(n_contacts, 4)
+        
+        contact_stats = pd.DataFrame({
+            'total': contact_period.sum(axis=1),
+            'night': contact_period[:, 0],
+            'day': contact_period[:, 1],
+            'evening': contact_period[:, 2],
+            'incoming': contact_type[:, 0],
+            'outgoing': contact_type[:, 1],
+            'sms': contact_type[:, 2],
+        }, index=pd.Index(contacts, name='B_Party_Clean'))
+        # Stable sort keeps first-seen order among ties
+        contact_stats = contact_stats.sort_values('total', ascending=False, kind='mergesort')
+        
+        daily_counts = df.groupby('Date_Only').size() if 'Date_Only' in df.columns else pd.Series(dtype=int)
+        dow_counts = df['DayOfWeek'].value_counts() if 'DayOfWeek' in df.columns else pd.Series(dtype=int)
+        
+        return {
+            'total': n,
+            'hour_counts': period_hour[:, :24].sum(axis=0),
+            'period_hour_counts': {p: period_hour[i, :24] for i, p in enumerate(self.PERIODS)},
+            'period_counts': {p: int(period_hour[i].sum()) for i, p in enumerate(self.PERIODS)},
+            'period_categories': {
+                p: pd.Series(period_category[i], index=categories) for i, p in enumerate(self.PERIODS)
+            },
+            'period_duration': {p: float(period_duration[i]) for i, p in enumerate(self.PERIODS)},
+            'contact_stats': contact_stats,
+            'daily_counts': daily_counts,
+            'dow_counts': dow_counts,
+        }
+    
+    @staticmethod
+    def _top_counts(counts: pd.Series, n: Optional[int] = None) -> Dict:
+        """Non-zero counts in descending order as a dict"""
+        counts = counts[counts > 0].sort_values(ascending=False, kind='mergesort')
+        if n is not None:
+            counts = counts.head(n)
+        return {k: int(v) for k, v in counts.items()}
+    
+    def _top_period_contacts(self, period: str, n: int) -> Dict:
+        """Top contacts within a period, taken from the shared contact table"""
+        stats = self.get_aggregates()['contact_stats']
+        return self._top_counts(stats[period], n)
         
     def get_temporal_analysis(self) -> Dict:
         """
         STATE-OF-THE-ART TEMPORAL ANALYSIS
         Comprehensive day/night and hourly pattern analysis
         """
+        return self._memoized('temporal', self._build_temporal_analysis)
+    
+    def _build_temporal_analysis(self) -> Dict:
+        agg = self.get_aggregates()
+        total = agg['total']
+        hours = agg['hour_counts']
+        counts = agg['period_counts']
+        period_hours = agg['period_hour_counts']
         analysis = {}
         
         # === NIGHT vs DAY ANALYSIS ===
-        night_calls = self.df[self.df['Is_Night'] == 1]
-        day_calls = self.df[self.df['Is_Day'] == 1]
-        evening_calls = self.df[self.df['Is_Evening'] == 1]
-        
         analysis['night_day_summary'] = {
-            'night_count': len(night_calls),
-            'day_count': len(day_calls),
-            'evening_count': len(evening_calls),
-            'night_percentage': (len(night_calls) / len(self.df) * 100) if len(self.df) > 0 else 0,
-            'day_percentage': (len(day_calls) / len(self.df) * 100) if len(self.df) > 0 else 0,
-            'evening_percentage': (len(evening_calls) / len(self.df) * 100) if len(self.df) > 0 else 0,
+            'night_count': counts['night'],
+            'day_count': counts['day'],
+            'evening_count': counts['evening'],
+            'night_percentage': (counts['night'] / total * 100) if total > 0 else 0,
+            'day_percentage': (counts['day'] / total * 100) if total > 0 else 0,
+            'evening_percentage': (counts['evening'] / total * 100) if total > 0 else 0,
         }
         
         # Night activity breakdown
         analysis['night_activity'] = {
-            'late_night_00_03': len(self.df[(self.df['Hour'] >= 0) & (self.df['Hour'] < 3)]),
-            'late_night_03_06': len(self.df[(self.df['Hour'] >= 3) & (self.df['Hour'] < 6)]),
-            'night_22_00': len(self.df[(self.df['Hour'] >= 22)]),
-            'top_night_contacts': self._get_top_contacts(night_calls, 10),
-            'night_call_types': night_calls['Call_Category'].value_counts().to_dict(),
-            'night_duration_total': int(night_calls['Dur(s)'].sum()),
-            'night_duration_avg': float(night_calls['Dur(s)'].mean()) if len(night_calls) > 0 else 0,
+            'late_night_00_03': int(hours[0:3].sum()),
+            'late_night_03_06': int(hours[3:6].sum()),
+            'night_22_00': int(hours[22:24].sum()),
+            'top_night_contacts': self._top_period_contacts('night', 10),
+            'night_call_types': self._top_counts(agg['period_categories']['night']),
+            'night_duration_total': int(agg['period_duration']['night']),
+            'night_duration_avg': (agg['period_duration']['night'] / counts['night']) if counts['night'] > 0 else 0,
         }
         
         # Day activity breakdown
         analysis['day_activity'] = {
-            'morning_06_09': len(self.df[(self.df['Hour'] >= 6) & (self.df['Hour'] < 9)]),
-            'morning_09_12': len(self.df[(self.df['Hour'] >= 9) & (self.df['Hour'] < 12)]),
-            'afternoon_12_15': len(self.df[(self.df['Hour'] >= 12) & (self.df['Hour'] < 15)]),
-            'afternoon_15_18': len(self.df[(self.df['Hour'] >= 15) & (self.df['Hour'] < 18)]),
-            'top_day_contacts': self._get_top_contacts(day_calls, 10),
-            'day_call_types': day_calls['Call_Category'].value_counts().to_dict(),
-            'day_duration_total': int(day_calls['Dur(s)'].sum()),
-            'day_duration_avg': float(day_calls['Dur(s)'].mean()) if len(day_calls) > 0 else 0,
+            'morning_06_09': int(hours[6:9].sum()),
+            'morning_09_12': int(hours[9:12].sum()),
+            'afternoon_12_15': int(hours[12:15].sum()),
+            'afternoon_15_18': int(hours[15:18].sum()),
+            'top_day_contacts': self._top_period_contacts('day', 10),
+            'day_call_types': self._top_counts(agg['period_categories']['day']),
+            'day_duration_total': int(agg['period_duration']['day']),
+            'day_duration_avg': (agg['period_duration']['day'] / counts['day']) if counts['day'] > 0 else 0,
         }
         
         # Hourly distribution
-        hourly_dist = self.df.groupby('Hour').size().to_dict()
-        analysis['hourly_distribution'] = {str(h): hourly_dist.get(h, 0) for h in range(24)}
+        analysis['hourly_distribution'] = {str(h): int(hours[h]) for h in range(24)}
         
         # Peak hours
-        hourly_counts = self.df['Hour'].value_counts()
         analysis['peak_hours'] = {
-            'overall': int(hourly_counts.idxmax()) if len(hourly_counts) > 0 else None,
-            'night': int(night_calls['Hour'].value_counts().idxmax()) if len(night_calls) > 0 else None,
-            'day': int(day_calls['Hour'].value_counts().idxmax()) if len(day_calls) > 0 else None,
+            'overall': int(hours.argmax()) if hours.sum() > 0 else None,
+            'night': int(period_hours['night'].argmax()) if counts['night'] > 0 else None,
+            'day': int(period_hours['day'].argmax()) if counts['day'] > 0 else None,
         }
         
         # Suspicious patterns
@@ -82,15 +247,19 @@ class CDRAnalyzer:
     
     def get_contact_analysis(self) -> Dict:
         """Analyze contact patterns and relationships"""
+        return self._memoized('contact', self._build_contact_analysis)
+    
+    def _build_contact_analysis(self) -> Dict:
+        stats = self.get_aggregates()['contact_stats']
+        contact_counts = stats['total']
         analysis = {}
         
         # Top contacts overall
-        contact_counts = self.df['B_Party_Clean'].value_counts()
-        analysis['top_contacts'] = contact_counts.head(20).to_dict()
+        analysis['top_contacts'] = self._top_counts(contact_counts, 20)
         
         # Contact frequency distribution
         analysis['contact_frequency'] = {
-            'unique_contacts': int(self.df['B_Party_Clean'].nunique()),
+            'unique_contacts': int(len(contact_counts)),
             'one_time_contacts': int((contact_counts == 1).sum()),
             'frequent_contacts_5plus': int((contact_counts >= 5).sum()),
             'very_frequent_10plus': int((contact_counts >= 10).sum()),
@@ -98,13 +267,12 @@ class CDRAnalyzer:
         
         # Call type breakdown by contact
         analysis['contact_call_types'] = {}
-        for contact in contact_counts.head(10).index:
-            contact_df = self.df[self.df['B_Party_Clean'] == contact]
+        for contact, row in stats.head(10).to_dict('index').items():
             analysis['contact_call_types'][contact] = {
-                'total': len(contact_df),
-                'incoming': len(contact_df[contact_df['Call Type'] == 'IN']),
-                'outgoing': len(contact_df[contact_df['Call Type'] == 'OUT']),
-                'sms': len(contact_df[contact_df['Call Type'].str.contains('SM', na=False)]),
+                'total': int(row['total']),
+                'incoming': int(row['incoming']),
+                'outgoing': int(row['outgoing']),
+                'sms': int(row['sms']),
             }
         
         # New contacts over time
@@ -114,6 +282,9 @@ class CDRAnalyzer:
     
     def get_location_analysis(self) -> Dict:
         """Analyze location patterns from tower data"""
+        return self._memoized('location', self._build_location_analysis)
+    
+    def _build_location_analysis(self) -> Dict:
         analysis = {}
         
         # Filter records with valid coordinates
@@ -152,6 +323,10 @@ class CDRAnalyzer:
     
     def get_communication_patterns(self) -> Dict:
         """Analyze communication patterns and behaviors"""
+        return self._memoized('communication', self._build_communication_patterns)
+    
+    def _build_communication_patterns(self) -> Dict:
+        agg = self.get_aggregates()
         analysis = {}
         
         # Call duration analysis
@@ -169,7 +344,7 @@ class CDRAnalyzer:
             }
         
         # Daily activity patterns
-        daily_counts = self.df.groupby('Date_Only').size()
+        daily_counts = agg['daily_counts']
         analysis['daily_patterns'] = {
             'avg_daily_activity': float(daily_counts.mean()),
             'max_daily_activity': int(daily_counts.max()),
@@ -180,14 +355,21 @@ class CDRAnalyzer:
         # Burst detection (high activity periods)
         analysis['burst_activity'] = self._detect_burst_activity()
         
+        # Sub-hour bursts on rolling windows with robust baselines
+        bursts = self.get_burst_analysis()
+        analysis['burst_intervals'] = bursts['intervals']
+        analysis['contact_bursts'] = bursts['contact_bursts']
+        
         # Weekly patterns
-        dow_counts = self.df['DayOfWeek'].value_counts()
-        analysis['day_of_week'] = dow_counts.to_dict()
+        analysis['day_of_week'] = agg['dow_counts'].to_dict()
         
         return analysis
     
     def get_device_analysis(self) -> Dict:
         """Analyze device and SIM usage patterns"""
+        return self._memoized('device', self._build_device_analysis)
+    
+    def _build_device_analysis(self) -> Dict:
         analysis = {}
         
         # IMEI analysis
@@ -215,42 +397,42 @@ class CDRAnalyzer:
     
     def _detect_suspicious_temporal_patterns(self) -> Dict:
         """Detect suspicious temporal patterns"""
+        agg = self.get_aggregates()
         patterns = {}
         
         # Excessive night activity
-        night_pct = (self.df['Is_Night'].sum() / len(self.df) * 100) if len(self.df) > 0 else 0
+        night_count = agg['period_counts']['night']
+        night_pct = (night_count / agg['total'] * 100) if agg['total'] > 0 else 0
         patterns['excessive_night_activity'] = night_pct > 30
         patterns['night_activity_percentage'] = float(night_pct)
         
         # Late night activity (00:00 - 04:00)
-        late_night = len(self.df[(self.df['Hour'] >= 0) & (self.df['Hour'] < 4)])
+        late_night = int(agg['hour_counts'][0:4].sum())
         patterns['late_night_activity'] = late_night
         patterns['late_night_suspicious'] = late_night > 50
         
         # Consistent night contacts
-        night_df = self.df[self.df['Is_Night'] == 1]
-        if len(night_df) > 0:
-            night_contacts = night_df['B_Party_Clean'].value_counts()
-            patterns['frequent_night_contacts'] = night_contacts.head(5).to_dict()
+        if night_count > 0:
+            patterns['frequent_night_contacts'] = self._top_period_contacts('night', 5)
         
         return patterns
     
     def _analyze_new_contacts(self) -> List[Dict]:
         """Analyze when new contacts appear"""
-        timeline = []
-        seen_contacts = set()
-        
-        for _, row in self.df.sort_values('DateTime').iterrows():
-            contact = row['B_Party_Clean']
-            if contact not in seen_contacts and contact != 'Unknown':
-                seen_contacts.add(contact)
-                timeline.append({
-                    'date': row['DateTime'].strftime('%Y-%m-%d'),
-                    'contact': contact,
-                    'call_type': row['Call_Category']
-                })
-        
-        return timeline[:50]  # Return first 50 new contacts
+        sorted_df = self.df.sort_values('DateTime')
+        known = sorted_df[sorted_df['B_Party_Clean'] != 'Unknown']
+        
+        # First appearance of each contact, in chronological order
+        first_seen = known.drop_duplicates(subset='B_Party_Clean', keep='first').head(50)  # First 50 new contacts
+        
+        dates = first_seen['DateTime'].dt.strftime('%Y-%m-%d').tolist()
+        contacts = first_seen['B_Party_Clean'].tolist()
+        call_types = first_seen['Call_Category'].tolist()
+        
+        return [
+            {'date': date, 'contact': contact, 'call_type': call_type}
+            for date, contact, call_type in zip(dates, contacts, call_types)
+        ]
     
     def _analyze_movement(self) -> Dict:
         """Analyze movement between locations"""
@@ -260,17 +442,10 @@ class CDRAnalyzer:
         valid_df = self.df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime')
         
         if len(valid_df) > 1:
-            # Detect location changes
-            location_changes = 0
-            prev_lat, prev_lon = None, None
-            
-            for _, row in valid_df.iterrows():
-                curr_lat, curr_lon = row['First_Lat'], row['First_Long']
-                if prev_lat is not None:
-                    # Consider it a movement if coordinates differ significantly
-                    if abs(curr_lat - prev_lat) > 0.01 or abs(curr_lon - prev_lon) > 0.01:
-                        location_changes += 1
-                prev_lat, prev_lon = curr_lat, curr_lon
+            # Consider it a movement if coordinates differ significantly from the previous fix
+            lat_step = valid_df['First_Lat'].astype(float).diff().abs()
+            lon_step = valid_df['First_Long'].astype(float).diff().abs()
+            location_changes = int(((lat_step > 0.01) | (lon_step > 0.01)).sum())
             
             movement['total_movements'] = location_changes
             movement['mobility_score'] = float(location_changes / len(valid_df) * 100)
@@ -303,22 +478,23 @@ class CDRAnalyzer:
     
     def _detect_device_changes(self) -> List[Dict]:
         """Detect when device (IMEI) changes"""
-        changes = []
-        
         if 'IMEI' not in self.df.columns:
-            return changes
+            return []
         
         sorted_df = self.df.sort_values('DateTime')
-        prev_imei = None
-        
-        for _, row in sorted_df.iterrows():
-            curr_imei = row['IMEI']
-            if prev_imei is not None and curr_imei != prev_imei:
-                changes.append({
-                    'date': row['DateTime'].strftime('%Y-%m-%d %H:%M:%S'),
-                    'from_imei': prev_imei,
-                    'to_imei': curr_imei
-                })
-            prev_imei = curr_imei
-        
-        return changes
+        imei = sorted_df['IMEI']
+        prev_imei = imei.shift()
+        
+        # Missing IMEIs never compare equal, matching plain Python `!=` semantics
+        changed = imei.ne(prev_imei).fillna(True).to_numpy(dtype=bool, copy=True)
+        changed[:1] = False
+        
+        dates = sorted_df['DateTime'].to_numpy()[changed]
+        dates = pd.DatetimeIndex(dates).strftime('%Y-%m-%d %H:%M:%S').tolist()
+        from_imei = prev_imei.to_numpy(dtype=object)[changed].tolist()
+        to_imei = imei.to_numpy(dtype=object)[changed].tolist()
+        
+        return [
+            {'date': date, 'from_imei': old, 'to_imei': new}
+            for date, old, new in zip(dates, from_imei, to_imei)
+        ]
@@ -5,20 +5,33 @@ State-of-the-art Call Detail Record Analysis Tool
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import folium
-from streamlit_folium import folium_static
-import networkx as nx
+import numpy as np
 from datetime import datetime, timedelta
 import json
+import os
+import tempfile
+
+# Charting and map libraries load with the first section that draws them
+from lazy_imports import lazy_from, lazy_import
+
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+make_subplots = lazy_from('plotly.subplots', 'make_subplots')
+folium = lazy_import('folium')
+folium_static = lazy_from('streamlit_folium', 'folium_static')
 
 # Import custom modules
 from cdr_parser import CDRParser
 from cdr_analyzer import CDRAnalyzer
 from network_analyzer import NetworkAnalyzer
 from location_analyzer import LocationAnalyzer
+from correlation_engine import CorrelationEngine
+from graph_layout import GraphLayoutService
+from render_cache import RenderCache
+from cdr_dataset import CDRDataset
+from cdr_query import CDRQueryEngine
+from cdr_sql import backend_from_env
+from reply_correlation import ReplyCorrelator
 
 # Page configuration
 st.set_page_config(
@@ -130,38 +143,6 @@ st.markdown("""
         margin: 1rem 0;
     }
     
-    /* Futuristic Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 1rem;
-        background: rgba(255, 255, 255, 0.02);
-        backdrop-filter: blur(10px);
-        padding: 0.5rem;
-        border-radius: 15px;
-        border: 1px solid rgba(0, 245, 255, 0.1);
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        padding: 1rem 2rem;
-        font-weight: 600;
-        background: rgba(255, 255, 255, 0.05);
-        border-radius: 10px;
-        border: 1px solid rgba(0, 245, 255, 0.2);
-        color: #00f5ff;
-        transition: all 0.3s ease;
-    }
-    
-    .stTabs [data-baseweb="tab"]:hover {
-        background: rgba(0, 245, 255, 0.1);
-        box-shadow: 0 0 15px rgba(0, 245, 255, 0.3);
-        transform: translateY(-2px);
-    }
-    
-    .stTabs [data-baseweb="tab"][aria-selected="true"] {
-        background: linear-gradient(135deg, rgba(0, 245, 255, 0.2), rgba(102, 126, 234, 0.2));
-        border-color: #00f5ff;
-        box-shadow: 0 0 20px rgba(0, 245, 255, 0.5);
-    }
-    
     /* Metrics with Neon Effect */
     [data-testid="stMetricValue"] {
         font-size: 2rem;
@@ -256,6 +237,39 @@ if 'parsed_df' not in st.session_state:
 if 'analyzer' not in st.session_state:
     st.session_state.analyzer = None
 
+
+def get_render_cache():
+    """The session's RenderCache"""
+    if 'render_cache' not in st.session_state:
+        st.session_state.render_cache = RenderCache()
+    return st.session_state.render_cache
+
+
+def cached_result(df, name, builder, *params):
+    """
+    Result of builder() for this dataset and widget parameters, reused across reruns
+    
+    Backed by a per-session RenderCache keyed on the dataset fingerprint,
+    `name` and `params`; least recently used entries are evicted first.
+    """
+    return get_render_cache().get(df, name, builder, *params)
+
+
+def dataset_key(df):
+    """Content fingerprint of df, for caches outside cached_result (id() is reused after GC)"""
+    return get_render_cache().fingerprint(df)
+
+
+def get_dataset(df):
+    """The session's shared CDRDataset over df (no copy; masks and derived columns built once)"""
+    return cached_result(df, 'dataset', lambda: CDRDataset(df))
+
+
+# Heavy panels run as fragments where available (Streamlit >= 1.37), so their
+# own widgets rerun just the panel instead of the whole page
+panel_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">🔍 CDR Analyzer - Law Enforcement Edition</h1>', unsafe_allow_html=True)
@@ -285,7 +299,10 @@ def main():
                         
                         st.session_state.parsed_df = df
                         st.session_state.cdr_data = parser
-                        st.session_state.analyzer = CDRAnalyzer(df)
+                        st.session_state.analyzer = CDRAnalyzer(df, sql_backend=backend_from_env())
+                        # Build the shared contact index once, up front (assigned so
+                        # Streamlit magic does not echo it into the sidebar)
+                        _ = st.session_state.analyzer.contact_index
                         
                         st.success(f"✅ Successfully parsed {len(df)} records!")
                         st.rerun()
@@ -363,44 +380,146 @@ def main():
         df = st.session_state.parsed_df
         analyzer = st.session_state.analyzer
         
-        # Create tabs
-        tabs = st.tabs([
-            "📊 Dashboard",
-            "🌙 Temporal Analysis",
-            "👥 Contact Network",
-            "🗺️ Location Intelligence",
-            "📞 Communication Patterns",
-            "🔍 Search & Filter",
-            "📄 Reports"
-        ])
-        
-        # TAB 1: Dashboard
-        with tabs[0]:
-            render_dashboard(df, analyzer)
-        
-        # TAB 2: Temporal Analysis
-        with tabs[1]:
-            render_temporal_analysis(df, analyzer)
-        
-        # TAB 3: Contact Network
-        with tabs[2]:
-            render_contact_network(df, analyzer)
-        
-        # TAB 4: Location Intelligence
-        with tabs[3]:
-            render_location_intelligence(df, analyzer)
-        
-        # TAB 5: Communication Patterns
-        with tabs[4]:
-            render_communication_patterns(df, analyzer)
-        
-        # TAB 6: Search & Filter
-        with tabs[5]:
-            render_search_filter(df)
-        
-        # TAB 7: Reports
-        with tabs[6]:
-            render_reports(df, analyzer)
+        # Only the selected section runs; the others cost nothing on a rerun
+        sections = {
+            "📊 Dashboard": lambda: render_dashboard(df, analyzer),
+            "🌙 Temporal Analysis": lambda: render_temporal_analysis(df, analyzer),
+            "👥 Contact Network": lambda: render_contact_network(df, analyzer),
+            "🗺️ Location Intelligence": lambda: render_location_intelligence(df, analyzer),
+            "📞 Communication Patterns": lambda: render_communication_patterns(df, analyzer),
+            "🔍 Search & Filter": lambda: render_search_filter(df),
+            "📄 Reports": lambda: render_reports(df, analyzer),
+        }
+        section = st.radio("Section", list(sections), horizontal=True, key="active_section",
+                           label_visibility="collapsed")
+        st.markdown("---")
+        sections[section]()
+
+
+def build_call_flow_figure(df, analyzer):
+    """Sankey of calls between the target and its top 10 call contacts"""
+    # Get top 10 contacts for cleaner visualization
+    contact_index = analyzer.contact_index
+    incoming_mask = (df['Call_Category'] == 'Incoming Call').to_numpy()
+    outgoing_mask = (df['Call_Category'] == 'Outgoing Call').to_numpy()
+    top_contacts = contact_index.top_contacts(10, mask=incoming_mask | outgoing_mask)
+    
+    # Build Sankey data
+    sources = []
+    targets = []
+    values = []
+    colors = []
+    
+    # Incoming calls: Contact -> Target
+    for contact in top_contacts:
+        incoming = contact_index.count(contact, mask=incoming_mask)
+        if incoming > 0:
+            sources.append(contact)
+            targets.append("📱 Target")
+            values.append(incoming)
+            colors.append('rgba(102, 126, 234, 0.4)')  # Blue for incoming
+    
+    # Outgoing calls: Target -> Contact
+    for contact in top_contacts:
+        outgoing = contact_index.count(contact, mask=outgoing_mask)
+        if outgoing > 0:
+            sources.append("📱 Target")
+            targets.append(contact)
+            values.append(outgoing)
+            colors.append('rgba(245, 87, 108, 0.4)')  # Red for outgoing
+    
+    # Create node labels and colors
+    all_nodes = ["📱 Target"] + top_contacts
+    node_colors = ['#667eea'] + ['#764ba2'] * len(top_contacts)
+    
+    # Map to indices
+    node_dict = {node: idx for idx, node in enumerate(all_nodes)}
+    source_indices = [node_dict[s] for s in sources]
+    target_indices = [node_dict[t] for t in targets]
+    
+    fig = go.Figure(data=[go.Sankey(
+        node=dict(
+            pad=15,
+            thickness=20,
+            line=dict(color="white", width=2),
+            label=all_nodes,
+            color=node_colors
+        ),
+        link=dict(
+            source=source_indices,
+            target=target_indices,
+            value=values,
+            color=colors
+        )
+    )])
+    
+    fig.update_layout(
+        title="Call Flow: Top 10 Contacts (Blue=Incoming, Red=Outgoing)",
+        font=dict(size=12, color='white'),
+        template="plotly_dark",
+        height=500
+    )
+    
+    return fig
+
+
+def build_contact_sunburst_figure(df):
+    """Sunburst of top call contacts by time period and frequency (None if empty)"""
+    dataset = get_dataset(df)
+    calls_df = dataset.view(dataset.mask('calls')).frame(['B_Party_Clean', 'Is_Night', 'Is_Day'])
+    
+    # Categorize by time period
+    calls_df = calls_df.assign(Time_Period=np.select(
+        [calls_df['Is_Night'] == 1, calls_df['Is_Day'] == 1],
+        ['Night', 'Day'],
+        default='Evening'
+    ))
+    
+    # Get top 15 contacts
+    top_contacts = calls_df['B_Party_Clean'].value_counts().head(15).index
+    sunburst_df = calls_df[calls_df['B_Party_Clean'].isin(top_contacts)]
+    
+    # Create sunburst data
+    sunburst_data = []
+    for period in ['Night', 'Day', 'Evening']:
+        period_df = sunburst_df[sunburst_df['Time_Period'] == period]
+        contact_counts = period_df['B_Party_Clean'].value_counts()
+        
+        for contact, count in contact_counts.items():
+            # Categorize by frequency
+            if count >= 20:
+                category = 'Very Frequent'
+            elif count >= 10:
+                category = 'Frequent'
+            elif count >= 5:
+                category = 'Moderate'
+            else:
+                category = 'Occasional'
+            
+            sunburst_data.append({
+                'Time_Period': period,
+                'Category': category,
+                'Contact': contact[:15],  # Truncate for display
+                'Count': count
+            })
+    
+    if not sunburst_data:
+        return None
+    
+    fig = px.sunburst(
+        pd.DataFrame(sunburst_data),
+        path=['Time_Period', 'Category', 'Contact'],
+        values='Count',
+        color='Count',
+        color_continuous_scale='Purples',
+        title="Contact Relationships by Time Period and Frequency"
+    )
+    
+    fig.update_layout(
+        template="plotly_dark",
+        height=600
+    )
+    return fig
 
 
 def render_dashboard(df, analyzer):
@@ -411,10 +530,11 @@ def render_dashboard(df, analyzer):
     col1, col2, col3, col4, col5 = st.columns(5)
     
     # Calculate call and SMS counts
-    incoming_calls = len(df[df['Call_Category'] == 'Incoming Call'])
-    outgoing_calls = len(df[df['Call_Category'] == 'Outgoing Call'])
-    sms_received = len(df[df['Call_Category'] == 'SMS Received'])
-    sms_sent = len(df[df['Call_Category'] == 'SMS Sent'])
+    dataset = get_dataset(df)
+    incoming_calls = int(np.count_nonzero(dataset.mask('calls') & dataset.mask('incoming')))
+    outgoing_calls = int(np.count_nonzero(dataset.mask('calls') & dataset.mask('outgoing')))
+    sms_received = int(np.count_nonzero(dataset.mask('sms') & dataset.mask('incoming')))
+    sms_sent = int(np.count_nonzero(dataset.mask('sms') & dataset.mask('outgoing')))
     total_calls = incoming_calls + outgoing_calls
     total_sms = sms_received + sms_sent
     
@@ -465,71 +585,7 @@ def render_dashboard(df, analyzer):
     st.caption("Visualize how communications flow between target and contacts")
     
     if total_calls > 0:
-        # Get top 10 contacts for cleaner visualization
-        calls_df = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call'])]
-        top_contacts = calls_df['B_Party_Clean'].value_counts().head(10).index.tolist()
-        
-        # Filter for top contacts
-        sankey_df = calls_df[calls_df['B_Party_Clean'].isin(top_contacts)]
-        
-        # Build Sankey data
-        sources = []
-        targets = []
-        values = []
-        colors = []
-        
-        # Incoming calls: Contact -> Target
-        for contact in top_contacts:
-            incoming = len(sankey_df[(sankey_df['B_Party_Clean'] == contact) & 
-                                    (sankey_df['Call_Category'] == 'Incoming Call')])
-            if incoming > 0:
-                sources.append(contact)
-                targets.append("📱 Target")
-                values.append(incoming)
-                colors.append('rgba(102, 126, 234, 0.4)')  # Blue for incoming
-        
-        # Outgoing calls: Target -> Contact
-        for contact in top_contacts:
-            outgoing = len(sankey_df[(sankey_df['B_Party_Clean'] == contact) & 
-                                     (sankey_df['Call_Category'] == 'Outgoing Call')])
-            if outgoing > 0:
-                sources.append("📱 Target")
-                targets.append(contact)
-                values.append(outgoing)
-                colors.append('rgba(245, 87, 108, 0.4)')  # Red for outgoing
-        
-        # Create node labels and colors
-        all_nodes = ["📱 Target"] + top_contacts
-        node_colors = ['#667eea'] + ['#764ba2'] * len(top_contacts)
-        
-        # Map to indices
-        node_dict = {node: idx for idx, node in enumerate(all_nodes)}
-        source_indices = [node_dict[s] for s in sources]
-        target_indices = [node_dict[t] for t in targets]
-        
-        fig = go.Figure(data=[go.Sankey(
-            node=dict(
-                pad=15,
-                thickness=20,
-                line=dict(color="white", width=2),
-                label=all_nodes,
-                color=node_colors
-            ),
-            link=dict(
-                source=source_indices,
-                target=target_indices,
-                value=values,
-                color=colors
-            )
-        )])
-        
-        fig.update_layout(
-            title="Call Flow: Top 10 Contacts (Blue=Incoming, Red=Outgoing)",
-            font=dict(size=12, color='white'),
-            template="plotly_dark",
-            height=500
-        )
-        
+        fig = cached_result(df, 'dashboard.call_flow', lambda: build_call_flow_figure(df, analyzer))
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("No call data available for flow visualization")
@@ -540,60 +596,8 @@ def render_dashboard(df, analyzer):
     st.caption("Hierarchical view of contacts by time period and frequency")
     
     if total_calls > 0:
-        calls_df = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call'])].copy()
-        
-        # Categorize by time period
-        calls_df['Time_Period'] = calls_df.apply(
-            lambda x: 'Night' if x['Is_Night'] == 1 
-            else 'Day' if x['Is_Day'] == 1 
-            else 'Evening', axis=1
-        )
-        
-        # Get top 15 contacts
-        top_contacts = calls_df['B_Party_Clean'].value_counts().head(15).index
-        sunburst_df = calls_df[calls_df['B_Party_Clean'].isin(top_contacts)]
-        
-        # Create sunburst data
-        sunburst_data = []
-        for period in ['Night', 'Day', 'Evening']:
-            period_df = sunburst_df[sunburst_df['Time_Period'] == period]
-            contact_counts = period_df['B_Party_Clean'].value_counts()
-            
-            for contact, count in contact_counts.items():
-                # Categorize by frequency
-                if count >= 20:
-                    category = 'Very Frequent'
-                elif count >= 10:
-                    category = 'Frequent'
-                elif count >= 5:
-                    category = 'Moderate'
-                else:
-                    category = 'Occasional'
-                
-                sunburst_data.append({
-                    'Time_Period': period,
-                    'Category': category,
-                    'Contact': contact[:15],  # Truncate for display
-                    'Count': count
-                })
-        
-        if sunburst_data:
-            sunburst_df_plot = pd.DataFrame(sunburst_data)
-            
-            fig = px.sunburst(
-                sunburst_df_plot,
-                path=['Time_Period', 'Category', 'Contact'],
-                values='Count',
-                color='Count',
-                color_continuous_scale='Purples',
-                title="Contact Relationships by Time Period and Frequency"
-            )
-            
-            fig.update_layout(
-                template="plotly_dark",
-                height=600
-            )
-            
+        fig = cached_result(df, 'dashboard.sunburst', lambda: build_contact_sunburst_figure(df))
+        if fig is not None:
             st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("No call data available for sunburst visualization")
@@ -703,7 +707,7 @@ def render_dashboard(df, analyzer):
     
     if total_calls > 0:
         # Filter only calls with duration
-        calls_df = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call'])].copy()
+        calls_df = dataset.view(dataset.mask('calls')).frame(['Call_Category', 'Dur(s)'])
         incoming_df = calls_df[calls_df['Call_Category'] == 'Incoming Call']
         outgoing_df = calls_df[calls_df['Call_Category'] == 'Outgoing Call']
         
@@ -739,9 +743,8 @@ def render_dashboard(df, analyzer):
             # Create duration bins
             duration_bins = [0, 30, 60, 120, 300, 600, float('inf')]
             duration_labels = ['0-30s', '30s-1m', '1-2m', '2-5m', '5-10m', '10m+']
-            calls_df['Duration_Bin'] = pd.cut(calls_df['Dur(s)'], bins=duration_bins, labels=duration_labels)
-            
-            duration_counts = calls_df['Duration_Bin'].value_counts().sort_index()
+            duration_counts = pd.cut(calls_df['Dur(s)'], bins=duration_bins,
+                                     labels=duration_labels).value_counts().sort_index()
             
             fig = go.Figure(data=[
                 go.Bar(
@@ -855,6 +858,50 @@ def render_dashboard(df, analyzer):
             st.info("No call data available")
 
 
+def build_calendar_heatmap_figure(df):
+    """Week x weekday activity heatmap (None if there is no dated activity)"""
+    # Get activity by date (derived columns stay local; the shared frame is not modified)
+    dates = df['DateTime']
+    calendar_data = df.groupby([
+        dates.dt.year.rename('Year'),
+        dates.dt.month.rename('Month'),
+        dates.dt.day.rename('Day')
+    ]).size().reset_index(name='Count')
+    calendar_data['Date'] = pd.to_datetime(calendar_data[['Year', 'Month', 'Day']])
+    calendar_data['Weekday'] = calendar_data['Date'].dt.dayofweek
+    calendar_data['Week'] = calendar_data['Date'].dt.isocalendar().week
+    
+    if len(calendar_data) == 0:
+        return None
+    
+    # Pivot for heatmap
+    pivot_data = calendar_data.pivot_table(
+        index='Weekday',
+        columns='Week',
+        values='Count',
+        fill_value=0
+    )
+    
+    weekday_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=pivot_data.values,
+        x=pivot_data.columns,
+        y=weekday_labels,
+        colorscale='Purples',
+        hovertemplate='Week: %{x}\u003cbr\u003eDay: %{y}\u003cbr\u003eActivity: %{z}\u003cextra\u003e\u003c/extra\u003e'
+    ))
+    
+    fig.update_layout(
+        title="Activity Heatmap by Week and Day",
+        xaxis_title="Week of Year",
+        yaxis_title="Day of Week",
+        template="plotly_dark",
+        height=400
+    )
+    return fig
+
+
 def render_temporal_analysis(df, analyzer):
     """Render STATE-OF-THE-ART temporal analysis"""
     st.markdown("## 🌙 Advanced Temporal Analysis")
@@ -977,48 +1024,10 @@ def render_temporal_analysis(df, analyzer):
         st.markdown("### 📅 Calendar Heatmap")
         st.caption("Activity intensity by day of month")
         
-        # Prepare calendar data
-        df['Date'] = df['DateTime'].dt.date
-        df['Day'] = df['DateTime'].dt.day
-        df['Month'] = df['DateTime'].dt.month
-        df['Year'] = df['DateTime'].dt.year
-        df['Weekday'] = df['DateTime'].dt.dayofweek
-        
-        # Get activity by date
-        calendar_data = df.groupby(['Year', 'Month', 'Day']).size().reset_index(name='Count')
-        calendar_data['Date'] = pd.to_datetime(calendar_data[['Year', 'Month', 'Day']])
-        calendar_data['Weekday'] = calendar_data['Date'].dt.dayofweek
-        calendar_data['Week'] = calendar_data['Date'].dt.isocalendar().week
-        
-        # Create heatmap
-        if len(calendar_data) > 0:
-            # Pivot for heatmap
-            pivot_data = calendar_data.pivot_table(
-                index='Weekday',
-                columns='Week',
-                values='Count',
-                fill_value=0
-            )
-            
-            weekday_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-            
-            fig = go.Figure(data=go.Heatmap(
-                z=pivot_data.values,
-                x=pivot_data.columns,
-                y=weekday_labels,
-                colorscale='Purples',
-                hovertemplate='Week: %{x}\u003cbr\u003eDay: %{y}\u003cbr\u003eActivity: %{z}\u003cextra\u003e\u003c/extra\u003e'
-            ))
-            
-            fig.update_layout(
-                title="Activity Heatmap by Week and Day",
-                xaxis_title="Week of Year",
-                yaxis_title="Day of Week",
-                template="plotly_dark",
-                height=400
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+        if st.toggle("Show calendar heatmap", key="show_calendar_heatmap"):
+            fig = cached_result(df, 'temporal.calendar', lambda: build_calendar_heatmap_figure(df))
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.markdown("### 🎯 24-Hour Activity Polar Chart")
@@ -1108,7 +1117,10 @@ def render_temporal_analysis(df, analyzer):
     st.caption("Understanding **who** is being called during different times is critical for investigations")
     
     # Filter for calls only
-    calls_df = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call'])].copy()
+    dataset = get_dataset(df)
+    calls_mask = dataset.mask('calls')
+    calls_df = dataset.view(calls_mask).frame()
+    contact_index = analyzer.contact_index
     
     if len(calls_df) > 0:
         # Separate by time period
@@ -1148,8 +1160,9 @@ def render_temporal_analysis(df, analyzer):
                 
                 # Create detailed table
                 night_contact_details = []
+                night_mask = calls_mask & (df['Is_Night'] == 1).to_numpy()
                 for contact in night_contacts.index[:10]:
-                    contact_calls = night_calls[night_calls['B_Party_Clean'] == contact]
+                    contact_calls = contact_index.frame(contact, mask=night_mask)
                     incoming = len(contact_calls[contact_calls['Call_Category'] == 'Incoming Call'])
                     outgoing = len(contact_calls[contact_calls['Call_Category'] == 'Outgoing Call'])
                     avg_duration = contact_calls['Dur(s)'].mean()
@@ -1195,8 +1208,9 @@ def render_temporal_analysis(df, analyzer):
                 
                 # Create detailed table
                 day_contact_details = []
+                day_mask = calls_mask & (df['Is_Day'] == 1).to_numpy()
                 for contact in day_contacts.index[:10]:
-                    contact_calls = day_calls[day_calls['B_Party_Clean'] == contact]
+                    contact_calls = contact_index.frame(contact, mask=day_mask)
                     incoming = len(contact_calls[contact_calls['Call_Category'] == 'Incoming Call'])
                     outgoing = len(contact_calls[contact_calls['Call_Category'] == 'Outgoing Call'])
                     avg_duration = contact_calls['Dur(s)'].mean()
@@ -1333,13 +1347,64 @@ def render_temporal_analysis(df, analyzer):
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("No significant burst activity detected")
+    
+    # Rolling-window bursts (sub-hour resolution, robust z-score)
+    st.markdown("#### ⏱️ Rolling-Window Bursts")
+    st.caption("Windows far above the typical active window (robust z-score on median/MAD)")
+    
+    window_choice = st.selectbox(
+        "Window size",
+        options=[5, 15, 60],
+        index=1,
+        format_func=lambda w: f"{w} minutes",
+        key="burst_window"
+    )
+    burst_analysis = analyzer.get_burst_analysis(windows=(window_choice,))
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Burst Intervals**")
+        if burst_analysis['intervals']:
+            interval_df = pd.DataFrame([
+                {
+                    'Start': b['start'],
+                    'End': b['end'],
+                    'Events': b['count'],
+                    'Peak': b['peak_count'],
+                    'Z-Score': round(b['z_score'], 1),
+                    'Top Contacts': ', '.join(f"{c} ({n})" for c, n in b['contacts'].items())
+                }
+                for b in burst_analysis['intervals']
+            ])
+            st.dataframe(interval_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No burst intervals at this window size")
+    
+    with col2:
+        st.markdown("**Contact Bursts** (vs. each contact's own baseline)")
+        if burst_analysis['contact_bursts']:
+            contact_burst_df = pd.DataFrame([
+                {
+                    'Contact': b['contact'],
+                    'Start': b['start'],
+                    'Events': b['count'],
+                    'Usual': b['baseline'],
+                    'Z-Score': round(b['z_score'], 1)
+                }
+                for b in burst_analysis['contact_bursts']
+            ])
+            st.dataframe(contact_burst_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No contact bursts at this window size")
 
 
 def render_contact_network(df, analyzer):
     """Render contact network analysis"""
     st.markdown("## 👥 Contact Network Analysis")
     
-    network_analyzer = NetworkAnalyzer(df)
+    network_analyzer = cached_result(df, 'network_analyzer',
+                                     lambda: NetworkAnalyzer(df, contact_index=analyzer.contact_index))
     contact_analysis = analyzer.get_contact_analysis()
     
     # Contact summary
@@ -1408,45 +1473,54 @@ def render_contact_network(df, analyzer):
     G = network_analyzer.build_network_graph(min_interactions=min_interactions)
     
     if G.number_of_nodes() > 1:
+        # Layouts are computed once per (dataset, min_interactions, dim) and reused across reruns
+        if 'layout_service' not in st.session_state:
+            st.session_state.layout_service = GraphLayoutService()
+        layout_service = st.session_state.layout_service
+        layout_key = (dataset_key(df), min_interactions)
+        
+        nodes = list(G.nodes())
+        is_target = np.array([G.nodes[node].get('node_type') == 'target' for node in nodes])
+        node_sizes = np.array([G.nodes[node].get('size', 10) for node in nodes], dtype=float)
+        degrees = [G.degree(node) for node in nodes]
+        node_labels = [node[:10] for node in nodes]
+        node_colors = np.where(is_target, '#ff4b4b', '#00f5ff')
+        
         # Show 2D version by default
         st.caption("📊 2D Network View (Click below to expand to 3D)")
         
         # Create 2D network visualization
-        pos = nx.spring_layout(G, k=0.5, iterations=50)
-        
-        edge_trace = []
-        for edge in G.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            edge_trace.append(
-                go.Scatter(x=[x0, x1, None], y=[y0, y1, None],
-                          mode='lines',
-                          line=dict(width=1, color='rgba(0, 245, 255, 0.3)'),
-                          hoverinfo='none',
-                          showlegend=False)
-            )
-        
-        node_colors = ['#ff4b4b' if G.nodes[node].get('node_type') == 'target' else '#00f5ff' 
-                      for node in G.nodes()]
+        layout_2d = layout_service.layout(G, layout_key, dim=2)
+        pos = layout_2d['positions']
+        edge_x, edge_y = GraphLayoutService.edge_coordinates(layout_2d)
+        
+        # All edges in one trace (None breaks the line between edges)
+        edge_trace = go.Scatter(
+            x=edge_x, y=edge_y,
+            mode='lines',
+            line=dict(width=1, color='rgba(0, 245, 255, 0.3)'),
+            hoverinfo='none',
+            showlegend=False
+        )
         
         node_trace = go.Scatter(
-            x=[pos[node][0] for node in G.nodes()],
-            y=[pos[node][1] for node in G.nodes()],
+            x=pos[:, 0],
+            y=pos[:, 1],
             mode='markers+text',
             hoverinfo='text',
             marker=dict(
-                size=[G.nodes[node].get('size', 10) for node in G.nodes()],
+                size=node_sizes,
                 color=node_colors,
                 line=dict(width=2, color='white')
             ),
-            text=[node[:10] for node in G.nodes()],
+            text=node_labels,
             textposition="top center",
             textfont=dict(color='white', size=8),
-            hovertext=[f"{node}\u003cbr\u003eConnections: {G.degree(node)}" for node in G.nodes()],
+            hovertext=[f"{node}\u003cbr\u003eConnections: {degree}" for node, degree in zip(nodes, degrees)],
             showlegend=False
         )
         
-        fig_2d = go.Figure(data=edge_trace + [node_trace])
+        fig_2d = go.Figure(data=[edge_trace, node_trace])
         fig_2d.update_layout(
             title=f"2D Network ({G.number_of_nodes()} nodes)",
             showlegend=False,
@@ -1460,29 +1534,14 @@ def render_contact_network(df, analyzer):
         
         st.plotly_chart(fig_2d, use_container_width=True)
         
-        # Expandable 3D version
-        with st.expander("🌐 **Expand to 3D Interactive View** (Rotate, Zoom, Explore)", expanded=False):
+        # 3D version, only laid out and drawn when asked for
+        if st.toggle("🌐 **3D Interactive View** (Rotate, Zoom, Explore)", key="show_network_3d"):
             st.caption("Fully interactive 3D network - drag to rotate, scroll to zoom")
             
-            # Create 3D network visualization
-            pos_3d = nx.spring_layout(G, dim=3, k=0.5, iterations=50)
-            
-            # Extract 3D coordinates
-            x_nodes = [pos_3d[node][0] for node in G.nodes()]
-            y_nodes = [pos_3d[node][1] for node in G.nodes()]
-            z_nodes = [pos_3d[node][2] for node in G.nodes()]
-            
-            # Create edges in 3D
-            edge_x = []
-            edge_y = []
-            edge_z = []
-            
-            for edge in G.edges():
-                x0, y0, z0 = pos_3d[edge[0]]
-                x1, y1, z1 = pos_3d[edge[1]]
-                edge_x.extend([x0, x1, None])
-                edge_y.extend([y0, y1, None])
-                edge_z.extend([z0, z1, None])
+            # Create 3D network visualization (cached like the 2D layout)
+            layout_3d = layout_service.layout(G, layout_key, dim=3)
+            pos_3d = layout_3d['positions']
+            edge_x, edge_y, edge_z = GraphLayoutService.edge_coordinates(layout_3d)
             
             # Create edge trace with neon glow
             edge_trace_3d = go.Scatter3d(
@@ -1493,31 +1552,21 @@ def render_contact_network(df, analyzer):
                 showlegend=False
             )
             
-            # Node colors and sizes
-            node_colors_3d = []
-            node_sizes_3d = []
-            node_text_3d = []
-            
-            for node in G.nodes():
-                if G.nodes[node].get('node_type') == 'target':
-                    node_colors_3d.append('#ff4b4b')  # Red for target
-                    node_sizes_3d.append(20)
-                else:
-                    node_colors_3d.append('#00f5ff')  # Cyan for contacts
-                    node_sizes_3d.append(G.nodes[node].get('size', 10))
-                node_text_3d.append(f"{node[:15]}\u003cbr\u003eConnections: {G.degree(node)}")
+            # Targets are drawn at a fixed size, contacts by interaction volume
+            node_sizes_3d = np.where(is_target, 20, node_sizes)
+            node_text_3d = [f"{node[:15]}\u003cbr\u003eConnections: {degree}" for node, degree in zip(nodes, degrees)]
             
             # Create node trace with glow effect
             node_trace_3d = go.Scatter3d(
-                x=x_nodes, y=y_nodes, z=z_nodes,
+                x=pos_3d[:, 0], y=pos_3d[:, 1], z=pos_3d[:, 2],
                 mode='markers+text',
                 marker=dict(
                     size=node_sizes_3d,
-                    color=node_colors_3d,
+                    color=node_colors,
                     line=dict(color='white', width=2),
                     opacity=0.9
                 ),
-                text=[node[:10] for node in G.nodes()],
+                text=node_labels,
                 textposition='top center',
                 textfont=dict(color='white', size=10),
                 hovertext=node_text_3d,
@@ -1556,7 +1605,10 @@ def render_contact_network(df, analyzer):
     st.caption("Identifying **who** is being called during different times helps reveal suspicious patterns")
     
     # Filter for calls only
-    calls_df = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call'])].copy()
+    dataset = get_dataset(df)
+    calls_mask = dataset.mask('calls')
+    calls_df = dataset.view(calls_mask).frame()
+    contact_index = network_analyzer.contact_index
     
     if len(calls_df) > 0:
         # Time-based contact clustering
@@ -1620,8 +1672,9 @@ def render_contact_network(df, analyzer):
             if len(night_only) > 0:
                 # Get details for night-only contacts
                 night_only_details = []
+                night_mask = calls_mask & (df['Is_Night'] == 1).to_numpy()
                 for contact in list(night_only)[:10]:
-                    contact_calls = night_calls[night_calls['B_Party_Clean'] == contact]
+                    contact_calls = contact_index.frame(contact, mask=night_mask)
                     incoming = len(contact_calls[contact_calls['Call_Category'] == 'Incoming Call'])
                     outgoing = len(contact_calls[contact_calls['Call_Category'] == 'Outgoing Call'])
                     avg_duration = contact_calls['Dur(s)'].mean()
@@ -1645,17 +1698,10 @@ def render_contact_network(df, analyzer):
         st.markdown("#### 📊 Contact Activity Heatmap")
         
         # Get top 15 call contacts
-        top_call_contacts = calls_df['B_Party_Clean'].value_counts().head(15).index
+        top_call_contacts = contact_index.top_contacts(15, mask=calls_mask)
         
-        # Create hourly activity matrix
-        heatmap_data = []
-        for contact in top_call_contacts:
-            contact_calls = calls_df[calls_df['B_Party_Clean'] == contact]
-            hourly_counts = contact_calls.groupby('Hour').size()
-            
-            # Fill in missing hours with 0
-            hour_data = [hourly_counts.get(h, 0) for h in range(24)]
-            heatmap_data.append(hour_data)
+        # Create hourly activity matrix (one 24-hour profile per contact)
+        heatmap_data = contact_index.hourly_matrix(top_call_contacts, mask=calls_mask).tolist()
         
         if heatmap_data:
             fig = go.Figure(data=go.Heatmap(
@@ -1684,6 +1730,205 @@ def render_contact_network(df, analyzer):
         st.info("No call data available for contact network analysis")
     
     # ===== END CALL-FOCUSED CONTACT NETWORK =====
+    
+    render_multi_cdr_correlation(df)
+    render_ipdr_correlation(df, analyzer)
+
+
+def render_multi_cdr_correlation(df):
+    """Correlate the loaded CDR with additional target CDRs"""
+    st.markdown("---")
+    st.markdown("### 🕸️ Multi-CDR Correlation")
+    st.caption("Upload CDRs of other targets to find shared contacts and co-locations (same CGI, close in time)")
+    
+    extra_files = st.file_uploader(
+        "Upload additional target CDRs",
+        type=['csv'],
+        accept_multiple_files=True,
+        key="correlation_files"
+    )
+    
+    if not extra_files:
+        st.info("Upload one or more CDRs to correlate with the current target")
+        return
+    
+    window_minutes = st.slider("Co-location window (minutes)", 1, 120, 15, key="colocation_window")
+    
+    # Parse each uploaded CDR once per session (keyed on name and size, so a changed re-upload is re-parsed)
+    if 'correlation_cdrs' not in st.session_state:
+        st.session_state.correlation_cdrs = {}
+    parsed = st.session_state.correlation_cdrs
+    
+    for uploaded in extra_files:
+        file_key = (uploaded.name, uploaded.size)
+        if file_key in parsed:
+            continue
+        try:
+            # Private temp directory per upload; the parser needs a path with the original name
+            with tempfile.TemporaryDirectory() as temp_dir:
+                temp_path = os.path.join(temp_dir, os.path.basename(uploaded.name))
+                with open(temp_path, 'wb') as f:
+                    f.write(uploaded.getbuffer())
+                parser = CDRParser(temp_path)
+                other_df = parser.parse()
+            target = parser.metadata.get('target_number') or uploaded.name
+            parsed[file_key] = (str(target), other_df)
+        except Exception as e:
+            st.error(f"❌ Error parsing {uploaded.name}: {str(e)}")
+    
+    file_keys = tuple(sorted((f.name, f.size) for f in extra_files if (f.name, f.size) in parsed))
+    if not file_keys:
+        return
+    primary = st.session_state.cdr_data.metadata.get('target_number') if st.session_state.get('cdr_data') else None
+    
+    # Engine and results are cached per (primary dataset, uploaded files, window)
+    def build_engine():
+        engine = CorrelationEngine()
+        engine.add_cdr(primary or "Current CDR", df)
+        for key in file_keys:
+            target, other_df = parsed[key]
+            engine.add_cdr(target, other_df)
+        return engine
+    
+    engine = cached_result(df, 'correlation.engine', build_engine, file_keys, primary)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### 👥 Shared Contacts (all pairs)")
+        common = cached_result(df, 'correlation.common', engine.common_contacts, file_keys, primary)
+        if not common.empty:
+            st.dataframe(common, use_container_width=True, hide_index=True)
+        else:
+            st.info("No shared contacts between targets")
+        
+        st.markdown("#### 🎯 Contacts Reached by Several Targets")
+        hubs = cached_result(df, 'correlation.hubs', engine.contacts_across_targets, file_keys, primary)
+        if not hubs.empty:
+            st.dataframe(hubs.head(50), use_container_width=True, hide_index=True)
+        else:
+            st.info("No contact is shared by two or more targets")
+    
+    with col2:
+        st.markdown("#### 📍 Co-location Summary")
+        events = cached_result(df, 'correlation.events', lambda: engine.find_colocations(window_minutes),
+                               file_keys, primary, window_minutes)
+        colocations = cached_result(df, 'correlation.summary',
+                                    lambda: engine.colocation_summary(window_minutes, pairs=events),
+                                    file_keys, primary, window_minutes)
+        if not colocations.empty:
+            st.dataframe(colocations, use_container_width=True, hide_index=True)
+            
+            with st.expander("Show individual co-location events"):
+                st.dataframe(events.head(1000), use_container_width=True, hide_index=True)
+        else:
+            st.info("No co-location events found (requires 'First CGI' in both CDRs)")
+    
+    # Multi-target graph metrics (rebuilt only when the primary CDR or the set of uploads changes)
+    st.markdown("#### 🧠 Multi-Target Network Metrics")
+    
+    def build_graph():
+        others = {target: other_df for target, other_df in (parsed[key] for key in file_keys)}
+        return NetworkAnalyzer(df).build_contact_graph(others)
+    
+    graph = cached_result(df, 'correlation.graph', build_graph, file_keys)
+    
+    metrics = graph.get_metrics()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Nodes", f"{metrics['total_nodes']:,}")
+    col2.metric("Edges", f"{metrics['total_edges']:,}")
+    col3.metric("Targets", metrics['total_targets'])
+    col4.metric("Communities", metrics['communities']['count'])
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown("**Top PageRank Contacts**")
+        st.dataframe(pd.DataFrame(list(metrics['top_pagerank'].items()), columns=['Contact', 'PageRank']),
+                     use_container_width=True, hide_index=True)
+    with col2:
+        st.markdown("**Top Betweenness Contacts**")
+        st.dataframe(pd.DataFrame(list(metrics['top_betweenness'].items()), columns=['Contact', 'Betweenness']),
+                     use_container_width=True, hide_index=True)
+    with col3:
+        st.markdown("**Bridges Between Targets**")
+        if metrics['bridges']:
+            st.dataframe(pd.DataFrame(metrics['bridges']), use_container_width=True, hide_index=True)
+        else:
+            st.info("No contact links two targets")
+
+
+def render_ipdr_correlation(df, analyzer):
+    """Link IPDR sessions from ISP replies to the loaded CDR"""
+    st.markdown("---")
+    st.markdown("### 🌐 IPDR Reply Correlation")
+    st.caption("Upload reply hits exported from the Reply Analyzer to find data sessions "
+               "on the same MSISDN / IMEI / cell as the calls in this CDR")
+    
+    reply_files = st.file_uploader(
+        "Upload IPDR reply hits (CSV / Excel)",
+        type=['csv', 'xlsx'],
+        accept_multiple_files=True,
+        key="ipdr_reply_files"
+    )
+    
+    if not reply_files:
+        st.info("Upload one or more reply exports (e.g. Airtel_Hits_Combined.xlsx)")
+        return
+    
+    window_minutes = st.slider("Match window (minutes)", 0, 120, 5, key="ipdr_window")
+    
+    # Read each uploaded reply once per session
+    if 'ipdr_replies' not in st.session_state:
+        st.session_state.ipdr_replies = {}
+    replies = st.session_state.ipdr_replies
+    for uploaded in reply_files:
+        file_key = (uploaded.name, uploaded.size)
+        if file_key in replies:
+            continue
+        try:
+            if uploaded.name.lower().endswith('.xlsx'):
+                reply_df = pd.read_excel(uploaded, dtype=str)
+            else:
+                reply_df = pd.read_csv(uploaded, dtype=str, on_bad_lines='skip', encoding='latin1')
+            if 'Source_File' not in reply_df.columns:
+                reply_df['Source_File'] = uploaded.name
+            replies[file_key] = reply_df
+        except Exception as e:
+            st.error(f"❌ Error reading {uploaded.name}: {str(e)}")
+    
+    file_keys = tuple(sorted((f.name, f.size) for f in reply_files if (f.name, f.size) in replies))
+    if not file_keys:
+        return
+    
+    target = st.session_state.cdr_data.metadata.get('target_number') if st.session_state.get('cdr_data') else None
+    
+    def build():
+        hits_df = pd.concat([replies[k] for k in file_keys], ignore_index=True)
+        correlator = ReplyCorrelator(window_minutes=window_minutes, sql_backend=analyzer.sql_backend)
+        return correlator.correlate(df, hits_df, target_number=target), dict(correlator.timings), len(hits_df)
+    
+    matches, timings, sessions = cached_result(df, 'ipdr_correlation', build, file_keys, window_minutes, target)
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("IPDR Sessions", f"{sessions:,}")
+    col2.metric("Matched Pairs", f"{len(matches):,}")
+    col3.metric("CDR Events Matched", f"{matches['cdr_row'].nunique():,}" if len(matches) else "0")
+    st.caption("⏱️ " + " · ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items()))
+    
+    if matches.empty:
+        st.info("No IPDR session falls within the window of a CDR event on a shared MSISDN, IMEI or cell")
+        return
+    
+    st.markdown("#### 🏅 Ranked Matches")
+    st.dataframe(matches.head(1000), use_container_width=True, hide_index=True)
+    st.download_button(
+        "📥 Download matches (CSV)",
+        data=cached_result(df, 'ipdr_correlation_csv', lambda: matches.to_csv(index=False),
+                           file_keys, window_minutes, target),
+        file_name="ipdr_cdr_matches.csv",
+        mime="text/csv",
+        key="ipdr_matches_csv"
+    )
 
 
 
@@ -1691,7 +1936,8 @@ def render_location_intelligence(df, analyzer):
     """Render location intelligence"""
     st.markdown("## 🗺️ Location Intelligence")
     
-    location_analyzer = LocationAnalyzer(df)
+    # Reused across reruns so its memoized clusters, places and timeline survive
+    location_analyzer = cached_result(df, 'location_analyzer', lambda: LocationAnalyzer(df))
     location_analysis = analyzer.get_location_analysis()
     
     if 'error' in location_analysis:
@@ -1747,7 +1993,8 @@ def render_location_intelligence(df, analyzer):
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        st.info("💡 **Tip**: Cell tower lookup uses free Mozilla Location Service API (no API key required)")
+        st.info("💡 **Tip**: Cell tower lookup uses the offline index first, then OpenCelliD / Unwired Labs "
+                "when their API keys are set (Mozilla Location Service has shut down)")
     
     with col2:
         if st.button("🔍 Lookup Cell Towers", type="primary"):
@@ -1757,12 +2004,16 @@ def render_location_intelligence(df, analyzer):
                     enriched_df = cell_db.enrich_cdr_with_cell_towers(df)
                     
                     # Count successful lookups
+                    summary = cell_db.last_enrichment_summary
                     successful = enriched_df['Cell_Tower_Lat'].notna().sum()
-                    total = len(enriched_df['First CGI'].dropna().unique())
                     
                     if successful > 0:
                         st.session_state.enriched_df = enriched_df
-                        st.success(f"✅ Found {successful}/{total} cell tower locations!")
+                        cache_stats = summary['cache']
+                        st.success(f"✅ Found {summary['resolved']}/{summary['unique_cells']} cell tower locations "
+                                   f"in {summary['elapsed_seconds']:.1f}s!")
+                        st.caption(f"Cache: {cache_stats['hits']} hits, {cache_stats['negative_hits']} known not-found · "
+                                   f"{summary['network_cells']} cells looked up online")
                         
                         # Show comparison
                         col_a, col_b = st.columns(2)
@@ -1792,14 +2043,9 @@ def render_location_intelligence(df, analyzer):
         ]].copy()
         
         # Calculate distance between GPS and Cell Tower
-        loc_analyzer = LocationAnalyzer(df)
-        
-        comparison_df['Distance_km'] = comparison_df.apply(
-            lambda row: loc_analyzer.calculate_distance(
-                row['First_Lat'], row['First_Long'],
-                row['Cell_Tower_Lat'], row['Cell_Tower_Long']
-            ) if pd.notna(row['Cell_Tower_Lat']) else None,
-            axis=1
+        comparison_df['Distance_km'] = LocationAnalyzer.haversine(
+            comparison_df['First_Lat'], comparison_df['First_Long'],
+            comparison_df['Cell_Tower_Lat'], comparison_df['Cell_Tower_Long']
         )
         
         st.dataframe(comparison_df, use_container_width=True)
@@ -1846,16 +2092,19 @@ def render_location_intelligence(df, analyzer):
         
         m = folium.Map(location=[center_lat, center_lon], zoom_start=10)
         
-        # Add markers for top locations
-        location_counts = map_df.groupby(['First_Lat', 'First_Long']).size().reset_index()
-        location_counts.columns = ['lat', 'lon', 'count']
-        location_counts = location_counts.nlargest(50, 'count')
+        # Add markers for the top places (towers within 500m merged into one cluster)
+        location_clusters = cached_result(
+            df, 'location.tower_clusters',
+            lambda: LocationAnalyzer(map_df).get_location_clusters(radius_km=0.5)[:50],
+            comm_filter, time_filter
+        )
         
-        for _, row in location_counts.iterrows():
+        for cluster in location_clusters:
             folium.CircleMarker(
-                location=[row['lat'], row['lon']],
-                radius=min(row['count'] / 2, 20),
-                popup=f"Count: {row['count']}",
+                location=[cluster['lat'], cluster['lon']],
+                radius=min(cluster['count'] / 2, 20),
+                popup=(f"Count: {cluster['count']}<br>Towers: {cluster['towers']}<br>"
+                       f"Visits: {cluster['visits']}<br>Dwell: {cluster['dwell_minutes'] / 60:.1f} h"),
                 color='red' if time_filter == 'Night' else 'blue',
                 fill=True,
                 fillOpacity=0.6
@@ -1865,11 +2114,57 @@ def render_location_intelligence(df, analyzer):
     else:
         st.info("No location data available for selected filter")
     
+    # ===== SIGNIFICANT PLACES (HOME / WORK) =====
+    st.markdown("---")
+    st.markdown("### 🏠 Significant Places")
+    st.caption("Stays are built from consecutive fixes at the same place; night dwell marks home, weekday 09-18 dwell marks work")
+    
+    places = location_analyzer.get_significant_places()
+    if len(places) > 0:
+        labelled = places[places['label'] != 'other']
+        col1, col2, col3 = st.columns(3)
+        for col, label, icon in [(col1, 'home', '🏠 Likely Home'), (col2, 'work', '🏢 Likely Work')]:
+            match = labelled[labelled['label'] == label]
+            with col:
+                if len(match) > 0:
+                    place = match.iloc[0]
+                    st.metric(icon, f"{place['lat']:.4f}, {place['lon']:.4f}",
+                              f"{place['confidence'] * 100:.0f}% confidence", delta_color="off")
+                else:
+                    st.metric(icon, "N/A")
+        with col3:
+            st.metric("🚏 Transit Points", f"{int((labelled['label'] == 'transit').sum())}")
+        
+        st.dataframe(
+            labelled.round({'lat': 5, 'lon': 5, 'confidence': 2, 'dwell_hours': 1, 'night_hours': 1, 'workday_hours': 1}),
+            use_container_width=True
+        )
+    else:
+        st.info("Not enough location data to infer significant places")
+    
     # ===== ANIMATED MOVEMENT TIMELINE WITH REVERSE GEOCODING =====
     st.markdown("---")
+    render_movement_timeline(location_analyzer)
+    
+    # Top locations table
+    st.markdown("---")
+    st.markdown("### 📍 Top 10 Locations")
+    
+    if location_analysis['top_locations']:
+        top_locs_df = pd.DataFrame(location_analysis['top_locations'][:10])
+        top_locs_df.index = range(1, len(top_locs_df) + 1)
+        st.dataframe(top_locs_df, use_container_width=True)
+
+
+@panel_fragment
+def render_movement_timeline(location_analyzer):
+    """Animated movement map with its filters, built only when switched on"""
     st.markdown("### 🎬 Movement Timeline (Animated)")
     st.caption("Watch the suspect's movement over time - each frame shows chronological location with address")
     
+    if not st.toggle("▶️ Build animated movement map", key="show_movement_timeline"):
+        return
+    
     # Filter by call type
     st.markdown("#### 📞 Filter by Communication Type")
     col1, col2, col3, col4 = st.columns(4)
@@ -1883,8 +2178,8 @@ def render_location_intelligence(df, analyzer):
     with col4:
         show_outgoing = st.checkbox("📤 Outgoing", value=True, key="timeline_out")
     
-    # Get data with valid coordinates sorted by time
-    movement_df = df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime').copy()
+    # Columnar movement history, sorted once; filters are code masks
+    timeline = location_analyzer.get_timeline()
     
     # Apply call type filters
     call_type_filter = []
@@ -1893,42 +2188,16 @@ def render_location_intelligence(df, analyzer):
     if show_sms:
         call_type_filter.extend(['SMS Received', 'SMS Sent'])
     
-    if call_type_filter:
-        movement_df = movement_df[movement_df['Call_Category'].isin(call_type_filter)]
+    keep = timeline.category_mask(call_type_filter) if call_type_filter else np.ones(len(timeline), dtype=bool)
     
     # Apply direction filters
     if not show_incoming:
-        movement_df = movement_df[~movement_df['Call_Category'].isin(['Incoming Call', 'SMS Received'])]
+        keep &= ~timeline.category_mask(['Incoming Call', 'SMS Received'])
     if not show_outgoing:
-        movement_df = movement_df[~movement_df['Call_Category'].isin(['Outgoing Call', 'SMS Sent'])]
-    
-    if len(movement_df) > 0:
-        # Prepare data for animation
-        movement_df['DateTimeStr'] = movement_df['DateTime'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        movement_df['Date'] = movement_df['DateTime'].dt.strftime('%Y-%m-%d')
-        movement_df['Time'] = movement_df['DateTime'].dt.strftime('%H:%M:%S')
-        movement_df['Sequence'] = range(1, len(movement_df) + 1)
-        
-        # Add time period color
-        def get_time_color(hour):
-            if 0 <= hour < 6:
-                return 'Late Night'
-            elif 6 <= hour < 12:
-                return 'Morning'
-            elif 12 <= hour < 18:
-                return 'Afternoon'
-            elif 18 <= hour < 22:
-                return 'Evening'
-            else:
-                return 'Night'
-        
-        movement_df['TimePeriodColor'] = movement_df['Hour'].apply(get_time_color)
-        
-        # Add sequence number for animation
-        movement_df = movement_df.sort_values('DateTime').reset_index(drop=True)
-        movement_df['Sequence'] = range(len(movement_df))
-        movement_df['DateTimeStr'] = movement_df['DateTime'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        
+        keep &= ~timeline.category_mask(['Outgoing Call', 'SMS Sent'])
+    timeline = timeline.take(keep)
+    
+    if len(timeline) > 0:
         # Option to show only major movements (city-to-city)
         show_major_only = st.checkbox(
             "🏙️ Show Major Movements Only (City-to-City)",
@@ -1937,35 +2206,27 @@ def render_location_intelligence(df, analyzer):
         )
         
         # Store original count before filtering
-        original_count = len(movement_df)
+        original_count = len(timeline)
         
         if show_major_only:
-            # Filter to show only major movements (use LocationAnalyzer from top import)
-            loc_analyzer = LocationAnalyzer(movement_df)
-            
-            major_movements = [movement_df.iloc[0]]  # Always include first location
-            
-            for i in range(1, len(movement_df)):
-                prev_lat = major_movements[-1]['First_Lat']
-                prev_lon = major_movements[-1]['First_Long']
-                curr_lat = movement_df.iloc[i]['First_Lat']
-                curr_lon = movement_df.iloc[i]['First_Long']
-                
-                # Calculate distance from last major movement
-                distance = loc_analyzer.calculate_distance(prev_lat, prev_lon, curr_lat, curr_lon)
-                
-                # Only include if moved more than 5km
-                if distance > 5:
-                    major_movements.append(movement_df.iloc[i])
-            
-            movement_df = pd.DataFrame(major_movements).reset_index(drop=True)
-            movement_df['Sequence'] = range(len(movement_df))
-            st.success(f"🏙️ Showing {len(movement_df)} major movements (filtered from {original_count} total events)")
+            # Keep only fixes more than 5km from the previously kept one
+            timeline = timeline.take(LocationAnalyzer.major_movement_indices(timeline.lat, timeline.lon, min_distance_km=5))
+            st.success(f"🏙️ Showing {len(timeline)} major movements (filtered from {original_count} total events)")
+        
+        # Long histories are path-simplified so the animation stays responsive
+        max_frames = st.slider(
+            "Maximum animation frames", 100, 2000, 500, step=100,
+            help="Longer histories are simplified (Douglas-Peucker) to this many key points, keeping the main turns of the path."
+        )
+        animated = timeline.simplify(max_frames) if len(timeline) > max_frames else timeline
         
-        # Use ALL events or filtered major movements
-        sample_df = movement_df.copy()
+        # Display strings are built only for the animated rows
+        sample_df = animated.to_frame()
         
-        st.info(f"📍 Showing all {len(sample_df)} movement events")
+        if len(animated) < len(timeline):
+            st.info(f"📍 Animating {len(animated)} key points (simplified from {len(timeline)} movement events)")
+        else:
+            st.info(f"📍 Showing all {len(sample_df)} movement events")
         
         # Option to enable reverse geocoding
         enable_geocoding = st.checkbox(
@@ -2033,16 +2294,11 @@ def render_location_intelligence(df, analyzer):
             progress_bar.empty()
             
             # Apply location names to dataframe
-            sample_df['Location'] = sample_df.apply(
-                lambda row: location_cache.get(f"{row['First_Lat']:.5f},{row['First_Long']:.5f}", "Unknown"),
-                axis=1
-            )
+            location_keys = sample_df['First_Lat'].map('{:.5f}'.format) + ',' + sample_df['First_Long'].map('{:.5f}'.format)
+            sample_df['Location'] = location_keys.map(location_cache).fillna("Unknown")
         else:
             # Use coordinates as location (fast)
-            sample_df['Location'] = sample_df.apply(
-                lambda row: f"{row['First_Lat']:.4f}, {row['First_Long']:.4f}",
-                axis=1
-            )
+            sample_df['Location'] = sample_df['First_Lat'].map('{:.4f}'.format) + ', ' + sample_df['First_Long'].map('{:.4f}'.format)
         
         # Animation speed control
         st.markdown("#### ⚡ Animation Speed")
@@ -2143,11 +2399,11 @@ def render_location_intelligence(df, analyzer):
         
         # Update slider to show date/time instead of sequence number
         if hasattr(fig.layout, 'sliders') and len(fig.layout.sliders) > 0:
+            frame_labels = sample_df['DateTimeStr'].to_numpy()
             for i, frame in enumerate(fig.frames):
-                if i < len(sample_df):
+                if i < len(frame_labels):
                     # Get the actual date/time for this frame
-                    datetime_str = sample_df.iloc[i]['DateTimeStr']
-                    fig.layout.sliders[0].steps[i]['label'] = datetime_str
+                    fig.layout.sliders[0].steps[i]['label'] = frame_labels[i]
         
         # Display with full interactivity enabled
         st.plotly_chart(fig, use_container_width=True, config={
@@ -2161,30 +2417,29 @@ def render_location_intelligence(df, analyzer):
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Total Movements Tracked", f"{len(movement_df):,}")
+            st.metric("Total Movements Tracked", f"{len(timeline):,}")
         
         with col2:
-            time_span = (movement_df['DateTime'].max() - movement_df['DateTime'].min()).days
+            time_span = int((timeline.seconds.max() - timeline.seconds.min()) // 86400)
             st.metric("Time Span", f"{time_span} days")
         
         with col3:
             # Calculate approximate distance traveled
-            if len(movement_df) > 1:
-                loc_analyzer = LocationAnalyzer(df)
-                total_dist = 0
-                for i in range(len(movement_df) - 1):
-                    lat1 = movement_df.iloc[i]['First_Lat']
-                    lon1 = movement_df.iloc[i]['First_Long']
-                    lat2 = movement_df.iloc[i+1]['First_Lat']
-                    lon2 = movement_df.iloc[i+1]['First_Long']
-                    total_dist += loc_analyzer.calculate_distance(lat1, lon1, lat2, lon2)
+            if len(timeline) > 1:
+                total_dist = LocationAnalyzer.path_length(timeline.lat, timeline.lon)
                 st.metric("Approx. Distance", f"{total_dist:.1f} km")
             else:
                 st.metric("Approx. Distance", "N/A")
-        
+
+        # Hops no ground travel could explain (cloned SIM / shared handset / bad tower data)
+        impossible_hops = location_analyzer.get_impossible_travel()
+        if len(impossible_hops) > 0:
+            with st.expander(f"🚨 {len(impossible_hops)} impossible-travel hops (> {LocationAnalyzer.MAX_PLAUSIBLE_SPEED_KMH} km/h)"):
+                st.dataframe(impossible_hops.round({'distance_km': 1, 'speed_kmh': 0}), use_container_width=True)
+
         # Timeline breakdown by time period
         st.markdown("#### 📊 Movement by Time Period")
-        period_counts = movement_df['TimePeriodColor'].value_counts()
+        period_counts = pd.Series(timeline.time_periods()).value_counts()
         
         fig_period = go.Figure(data=[
             go.Bar(
@@ -2212,42 +2467,45 @@ def render_location_intelligence(df, analyzer):
         
         # Most visited locations with names
         st.markdown("#### 📍 Most Visited Locations")
-        if 'Location' in sample_df.columns:
-            location_visits = sample_df['Location'].value_counts().head(10)
-            
-            fig_visits = go.Figure(data=[
-                go.Bar(
-                    y=location_visits.index,
-                    x=location_visits.values,
-                    orientation='h',
-                    marker_color='#667eea',
-                    text=location_visits.values,
-                    textposition='outside'
-                )
-            ])
-            
-            fig_visits.update_layout(
-                title="Top 10 Most Visited Locations",
-                xaxis_title="Number of Visits",
-                yaxis_title="Location",
-                template="plotly_dark",
-                height=400
+        # Counted over the full filtered timeline; simplification only applies to the animation
+        fixes = np.stack([np.round(timeline.lat * 1e4), np.round(timeline.lon * 1e4)], axis=1).astype(np.int64)
+        places, visits = np.unique(fixes, axis=0, return_counts=True)
+        top = np.argsort(-visits, kind='stable')[:10]
+        labels = []
+        for lat, lon in places[top] / 1e4:
+            label = f"{lat:.4f}, {lon:.4f}"
+            if enable_geocoding:
+                key = f"{lat:.5f},{lon:.5f}"
+                if key not in location_cache:
+                    location_cache[key] = get_location_name(lat, lon)
+                    time.sleep(0.5)  # Rate limiting
+                label = location_cache[key]
+            labels.append(label)
+        location_visits = pd.Series(visits[top], index=labels).groupby(level=0, sort=False).sum()
+        
+        fig_visits = go.Figure(data=[
+            go.Bar(
+                y=location_visits.index,
+                x=location_visits.values,
+                orientation='h',
+                marker_color='#667eea',
+                text=location_visits.values,
+                textposition='outside'
             )
-            
-            st.plotly_chart(fig_visits, use_container_width=True)
+        ])
+        
+        fig_visits.update_layout(
+            title="Top 10 Most Visited Locations",
+            xaxis_title="Number of Visits",
+            yaxis_title="Location",
+            template="plotly_dark",
+            height=400
+        )
+        
+        st.plotly_chart(fig_visits, use_container_width=True)
         
     else:
         st.info("No location data available for movement timeline")
-    # ===== END OF ANIMATED TIMELINE =====
-    
-    # Top locations table
-    st.markdown("---")
-    st.markdown("### 📍 Top 10 Locations")
-    
-    if location_analysis['top_locations']:
-        top_locs_df = pd.DataFrame(location_analysis['top_locations'][:10])
-        top_locs_df.index = range(1, len(top_locs_df) + 1)
-        st.dataframe(top_locs_df, use_container_width=True)
 
 
 def render_communication_patterns(df, analyzer):
@@ -2278,7 +2536,8 @@ def render_communication_patterns(df, analyzer):
         st.markdown("### 🎻 Call Duration Distribution")
         st.caption("Beautiful visualization of duration patterns")
         
-        calls_df = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call'])].copy()
+        dataset = get_dataset(df)
+        calls_df = dataset.view(dataset.mask('calls')).frame(['Call_Category', 'Dur(s)', 'B_Party_Clean'])
         
         if len(calls_df) > 0:
             col1, col2 = st.columns(2)
@@ -2425,39 +2684,27 @@ def render_search_filter(df):
     with col2:
         end_date = st.date_input("End Date", df['DateTime'].max())
     
-    # Apply filters
-    filtered_df = df.copy()
-    
-    if search_number:
-        filtered_df = filtered_df[filtered_df['B_Party_Clean'].str.contains(search_number, na=False)]
-    
-    if call_type_filter:
-        filtered_df = filtered_df[filtered_df['Call_Category'].isin(call_type_filter)]
-    
-    if time_period_filter:
-        filtered_df = filtered_df[filtered_df['TimePeriod'].isin(time_period_filter)]
-    
-    filtered_df = filtered_df[
-        (filtered_df['DateTime'].dt.date >= start_date) &
-        (filtered_df['DateTime'].dt.date <= end_date)
-    ]
+    # Filters run against indexes built once per dataset; rows are only copied for display / export
+    engine = cached_result(df, 'query_engine', lambda: CDRQueryEngine(get_dataset(df)))
+    query = (search_number, tuple(call_type_filter), tuple(time_period_filter), start_date, end_date)
+    results = engine.query(search_number, call_type_filter, time_period_filter, start_date, end_date)
     
-    st.markdown(f"### 📊 Results: {len(filtered_df)} records")
+    st.markdown(f"### 📊 Results: {len(results)} records")
     
-    if len(filtered_df) > 0:
+    if len(results) > 0:
         # Define display columns - only include those that exist
         all_display_cols = [
             'DateTime', 'Call Type', 'B_Party_Clean', 'Dur(s)', 
             'First CGI', 'First CGI Lat/Long', 'IMEI', 'IMSI'
         ]
         # Filter to only existing columns
-        display_cols = [col for col in all_display_cols if col in filtered_df.columns]
+        display_cols = [col for col in all_display_cols if col in df.columns]
         
-        st.dataframe(filtered_df[display_cols], use_container_width=True, height=500)
+        st.dataframe(results.frame(display_cols), use_container_width=True, height=500)
     
     # Export button
     if st.button("📥 Export Filtered Results to CSV"):
-        csv = filtered_df.to_csv(index=False)
+        csv = cached_result(df, 'filtered_csv', lambda: results.frame().to_csv(index=False), *query)
         st.download_button(
             label="Download CSV",
             data=csv,
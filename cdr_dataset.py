@@ -0,0 +1,137 @@
+"""
+CDR Dataset Module
+Shared, read-only CDR frame with derived columns attached once and lazy row views
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Callable, Dict, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Call_Category values behind the named masks
+CATEGORY_GROUPS = {
+    'calls': ('Incoming Call', 'Outgoing Call'),
+    'sms': ('SMS Received', 'SMS Sent'),
+    'incoming': ('Incoming Call', 'SMS Received'),
+    'outgoing': ('Outgoing Call', 'SMS Sent'),
+}
+
+
+# pandas 3 always copies on write; earlier versions let .loc / .iloc writes reach shared buffers
+COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+
+def _read_only_column(column: pd.Series):
+    """The column's buffer behind a read-only view, or a private copy for extension dtypes"""
+    if isinstance(column.dtype, np.dtype):
+        values = column.to_numpy(copy=False).view()
+        values.flags.writeable = False
+        return values
+    return column.array.copy()
+
+
+def shared_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Zero-copy handle on `df` for an analyzer
+
+    The handle shares every column buffer with the caller. Adding or
+    replacing whole columns only changes the handle. Under copy-on-write
+    (pandas >= 3) an in-place .loc / .iloc write copies the touched column
+    first; on older pandas the shared columns are read-only views instead,
+    so such a write raises ValueError rather than editing the caller's
+    frame. The caller's own frame stays writable either way.
+    """
+    if COPY_ON_WRITE:
+        return df.copy(deep=False)
+    handle = pd.DataFrame({position: _read_only_column(df.iloc[:, position]) for position in range(df.shape[1])},
+                          index=df.index, copy=False)
+    handle.columns = df.columns
+    return handle
+
+
+class CDRDataset:
+    """
+    One parsed CDR shared by every analyzer and view in a session
+
+    The frame is held without copying. Derived columns (calendar date,
+    date ordinals, ...) are computed on first use and kept beside the frame
+    rather than written into it; masks for the common slices (calls, SMS,
+    night, ...) are memoized boolean arrays. Filters are combined as masks
+    and only the rows / columns actually shown are materialised (DatasetView).
+    """
+
+    # Derived columns: name -> builder over the frame
+    DERIVED: Dict[str, Callable[[pd.DataFrame], np.ndarray]] = {
+        'date': lambda df: df['DateTime'].dt.date.to_numpy(),
+        'day_number': lambda df: df['DateTime'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64),
+    }
+
+    def __init__(self, df: pd.DataFrame):
+        self.frame = shared_frame(df)
+        self._derived: Dict[str, np.ndarray] = {}
+        self._masks: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def derived(self, name: str) -> np.ndarray:
+        """Derived column by name (see DERIVED), computed once"""
+        if name not in self._derived:
+            self._derived[name] = self.DERIVED[name](self.frame)
+        return self._derived[name]
+
+    def mask(self, name: str) -> np.ndarray:
+        """
+        Memoized boolean mask: a CATEGORY_GROUPS name, or 'night' / 'day' / 'evening'
+
+        Returned arrays are shared; combine them with & / | into new arrays
+        rather than modifying them in place.
+        """
+        if name not in self._masks:
+            if name in CATEGORY_GROUPS:
+                result = self.category_mask(CATEGORY_GROUPS[name])
+            else:
+                flag = f"Is_{name.capitalize()}"
+                result = (self.frame[flag] == 1).to_numpy() if flag in self.frame.columns \
+                    else np.zeros(len(self.frame), dtype=bool)
+            result.setflags(write=False)
+            self._masks[name] = result
+        return self._masks[name]
+
+    def category_mask(self, categories: Sequence[str]) -> np.ndarray:
+        return self.frame['Call_Category'].isin(list(categories)).to_numpy()
+
+    def view(self, mask: Optional[np.ndarray] = None) -> 'DatasetView':
+        """Lazy view of the rows where `mask` is True (all rows if None)"""
+        return DatasetView(self, mask)
+
+
+class DatasetView:
+    """
+    Rows of a CDRDataset selected by a boolean mask
+
+    Nothing is copied until frame() is called, and then only the requested
+    columns of the selected rows.
+    """
+
+    def __init__(self, dataset: CDRDataset, mask: Optional[np.ndarray] = None):
+        self.dataset = dataset
+        self.mask = np.ones(len(dataset), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.mask))
+
+    def where(self, mask: np.ndarray) -> 'DatasetView':
+        """Narrower view (this view's rows AND `mask`)"""
+        return DatasetView(self.dataset, self.mask & mask)
+
+    @property
+    def positions(self) -> np.ndarray:
+        return np.flatnonzero(self.mask)
+
+    def frame(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Materialise the selected rows (optionally only `columns`)"""
+        source = self.dataset.frame if columns is None else self.dataset.frame[list(columns)]
+        return source.iloc[self.positions]
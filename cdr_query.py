@@ -0,0 +1,161 @@
+"""
+CDR Query Module
+Indexed filtering for the Search & Filter tab
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+
+from cdr_dataset import CDRDataset, DatasetView
+
+logger = logging.getLogger(__name__)
+
+NGRAM = 3
+
+
+def _trigram_keys(points: np.ndarray) -> np.ndarray:
+    """int64 key of every trigram in each row of a code point matrix (21 bits per code point)"""
+    points = points.astype(np.int64)
+    span = points.shape[1] - NGRAM + 1
+    return (points[:, :span] << 42) | (points[:, 1:span + 1] << 21) | points[:, 2:span + 2]
+
+
+class CDRQueryEngine:
+    """
+    Search & Filter over a CDRDataset using precomputed indexes
+
+    - dates: row positions sorted by calendar day, so a date range is two
+      binary searches and a slice
+    - Call_Category / TimePeriod: factorized codes, so a multiselect filter is
+      a lookup table indexed by code instead of a string comparison per row
+    - B_Party_Clean: distinct numbers with a trigram index; a substring query
+      intersects the postings of its trigrams, confirms the few candidates
+      with a real substring check and maps them back to rows through codes
+
+    Each index is built on first use and kept for the life of the engine
+    (one per dataset); every filter yields a boolean mask and query()
+    intersects them into a DatasetView.
+    """
+
+    def __init__(self, dataset: CDRDataset):
+        self.dataset = dataset
+        self._day_index: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._codes: Dict[str, Tuple[np.ndarray, pd.Index]] = {}
+        self._number_index: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    # ------------------------------------------------------------------ #
+    # Indexes
+    # ------------------------------------------------------------------ #
+
+    def _days(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(sorted day numbers, row positions in that order); NaT sorts first"""
+        if self._day_index is None:
+            days = self.dataset.derived('day_number')
+            order = np.argsort(days, kind='stable')
+            self._day_index = (days[order], order)
+        return self._day_index
+
+    def codes(self, column: str) -> Tuple[np.ndarray, pd.Index]:
+        """Factorized (codes, categories) for a column; missing values get code -1"""
+        if column not in self._codes:
+            self._codes[column] = pd.factorize(self.dataset.frame[column])
+        return self._codes[column]
+
+    def _numbers(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (row codes, distinct numbers, sorted trigram keys, number id per key)
+
+        Numbers are laid out as a fixed-width code point matrix so every
+        trigram of every number is keyed in one vectorized pass; the postings
+        for a trigram are the contiguous run of its key in the sorted keys.
+        """
+        if self._number_index is None:
+            codes, uniques = self.codes('B_Party_Clean')
+            numbers = np.asarray(uniques.astype(str), dtype=str)
+            width = numbers.dtype.itemsize // 4
+            keys = np.empty(0, dtype=np.int64)
+            owners = np.empty(0, dtype=np.intp)
+            if len(numbers) and width >= NGRAM:
+                points = numbers.view(np.uint32).reshape(len(numbers), width)
+                lengths = np.char.str_len(numbers)
+                grams = _trigram_keys(points)
+                valid = np.arange(width - NGRAM + 1)[None, :] <= (lengths - NGRAM)[:, None]
+                keys = grams[valid]
+                owners = np.nonzero(valid)[0]
+                order = np.lexsort((owners, keys))
+                keys, owners = keys[order], owners[order]
+                # A number repeating a trigram only needs one posting
+                first = np.ones(len(keys), dtype=bool)
+                first[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+                keys, owners = keys[first], owners[first]
+
+            self._number_index = (codes, numbers, keys, owners)
+            logger.info(f"Indexed {len(numbers):,} numbers ({len(keys):,} trigram postings)")
+        return self._number_index
+
+    # ------------------------------------------------------------------ #
+    # Filters (boolean row masks)
+    # ------------------------------------------------------------------ #
+
+    def date_mask(self, start: Optional[date] = None, end: Optional[date] = None) -> np.ndarray:
+        """Rows whose calendar date lies in [start, end] (either bound optional)"""
+        days, order = self._days()
+        epoch = np.datetime64('1970-01-01', 'D')
+        lo = 0 if start is None else np.searchsorted(days, (np.datetime64(start, 'D') - epoch).astype(np.int64), 'left')
+        hi = len(days) if end is None else np.searchsorted(days, (np.datetime64(end, 'D') - epoch).astype(np.int64), 'right')
+        # NaT day numbers are the int64 minimum and never fall inside a real range
+        lo = max(lo, np.searchsorted(days, np.iinfo(np.int64).min, 'right'))
+        mask = np.zeros(len(days), dtype=bool)
+        mask[order[lo:hi]] = True
+        return mask
+
+    def isin_mask(self, column: str, values: Iterable) -> np.ndarray:
+        """Rows whose `column` value is one of `values`"""
+        codes, categories = self.codes(column)
+        selected = np.zeros(len(categories) + 1, dtype=bool)
+        selected[categories.get_indexer(list(values))] = True
+        # get_indexer reports unknown values as -1, which lands on the spare slot
+        selected[-1] = False
+        return selected[codes]
+
+    def number_mask(self, text: str) -> np.ndarray:
+        """Rows whose B_Party_Clean contains `text`"""
+        codes, numbers, keys, owners = self._numbers()
+        if len(text) >= NGRAM:
+            query = np.array([text]).view(np.uint32).reshape(1, len(text))
+            candidates = None
+            for key in np.unique(_trigram_keys(query)[0]):
+                lo, hi = np.searchsorted(keys, key, 'left'), np.searchsorted(keys, key, 'right')
+                ids = owners[lo:hi]
+                candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+                if not len(candidates):
+                    break
+        else:
+            candidates = np.arange(len(numbers))
+
+        matched = np.zeros(len(numbers) + 1, dtype=bool)
+        if len(candidates):
+            hits = np.char.find(numbers[candidates], text) >= 0
+            matched[candidates[hits]] = True
+        return matched[codes]
+
+    def query(
+        self,
+        number: str = "",
+        categories: Optional[Iterable] = None,
+        periods: Optional[Iterable] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> DatasetView:
+        """Rows matching every given filter"""
+        view = self.dataset.view(self.date_mask(start, end) if start is not None or end is not None else None)
+        if number:
+            view = view.where(self.number_mask(number))
+        if categories:
+            view = view.where(self.isin_mask('Call_Category', categories))
+        if periods:
+            view = view.where(self.isin_mask('TimePeriod', periods))
+        return view
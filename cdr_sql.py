@@ -0,0 +1,294 @@
+"""
+CDR SQL Module
+Optional embedded DuckDB backend for CDR aggregates and ISP reply data
+"""
+
+import importlib.util
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Union
+import logging
+
+from lazy_imports import lazy_import
+
+# Optional dependency; checked for at import, loaded when a backend is created
+duckdb = lazy_import('duckdb') if importlib.util.find_spec('duckdb') else None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Period codes match CDRAnalyzer.PERIODS; later flags win, as in the pandas path
+PERIOD_SQL = """CASE {evening}{day}{night}ELSE 3 END"""
+CALL_TYPE_SQL = """CASE
+    WHEN CAST("Call Type" AS VARCHAR) = 'IN' THEN 0
+    WHEN CAST("Call Type" AS VARCHAR) = 'OUT' THEN 1
+    WHEN contains(CAST("Call Type" AS VARCHAR), 'SM') THEN 2
+    ELSE 3 END"""
+
+
+def duckdb_available() -> bool:
+    """True when the duckdb package can be imported"""
+    return duckdb is not None
+
+
+def backend_from_env() -> Optional['CDRSqlBackend']:
+    """
+    Backend selected by the CDR_SQL_BACKEND environment variable
+
+    CDR_SQL_BACKEND=duckdb enables it; CDR_SQL_DATABASE optionally names an
+    on-disk database file (default: in-memory). With a database file the
+    aggregate columns and the interval-join keys are loaded into it rather
+    than kept as Arrow copies, and DuckDB spills large sorts / joins to disk.
+    Returns None when the backend is not requested or duckdb is not
+    installed.
+    """
+    if os.environ.get('CDR_SQL_BACKEND', '').lower() != 'duckdb':
+        return None
+    if not duckdb_available():
+        logger.warning("CDR_SQL_BACKEND=duckdb but duckdb is not installed; using pandas")
+        return None
+    return CDRSqlBackend(database=os.environ.get('CDR_SQL_DATABASE', ':memory:'))
+
+
+class CDRSqlBackend:
+    """
+    In-process columnar SQL engine over parsed CDRs and ISP reply hits
+
+    DataFrames are exposed as tables through an Arrow conversion (register)
+    or materialised into the database (load); CSV / Parquet exports can be
+    attached as views that are scanned on demand (attach_files). Queries
+    run multi-threaded, and any tables registered here can be joined in
+    query().
+
+    Scope: cdr_aggregates() returns the same structure as
+    CDRAnalyzer.get_aggregates(), so with CDRAnalyzer(sql_backend=...) the
+    shared hour / period / category / per-contact / daily counts behind the
+    temporal, contact and communication-pattern views are computed by
+    GROUP BY queries. interval_join() is the CDR <-> IPDR session join
+    behind ReplyCorrelator(sql_backend=...). Everything else (location,
+    device changes, duration statistics, new contacts, bursts) still runs
+    in pandas, and the parsed CDR itself stays resident in memory; tables
+    created through store() live in the database file when there is one.
+    """
+
+    def __init__(self, database: str = ':memory:', threads: Optional[int] = None,
+                 memory_limit: Optional[str] = None, temp_directory: Optional[str] = None):
+        if duckdb is None:
+            raise ImportError("duckdb is not installed (pip install duckdb) - the SQL backend is optional")
+        self.database = database
+        self.con = duckdb.connect(database)
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+        if memory_limit:
+            self.con.execute(f"SET memory_limit = {self._literal(memory_limit)}")
+        if temp_directory:
+            self.con.execute(f"SET temp_directory = {self._literal(temp_directory)}")
+        self._frames: Dict[str, object] = {}
+
+    @staticmethod
+    def _ident(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    @staticmethod
+    def _literal(value: str) -> str:
+        return "'" + str(value).replace("'", "''") + "'"
+
+    @property
+    def on_disk(self) -> bool:
+        """True when the database is a file rather than in-memory"""
+        return self.database not in (':memory:', '')
+
+    def tables(self) -> List[str]:
+        return [row[0] for row in self.con.execute("SHOW TABLES").fetchall()]
+
+    def register(self, name: str, df: pd.DataFrame):
+        """
+        Expose a DataFrame as a table (scanned in place, not loaded)
+
+        The frame is converted to an Arrow table first, which copies its
+        string columns; the copy lives as long as the registration.
+        """
+        # DuckDB reads Arrow directly; scanning the DataFrame itself would
+        # convert every string column to Python objects on each query
+        source = pa.Table.from_pandas(df, preserve_index=False) if pa is not None else df
+        self.con.register(name, source)
+        # DuckDB scans the source lazily, so keep it alive while registered
+        self._frames[name] = source
+
+    def load(self, name: str, df: pd.DataFrame):
+        """Copy a DataFrame into a database table (persisted for on-disk databases)"""
+        self.register('_load_source', df)
+        try:
+            self.con.execute(f"CREATE OR REPLACE TABLE {self._ident(name)} AS SELECT * FROM _load_source")
+        finally:
+            self.con.unregister('_load_source')
+            self._frames.pop('_load_source', None)
+
+    def store(self, name: str, df: pd.DataFrame):
+        """Make a DataFrame queryable as `name`: load()ed into an on-disk database, else register()ed"""
+        if self.on_disk:
+            self.load(name, df)
+        else:
+            self.register(name, df)
+
+    def attach_files(self, name: str, path: Union[str, List[str]]):
+        """
+        View over CSV or Parquet files (globs allowed), scanned when queried
+
+        Nothing is loaded into memory up front; each query streams the files,
+        so exports that are only ever queried here never enter the Python heap.
+        """
+        paths = [path] if isinstance(path, str) else list(path)
+        reader = 'read_parquet' if all(p.lower().endswith('.parquet') for p in paths) else 'read_csv_auto'
+        files = ', '.join(self._literal(p) for p in paths)
+        self.con.execute(f"CREATE OR REPLACE VIEW {self._ident(name)} AS SELECT * FROM {reader}([{files}])")
+
+    def query(self, sql: str, params: Optional[list] = None) -> pd.DataFrame:
+        """Run SQL against the registered tables and return a DataFrame"""
+        return self.con.execute(sql, params or []).df()
+
+    def close(self):
+        self._frames.clear()
+        self.con.close()
+
+    # ------------------------------------------------------------------ #
+    # CDR aggregates
+    # ------------------------------------------------------------------ #
+
+    def cdr_aggregates(self, df: pd.DataFrame, table: str = 'cdr') -> Dict:
+        """
+        CDRAnalyzer aggregates for `df` computed with GROUP BY queries
+
+        Only the columns the aggregates need are registered (with a row
+        position used to keep pandas' first-seen ordering of ties).
+        """
+        columns = set(df.columns)
+        needed = [c for c in ['Hour', 'Is_Night', 'Is_Day', 'Is_Evening', 'Call_Category', 'Dur(s)',
+                              'B_Party_Clean', 'Call Type', 'Date_Only', 'DayOfWeek'] if c in columns]
+        frame = df[needed].assign(_row=np.arange(len(df), dtype=np.int64))
+        if 'Date_Only' in columns:
+            frame['Date_Only'] = pd.to_datetime(frame['Date_Only'], errors='coerce')
+        self.store(table, frame)
+        t = self._ident(table)
+
+        flag_sql = {name: (f"WHEN {self._ident('Is_' + name.capitalize())} = 1 THEN {code} "
+                           if 'Is_' + name.capitalize() in columns else '')
+                    for code, name in enumerate(['night', 'day', 'evening'])}
+        period_sql = PERIOD_SQL.format(**flag_sql)
+        hour_sql = ("COALESCE(CAST(trunc(TRY_CAST(\"Hour\" AS DOUBLE)) AS BIGINT), -1)"
+                    if 'Hour' in columns else "-1")
+        duration_sql = "COALESCE(TRY_CAST(\"Dur(s)\" AS DOUBLE), 0)" if 'Dur(s)' in columns else "0"
+        type_sql = CALL_TYPE_SQL if 'Call Type' in columns else "3"
+
+        self.con.execute(f"""
+            CREATE OR REPLACE TEMP VIEW _cdr_keys AS
+            SELECT _row,
+                   {period_sql} AS period,
+                   {hour_sql} AS hour,
+                   {duration_sql} AS duration,
+                   {type_sql} AS type_code,
+                   "Call_Category" AS category,
+                   "B_Party_Clean" AS contact
+            FROM {t}
+        """)
+
+        # Periods x hours x categories in one pass
+        cells = self.query("""
+            SELECT period,
+                   CASE WHEN hour BETWEEN 0 AND 23 THEN hour ELSE 24 END AS hour,
+                   category, COUNT(*) AS n, SUM(duration) AS duration, MIN(_row) AS first_row
+            FROM _cdr_keys GROUP BY ALL
+        """)
+        period = cells['period'].to_numpy(dtype=np.int64)
+        hour = cells['hour'].to_numpy(dtype=np.int64)
+        counts = cells['n'].to_numpy(dtype=np.int64)
+        period_hour = np.bincount(period * 25 + hour, weights=counts, minlength=4 * 25).astype(np.int64).reshape(4, 25)
+        period_duration = np.bincount(period, weights=cells['duration'].to_numpy(dtype=np.float64), minlength=4)
+
+        categorised = cells[cells['category'].notna()]
+        first_seen = categorised.groupby('category', sort=False)['first_row'].min().sort_values(kind='mergesort')
+        categories = pd.Index(first_seen.index)
+        period_category = np.zeros((4, len(categories)), dtype=np.int64)
+        np.add.at(period_category,
+                  (categorised['period'].to_numpy(dtype=np.int64), categories.get_indexer(categorised['category'])),
+                  categorised['n'].to_numpy(dtype=np.int64))
+
+        # Per-contact counts, ordered by total then first appearance
+        contacts = self.query("""
+            SELECT contact,
+                   COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE period = 0) AS night,
+                   COUNT(*) FILTER (WHERE period = 1) AS day,
+                   COUNT(*) FILTER (WHERE period = 2) AS evening,
+                   COUNT(*) FILTER (WHERE type_code = 0) AS incoming,
+                   COUNT(*) FILTER (WHERE type_code = 1) AS outgoing,
+                   COUNT(*) FILTER (WHERE type_code = 2) AS sms
+            FROM _cdr_keys WHERE contact IS NOT NULL
+            GROUP BY contact ORDER BY total DESC, MIN(_row)
+        """)
+        contact_stats = contacts.set_index(pd.Index(contacts.pop('contact'), name='B_Party_Clean')).astype(np.int64)
+
+        if 'Date_Only' in columns:
+            daily = self.query(f"""
+                SELECT CAST("Date_Only" AS DATE) AS day, COUNT(*) AS n FROM {t}
+                WHERE "Date_Only" IS NOT NULL GROUP BY 1 ORDER BY 1
+            """)
+            daily_counts = pd.Series(daily['n'].to_numpy(dtype=np.int64),
+                                     index=pd.Index(pd.to_datetime(daily['day']).dt.date, name='Date_Only'))
+        else:
+            daily_counts = pd.Series(dtype=int)
+
+        if 'DayOfWeek' in columns:
+            dow = self.query(f"""
+                SELECT "DayOfWeek" AS dow, COUNT(*) AS n FROM {t}
+                WHERE "DayOfWeek" IS NOT NULL GROUP BY 1 ORDER BY n DESC, MIN(_row)
+            """)
+            dow_counts = pd.Series(dow['n'].to_numpy(dtype=np.int64),
+                                   index=pd.Index(dow['dow'], name='DayOfWeek'), name='count')
+        else:
+            dow_counts = pd.Series(dtype=int)
+
+        periods = ('night', 'day', 'evening', 'other')
+        return {
+            'total': len(df),
+            'hour_counts': period_hour[:, :24].sum(axis=0),
+            'period_hour_counts': {p: period_hour[i, :24] for i, p in enumerate(periods)},
+            'period_counts': {p: int(period_hour[i].sum()) for i, p in enumerate(periods)},
+            'period_categories': {
+                p: pd.Series(period_category[i], index=categories) for i, p in enumerate(periods)
+            },
+            'period_duration': {p: float(period_duration[i]) for i, p in enumerate(periods)},
+            'contact_stats': contact_stats,
+            'daily_counts': daily_counts,
+            'dow_counts': dow_counts,
+        }
+
+    # ------------------------------------------------------------------ #
+    # CDR <-> IPDR interval join
+    # ------------------------------------------------------------------ #
+
+    def interval_join(self, events: pd.DataFrame, sessions: pd.DataFrame, window_seconds: int,
+                      tables: Sequence[str] = ('cdr_events', 'ipdr_sessions')) -> pd.DataFrame:
+        """
+        (event, session) pairs on the same key whose intervals come within window_seconds
+
+        Both frames have columns row, code, start, end (integer key codes and
+        epoch seconds, end >= start); they are stored as `tables`. Columns:
+        event_row, session_row, ordered by event_row then session_row, the
+        same pairs and order as reply_correlation.interval_overlaps over the
+        widened event intervals.
+        """
+        for name, frame in zip(tables, (events, sessions)):
+            self.store(name, frame[['row', 'code', 'start', 'end']])
+        e, s = (self._ident(name) for name in tables)
+        return self.query(f"""
+            SELECT e."row" AS event_row, s."row" AS session_row
+            FROM {e} AS e JOIN {s} AS s
+              ON e.code = s.code AND s."start" <= e."end" + ? AND s."end" >= e."start" - ?
+            ORDER BY event_row, session_row
+        """, [int(window_seconds), int(window_seconds)])
@@ -0,0 +1,204 @@
+"""
+Cell Tower Cache Module
+Durable SQLite cache for provider lookups with an in-process LRU front
+"""
+
+import atexit
+import sqlite3
+import threading
+import weakref
+import hashlib
+import time
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+import logging
+
+from offline_cell_index import pack_cell_keys
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_IDS = {'mls': 1, 'opencellid': 2, 'unwired': 3}
+
+# Returned by get() for a cell a provider is known not to have
+NOT_FOUND = 'not_found'
+
+
+def cell_key(mcc: int, mnc: int, lac: int, cell_id: int) -> int:
+    """
+    Integer key for a cell
+
+    Indian cells use the packed layout of the offline index; anything that
+    does not fit falls back to a stable 63-bit hash of the four fields.
+    """
+    packed = int(pack_cell_keys([mcc], [mnc], [lac], [cell_id])[0])
+    if packed >= 0:
+        return packed
+    digest = hashlib.blake2b(f"{mcc}_{mnc}_{lac}_{cell_id}".encode(), digest_size=8).digest()
+    return -1 - (int.from_bytes(digest, 'little') >> 1)  # negative, so never clashes with packed keys
+
+
+def _close_at_exit(ref: 'weakref.ref'):
+    cache = ref()
+    if cache is not None:
+        cache.close()
+
+
+class CellTowerCache:
+    """
+    Provider lookup cache: (provider, cell) -> (lat, lon) or "not found"
+
+    - Stored in SQLite (WAL mode, so several app sessions can share it) in a
+      WITHOUT ROWID table keyed on (provider id, packed cell key).
+    - Negative results are cached too and expire after `negative_ttl` seconds,
+      so unknown cells are not re-queried on every run but are retried later.
+    - Writes are buffered and committed in batches (`batch_size` rows or
+      `flush_interval` seconds), never one file rewrite per lookup. Whatever
+      is still buffered is committed by close(), which also runs at exit.
+    - An in-process LRU of `lru_size` entries answers repeat lookups without
+      touching SQLite.
+    - hits / negative_hits / misses / writes counters feed the enrichment
+      summary.
+    """
+
+    def __init__(self, path: str = "cell_tower_cache.sqlite", negative_ttl: float = 7 * 86400,
+                 lru_size: int = 50_000, batch_size: int = 500, flush_interval: float = 5.0,
+                 legacy_json: Optional[str] = None):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self.lru_size = lru_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._lock = threading.RLock()
+        self._lru: "OrderedDict[Tuple[int, int], Tuple]" = OrderedDict()
+        self._pending: Dict[Tuple[int, int], Tuple] = {}
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self.stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'writes': 0}
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cells ("
+            " provider INTEGER NOT NULL, key INTEGER NOT NULL,"
+            " lat REAL, lon REAL, found INTEGER NOT NULL, updated REAL NOT NULL,"
+            " PRIMARY KEY (provider, key)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+        if legacy_json and os.path.exists(legacy_json):
+            self._import_legacy_json(legacy_json)
+
+        # Commit buffered writes at interpreter exit without keeping the cache alive
+        atexit.register(_close_at_exit, weakref.ref(self))
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cells").fetchone()[0]
+
+    def get(self, provider: str, mcc: int, mnc: int, lac: int, cell_id: int) -> Union[None, str, Tuple[float, float]]:
+        """
+        (lat, lon) on a hit, NOT_FOUND for a fresh negative entry, None on a miss
+        """
+        entry_key = (PROVIDER_IDS[provider], cell_key(mcc, mnc, lac, cell_id))
+        with self._lock:
+            entry = self._lru.get(entry_key)
+            if entry is not None:
+                self._lru.move_to_end(entry_key)
+            else:
+                entry = self._pending.get(entry_key)
+                if entry is None:
+                    row = self._conn.execute(
+                        "SELECT lat, lon, found, updated FROM cells WHERE provider = ? AND key = ?", entry_key
+                    ).fetchone()
+                    entry = tuple(row) if row else None
+                if entry is not None:
+                    self._remember(entry_key, entry)
+
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            lat, lon, found, updated = entry
+            if found:
+                self.stats['hits'] += 1
+                return (lat, lon)
+            if time.time() - updated < self.negative_ttl:
+                self.stats['negative_hits'] += 1
+                return NOT_FOUND
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, provider: str, mcc: int, mnc: int, lac: int, cell_id: int, location: Optional[Tuple[float, float]]):
+        """Record a lookup result (None = provider does not know the cell)"""
+        entry_key = (PROVIDER_IDS[provider], cell_key(mcc, mnc, lac, cell_id))
+        if location is None:
+            entry = (None, None, 0, time.time())
+        else:
+            entry = (float(location[0]), float(location[1]), 1, time.time())
+        with self._lock:
+            self._pending[entry_key] = entry
+            self._remember(entry_key, entry)
+            if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """Commit buffered writes in one transaction"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            rows = [(p, k, *entry) for (p, k), entry in self._pending.items()]
+            try:
+                with self._conn:
+                    self._conn.executemany("INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self.stats['writes'] += len(rows)
+                self._pending.clear()
+            except sqlite3.Error as e:
+                logger.error(f"Error saving cell tower cache: {e}")
+
+    def snapshot_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        """Commit buffered writes and close the database (safe to call more than once)"""
+        with self._lock:
+            if self._closed:
+                return
+            self.flush()
+            self._conn.close()
+            self._closed = True
+
+    def _remember(self, entry_key, entry):
+        self._lru[entry_key] = entry
+        self._lru.move_to_end(entry_key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _import_legacy_json(self, json_path: str):
+        """One-off import of the old {"mls_404_96_290_1": [lat, lon]} JSON cache"""
+        try:
+            with open(json_path, 'r') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read legacy cache {json_path}: {e}")
+            return
+
+        imported = 0
+        for name, location in legacy.items():
+            parts = name.split('_')
+            if len(parts) != 5 or parts[0] not in PROVIDER_IDS:
+                continue
+            try:
+                mcc, mnc, lac, cell_id = (int(p) for p in parts[1:])
+            except ValueError:
+                continue
+            self.put(parts[0], mcc, mnc, lac, cell_id, tuple(location))
+            imported += 1
+        self.flush()
+        os.replace(json_path, json_path + '.imported')
+        logger.info(f"Imported {imported} entries from legacy cache {json_path}")
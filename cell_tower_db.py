@@ -3,53 +3,168 @@ Cell Tower Database Module
 Lookup cell tower locations from Cell ID using open-source databases
 """
 
-import requests
 import pandas as pd
 import logging
-from typing import Optional, Tuple, Dict
-import json
+from typing import Optional, Tuple, Dict, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import os
 
+import numpy as np
+
+from offline_cell_index import OfflineCellIndex
+from cell_tower_cache import CellTowerCache, NOT_FOUND
+from lazy_imports import lazy_from, lazy_import
+
+# The HTTP stack is only needed once a provider is actually queried
+requests = lazy_import('requests')
+HTTPAdapter = lazy_from('requests.adapters', 'HTTPAdapter')
+
 logger = logging.getLogger(__name__)
 
+# ASCII byte -> hex digit value (-1 for anything else)
+_HEX_VALUES = np.full(256, -1, dtype=np.int64)
+for _digit, _char in enumerate('0123456789abcdef'):
+    _HEX_VALUES[ord(_char)] = _digit
+    _HEX_VALUES[ord(_char.upper())] = _digit
+
+# MCC-MNC-LAC-CellID (anything after a fourth hyphen is ignored, as in parse_cell_id)
+_HYPHENATED_CGI = r'(?s)^\s*\+?(\d{1,18})\s*-\s*\+?(\d{1,18})\s*-\s*\+?(\d{1,18})\s*-\s*\+?(\d{1,18})\s*(?:-.*)?$'
+
+
+def _digits_to_int64(digits: pd.Series) -> np.ndarray:
+    """int64 values of strings of space-separated decimal digit groups (validated by the caller)"""
+    if len(digits) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.fromstring(' '.join(digits.tolist()), dtype=np.int64, sep=' ')
+
+
+class RateLimiter:
+    """
+    Thread-safe minimum-interval rate limiter
+
+    Each acquire() reserves the next free slot (1 / rate seconds after the
+    previous one) under a lock and then sleeps outside it, so concurrent
+    workers are spaced out evenly without serialising their requests.
+    """
+    
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
 
 class CellTowerDatabase:
     """
     Cell tower location lookup using open-source databases
     
     Supported databases:
+    0. Offline index built from an OpenCelliD CSV dump (consulted first)
     1. OpenCelliD (https://opencellid.org/) - Free API with registration
-    2. Mozilla Location Service (MLS) - Free, no registration
+    2. Mozilla Location Service (MLS) - Shut down in 2024; only queried when
+       listed in `providers` (e.g. for an MLS-compatible self-hosted endpoint)
     3. Unwired Labs (https://unwiredlabs.com/) - Free tier available
     """
     
-    def __init__(self, cache_file: str = "cell_tower_cache.json"):
-        self.cache_file = cache_file
-        self.cache = self._load_cache()
+    # Provider endpoints (overridable, e.g. to point at a local mock server)
+    DEFAULT_ENDPOINTS = {
+        'mls': "https://location.services.mozilla.com/v1/geolocate?key=test",
+        'opencellid': "https://opencellid.org/cell/get",
+        'unwired': "https://us1.unwiredlabs.com/v2/process.php",
+    }
+    
+    # Network providers tried in order after the offline index (MLS is opt-in)
+    DEFAULT_PROVIDERS = ('opencellid', 'unwired')
+    
+    # Provider name -> lookup method
+    LOOKUP_METHODS = {
+        'mls': 'lookup_mozilla_mls',
+        'opencellid': 'lookup_opencellid',
+        'unwired': 'lookup_unwired_labs',
+    }
+    
+    # Requests per second allowed against each provider
+    DEFAULT_RATE_LIMITS = {
+        'mls': 10.0,
+        'opencellid': 2.0,
+        'unwired': 1.0,
+    }
+    
+    def __init__(self, cache_file: str = "cell_tower_cache.sqlite", endpoints: Optional[Dict[str, str]] = None,
+                 rate_limits: Optional[Dict[str, float]] = None, max_workers: int = 8, timeout: float = 10,
+                 offline_index_path: Optional[str] = None, negative_ttl_days: float = 7,
+                 providers: Optional[Sequence[str]] = None):
+        # Older installs kept a JSON cache; it is imported once into the SQLite store next to it
+        base, ext = os.path.splitext(cache_file)
+        self.cache_file = base + '.sqlite' if ext == '.json' else cache_file
+        self.cache = CellTowerCache(
+            self.cache_file,
+            negative_ttl=negative_ttl_days * 86400,
+            legacy_json=base + '.json',
+        )
         
         # API keys (optional - set via environment or config)
         self.opencellid_key = os.environ.get('OPENCELLID_API_KEY', '')
         self.unwired_key = os.environ.get('UNWIRED_API_KEY', '')
-    
-    def _load_cache(self) -> Dict:
-        """Load cached cell tower data"""
-        if os.path.exists(self.cache_file):
+        
+        self.providers = tuple(providers) if providers is not None else self.DEFAULT_PROVIDERS
+        self.endpoints = {**self.DEFAULT_ENDPOINTS, **(endpoints or {})}
+        limits = {**self.DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.rate_limiters = {name: RateLimiter(rate) for name, rate in limits.items()}
+        self.max_workers = max_workers
+        self.timeout = timeout
+        
+        # One pooled session shared by all worker threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self.last_enrichment_summary: Dict = {}
+        
+        # Unique cells that needed at least one provider request (flagged per worker thread)
+        self.network_cells = 0
+        self._network_lock = threading.Lock()
+        self._went_online = threading.local()
+        
+        # Offline tower index (see offline_cell_index.py); used before any network provider
+        if offline_index_path is None:
+            offline_index_path = os.environ.get('CELL_TOWER_INDEX', 'cell_tower_index.npy')
+        self.offline_index = None
+        if os.path.exists(offline_index_path):
             try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+                self.offline_index = OfflineCellIndex(offline_index_path)
+                logger.info(f"Loaded offline cell index with {len(self.offline_index)} cells")
+            except Exception as e:
+                logger.error(f"Error loading offline cell index: {e}")
     
-    def _save_cache(self):
-        """Save cache to file"""
-        try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f)
-        except Exception as e:
-            logger.error(f"Error saving cache: {e}")
+    def _cached(self, provider: str, mcc: int, mnc: int, lac: int, cell_id: int):
+        """Cached (lat, lon), NOT_FOUND, or None when the provider has to be asked"""
+        return self.cache.get(provider, mcc, mnc, lac, cell_id)
+    
+    def _request(self, provider: str, method: str, url: str, **kwargs):
+        """Rate-limited provider request over the pooled session"""
+        self._went_online.value = True
+        self.rate_limiters[provider].acquire()
+        return self.session.request(method, url, timeout=self.timeout, **kwargs)
     
-    def parse_cell_id(self, cell_id_str: str) -> Optional[Dict]:
+    def _remember(self, provider: str, mcc: int, mnc: int, lac: int, cell_id: int,
+                  location: Optional[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+        self.cache.put(provider, mcc, mnc, lac, cell_id, location)
+        return location
+    
+    @staticmethod
+    def parse_cell_id(cell_id_str: str) -> Optional[Dict]:
         """
         Parse Cell ID string into components
         
@@ -170,6 +285,96 @@ class CellTowerDatabase:
         return None
 
     
+    @staticmethod
+    def parse_cell_ids(cell_ids) -> pd.DataFrame:
+        """
+        Bulk version of parse_cell_id for a whole column of raw Cell IDs
+        
+        Each distinct string is parsed once, with vectorized string ops only:
+        the hyphenated format is validated and normalised by one regex
+        replace, the concatenated 404/405 formats by slicing out the MNC and
+        the LAC/CellID digits. Decimal digits are converted in one
+        np.fromstring call and split with integer arithmetic (LAC = leading
+        half of the digits); hex LTE remainders go through a byte lookup
+        table (only their last 24 bits feed LAC and Cell ID). The few strings
+        the patterns reject are re-checked with parse_cell_id, so results
+        match it exactly.
+        
+        Returns:
+            DataFrame aligned with the input: valid (bool), mcc, mnc, lac,
+            cell_id (int64, -1 where invalid)
+        """
+        cells = cell_ids if isinstance(cell_ids, pd.Series) else pd.Series(cell_ids, dtype=object)
+        codes, uniques = pd.factorize(cells)
+        uniques = np.asarray(uniques, dtype=object)
+        text = pd.Series(uniques, dtype=object).astype(str).str.strip().str.replace("'", "", regex=False)
+        fields = np.full((len(text), 4), -1, dtype=np.int64)
+        
+        # Format 1: MCC-MNC-LAC-CellID; matching rows lose their hyphens
+        hyphenated = text.str.contains('-', regex=False).to_numpy(dtype=bool)
+        normalised = text[hyphenated].str.replace(_HYPHENATED_CGI, r'\1 \2 \3 \4', regex=True)
+        matched = ~normalised.str.contains('-', regex=False).to_numpy(dtype=bool)
+        rows = np.flatnonzero(hyphenated)[matched]
+        fields[rows] = _digits_to_int64(normalised[matched]).reshape(-1, 4)
+        valid = np.zeros(len(text), dtype=bool)
+        valid[rows] = True
+        
+        # Format 2: 404/405 + MNC + LAC/CellID run together
+        lengths = text.str.len().to_numpy()
+        prefix = text.str[:3]
+        is_405 = (prefix == '405').to_numpy(dtype=bool)
+        concatenated = ~hyphenated & (lengths >= 10) & (is_405 | (prefix == '404').to_numpy(dtype=bool))
+        rows = np.flatnonzero(concatenated)
+        three_digit_mnc = is_405[rows] & (lengths[rows] >= 13)
+        candidates = text[concatenated]
+        mnc = candidates.str[3:5].where(~three_digit_mnc, candidates.str[3:6])
+        remaining = candidates.str[5:].where(~three_digit_mnc, candidates.str[6:])
+        mnc_ok = mnc.str.fullmatch(r'\d+').to_numpy(dtype=bool)
+        
+        decimal = mnc_ok & remaining.str.fullmatch(r'\d{1,18}').to_numpy(dtype=bool)
+        hexadecimal = (mnc_ok & is_405[rows]
+                       & remaining.str.contains('[a-fA-F]').to_numpy(dtype=bool)
+                       & remaining.str.fullmatch('[0-9a-fA-F]+').to_numpy(dtype=bool))
+        parsed = decimal | hexadecimal
+        fields[rows[parsed], 0] = np.where(is_405[rows[parsed]], 405, 404)
+        fields[rows[parsed], 1] = _digits_to_int64(mnc[parsed])
+        
+        value = _digits_to_int64(remaining[decimal])
+        digit_count = remaining[decimal].str.len().to_numpy()
+        scale = 10 ** (digit_count - digit_count // 2)
+        fields[rows[decimal], 2] = value // scale
+        fields[rows[decimal], 3] = value % scale
+        
+        low_bits = np.array(remaining[hexadecimal].str[-6:].str.zfill(6).tolist(), dtype='S6')
+        nibbles = _HEX_VALUES[low_bits.view(np.uint8).reshape(-1, 6)]
+        value = (nibbles << np.arange(20, -1, -4)).sum(axis=1)
+        fields[rows[hexadecimal], 2] = (value >> 8) & 0xFFFF
+        fields[rows[hexadecimal], 3] = value & 0xFF
+        valid[rows[parsed]] = True
+        
+        # Odd spellings the patterns do not cover (signs, stray spaces, ...)
+        for i in np.flatnonzero(~valid):
+            result = CellTowerDatabase.parse_cell_id(uniques[i])
+            if result and all(-(1 << 63) <= v < (1 << 63) for v in result.values()):
+                fields[i] = [result['mcc'], result['mnc'], result['lac'], result['cell_id']]
+                valid[i] = True
+        
+        fields[~valid] = -1
+        row_fields = np.vstack([fields, [[-1] * 4]])[codes]
+        return pd.DataFrame({
+            'valid': np.append(valid, False)[codes],
+            'mcc': row_fields[:, 0],
+            'mnc': row_fields[:, 1],
+            'lac': row_fields[:, 2],
+            'cell_id': row_fields[:, 3],
+        }, index=cells.index)
+    
+    def lookup_offline(self, mcc: int, mnc: int, lac: int, cell_id: int) -> Optional[Tuple[float, float]]:
+        """Lookup cell tower location in the local offline index (no network)"""
+        if self.offline_index is None:
+            return None
+        return self.offline_index.lookup(mcc, mnc, lac, cell_id)
+    
     def lookup_opencellid(self, mcc: int, mnc: int, lac: int, cell_id: int) -> Optional[Tuple[float, float]]:
         """
         Lookup cell tower location using OpenCelliD API
@@ -180,12 +385,12 @@ class CellTowerDatabase:
         if not self.opencellid_key:
             return None
         
-        cache_key = f"opencellid_{mcc}_{mnc}_{lac}_{cell_id}"
-        if cache_key in self.cache:
-            return tuple(self.cache[cache_key])
+        cached = self._cached('opencellid', mcc, mnc, lac, cell_id)
+        if cached is not None:
+            return None if cached == NOT_FOUND else cached
         
         try:
-            url = "https://opencellid.org/cell/get"
+            url = self.endpoints['opencellid']
             params = {
                 'key': self.opencellid_key,
                 'mcc': mcc,
@@ -195,15 +400,15 @@ class CellTowerDatabase:
                 'format': 'json'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._request('opencellid', 'GET', url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
                 if 'lat' in data and 'lon' in data:
-                    lat, lon = float(data['lat']), float(data['lon'])
-                    self.cache[cache_key] = [lat, lon]
-                    self._save_cache()
-                    return (lat, lon)
+                    return self._remember('opencellid', mcc, mnc, lac, cell_id, (float(data['lat']), float(data['lon'])))
+                return self._remember('opencellid', mcc, mnc, lac, cell_id, None)
+            if response.status_code == 404:
+                return self._remember('opencellid', mcc, mnc, lac, cell_id, None)
         except Exception as e:
             logger.error(f"OpenCelliD lookup error: {e}")
         
@@ -213,15 +418,16 @@ class CellTowerDatabase:
         """
         Lookup cell tower location using Mozilla Location Service
         
-        Note: Free, no API key required
-        Database: https://location.services.mozilla.com/
+        Note: The public service was shut down in 2024; lookup_cell_tower
+        only tries it when 'mls' is in `providers`, with the endpoint
+        pointed at a compatible server.
         """
-        cache_key = f"mls_{mcc}_{mnc}_{lac}_{cell_id}"
-        if cache_key in self.cache:
-            return tuple(self.cache[cache_key])
+        cached = self._cached('mls', mcc, mnc, lac, cell_id)
+        if cached is not None:
+            return None if cached == NOT_FOUND else cached
         
         try:
-            url = "https://location.services.mozilla.com/v1/geolocate?key=test"
+            url = self.endpoints['mls']
             
             payload = {
                 "cellTowers": [{
@@ -233,16 +439,15 @@ class CellTowerDatabase:
                 }]
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self._request('mls', 'POST', url, json=payload)
             
             if response.status_code == 200:
                 data = response.json()
                 if 'location' in data:
-                    lat = data['location']['lat']
-                    lon = data['location']['lng']
-                    self.cache[cache_key] = [lat, lon]
-                    self._save_cache()
-                    return (lat, lon)
+                    return self._remember('mls', mcc, mnc, lac, cell_id, (data['location']['lat'], data['location']['lng']))
+                return self._remember('mls', mcc, mnc, lac, cell_id, None)
+            if response.status_code == 404:
+                return self._remember('mls', mcc, mnc, lac, cell_id, None)
         except Exception as e:
             logger.error(f"Mozilla MLS lookup error: {e}")
         
@@ -258,12 +463,12 @@ class CellTowerDatabase:
         if not self.unwired_key:
             return None
         
-        cache_key = f"unwired_{mcc}_{mnc}_{lac}_{cell_id}"
-        if cache_key in self.cache:
-            return tuple(self.cache[cache_key])
+        cached = self._cached('unwired', mcc, mnc, lac, cell_id)
+        if cached is not None:
+            return None if cached == NOT_FOUND else cached
         
         try:
-            url = "https://us1.unwiredlabs.com/v2/process.php"
+            url = self.endpoints['unwired']
             
             payload = {
                 "token": self.unwired_key,
@@ -277,16 +482,15 @@ class CellTowerDatabase:
                 "address": 1
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self._request('unwired', 'POST', url, json=payload)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get('status') == 'ok':
-                    lat = data['lat']
-                    lon = data['lon']
-                    self.cache[cache_key] = [lat, lon]
-                    self._save_cache()
-                    return (lat, lon)
+                    return self._remember('unwired', mcc, mnc, lac, cell_id, (data['lat'], data['lon']))
+                # Quota / auth errors also come back as status "error"; only cache a genuine miss
+                if 'No matches' in str(data.get('message', '')):
+                    return self._remember('unwired', mcc, mnc, lac, cell_id, None)
         except Exception as e:
             logger.error(f"Unwired Labs lookup error: {e}")
         
@@ -297,10 +501,9 @@ class CellTowerDatabase:
         Lookup cell tower location using all available databases
         
         Tries in order:
-        1. Cache
-        2. Mozilla MLS (free, no key)
-        3. OpenCelliD (if API key available)
-        4. Unwired Labs (if API key available)
+        1. Offline index (if built)
+        2. Each of `providers`, cache first (by default OpenCelliD, then
+           Unwired Labs, each only with an API key)
         
         Args:
             cell_id_str: Cell ID string (e.g., "404-96-290-128686112")
@@ -308,33 +511,75 @@ class CellTowerDatabase:
         Returns:
             (lat, lon) tuple or None
         """
+        result = self._resolve_cell(cell_id_str)
+        # A single lookup is usually the last one for a while; don't leave it buffered
+        self.cache.flush()
+        return result[:2] if result else None
+    
+    def _resolve_cell(self, cell_id_str: str) -> Optional[Tuple[float, float, str]]:
+        """(lat, lon, provider) for a raw Cell ID, trying providers in order"""
         parsed = self.parse_cell_id(cell_id_str)
         if not parsed:
             return None
-        
-        mcc = parsed['mcc']
-        mnc = parsed['mnc']
-        lac = parsed['lac']
-        cell_id = parsed['cell_id']
-        
-        # Try Mozilla MLS first (free, no key required)
-        result = self.lookup_mozilla_mls(mcc, mnc, lac, cell_id)
+        return self._resolve_fields(parsed['mcc'], parsed['mnc'], parsed['lac'], parsed['cell_id'])
+    
+    def _resolve_fields(self, mcc: int, mnc: int, lac: int, cell_id: int,
+                        use_offline: bool = True) -> Optional[Tuple[float, float, str]]:
+        """(lat, lon, provider) for a parsed Cell ID, trying providers in order"""
+        # Offline index first (no network, no rate limit)
+        result = self.lookup_offline(mcc, mnc, lac, cell_id) if use_offline else None
         if result:
-            return result
+            return (*result, 'offline')
         
-        # Try OpenCelliD if API key available
-        if self.opencellid_key:
-            result = self.lookup_opencellid(mcc, mnc, lac, cell_id)
-            if result:
-                return result
+        # Network providers in order (each answers from the cache when it can,
+        # and skips itself without an API key)
+        self._went_online.value = False
+        try:
+            for provider in self.providers:
+                result = getattr(self, self.LOOKUP_METHODS[provider])(mcc, mnc, lac, cell_id)
+                if result:
+                    return (*result, provider)
+            return None
+        finally:
+            if self._went_online.value:
+                with self._network_lock:
+                    self.network_cells += 1
+    
+    def lookup_cell_towers(self, cell_ids: Iterable[str]) -> Dict[str, Optional[Tuple[float, float, str]]]:
+        """
+        Resolve many Cell IDs concurrently
         
-        # Try Unwired Labs if API key available
-        if self.unwired_key:
-            result = self.lookup_unwired_labs(mcc, mnc, lac, cell_id)
-            if result:
-                return result
+        All IDs are parsed in one pass (parse_cell_ids) and the offline
+        index answers as many as it can in one batched binary search; only
+        the remaining IDs are spread over a thread pool sharing one pooled
+        HTTP session, where each provider's RateLimiter keeps the combined
+        request rate within its limit.
         
-        return None
+        Returns:
+            dict of cell id -> (lat, lon, provider) or None
+        """
+        unique_ids = list(dict.fromkeys(cell_ids))
+        if not unique_ids:
+            return {}
+        
+        parsed = self.parse_cell_ids(pd.Series(unique_ids, dtype=object))
+        fields = parsed[['mcc', 'mnc', 'lac', 'cell_id']].to_numpy()
+        pending = parsed['valid'].to_numpy(dtype=bool, copy=True)
+        
+        results = {cell: None for cell in unique_ids}
+        if self.offline_index is not None:
+            found, lat, lon, _ = self.offline_index.lookup_many(*fields.T)
+            for i in np.flatnonzero(found):
+                results[unique_ids[i]] = (float(lat[i]), float(lon[i]), 'offline')
+            pending &= ~found
+        
+        remaining = np.flatnonzero(pending)
+        if len(remaining):
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(remaining)))) as pool:
+                resolved = pool.map(lambda i: self._resolve_fields(*(int(v) for v in fields[i]), use_offline=False), remaining)
+                results.update(zip((unique_ids[i] for i in remaining), resolved))
+            self.cache.flush()
+        return {cell: results[cell] for cell in unique_ids}
     
     def enrich_cdr_with_cell_towers(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -348,14 +593,13 @@ class CellTowerDatabase:
         Supports both:
         - Airtel format: 'First CGI' column
         - Jio format: 'First Cell ID' column
+        
+        Unique cells are resolved concurrently (lookup_cell_towers) and the
+        results attached with one vectorized map per column. A summary of the
+        run is kept in `last_enrichment_summary`.
         """
         df = df.copy()
         
-        # Initialize new columns
-        df['Cell_Tower_Lat'] = None
-        df['Cell_Tower_Long'] = None
-        df['Cell_Tower_Source'] = None
-        
         # Determine which column to use
         cell_column = None
         if 'First CGI' in df.columns:
@@ -363,35 +607,55 @@ class CellTowerDatabase:
         elif 'First Cell ID' in df.columns:
             cell_column = 'First Cell ID'
         
-        if cell_column:
-            unique_cells = df[cell_column].dropna().unique()
-            
-            logger.info(f"Looking up {len(unique_cells)} unique cell towers from '{cell_column}' column...")
-            
-            successful_lookups = 0
-            for i, cell_id in enumerate(unique_cells):
-                if i % 10 == 0:
-                    logger.info(f"Progress: {i}/{len(unique_cells)} cell towers processed...")
-                
-                result = self.lookup_cell_tower(cell_id)
-                
-                if result:
-                    lat, lon = result
-                    mask = df[cell_column] == cell_id
-                    df.loc[mask, 'Cell_Tower_Lat'] = lat
-                    df.loc[mask, 'Cell_Tower_Long'] = lon
-                    df.loc[mask, 'Cell_Tower_Source'] = 'Database'
-                    successful_lookups += 1
-            
-            logger.info(f"Successfully looked up {successful_lookups}/{len(unique_cells)} cell towers")
-        else:
+        if not cell_column:
             logger.warning("No cell ID column found (expected 'First CGI' or 'First Cell ID')")
-        
+            df['Cell_Tower_Lat'] = None
+            df['Cell_Tower_Long'] = None
+            df['Cell_Tower_Source'] = None
+            self.last_enrichment_summary = {}
+            return df
+        
+        unique_cells = df[cell_column].dropna().unique()
+        logger.info(f"Looking up {len(unique_cells)} unique cell towers from '{cell_column}' column...")
+        
+        started = time.monotonic()
+        stats_before = self.cache.snapshot_stats()
+        network_before = self.network_cells
+        results = self.lookup_cell_towers(unique_cells)
+        stats_after = self.cache.snapshot_stats()
+        found = {cell: result for cell, result in results.items() if result}
+        
+        cells = df[cell_column]
+        df['Cell_Tower_Lat'] = cells.map({cell: r[0] for cell, r in found.items()})
+        df['Cell_Tower_Long'] = cells.map({cell: r[1] for cell, r in found.items()})
+        df['Cell_Tower_Source'] = cells.map({cell: r[2] for cell, r in found.items()})
+        
+        providers = pd.Series([r[2] for r in found.values()], dtype=object).value_counts().to_dict()
+        self.last_enrichment_summary = {
+            'cell_column': cell_column,
+            'unique_cells': len(unique_cells),
+            'resolved': len(found),
+            'unresolved': len(unique_cells) - len(found),
+            'providers': providers,
+            'network_cells': self.network_cells - network_before,
+            'elapsed_seconds': time.monotonic() - started,
+            'cache': {name: stats_after[name] - stats_before[name] for name in stats_after},
+        }
+        logger.info(f"Successfully looked up {len(found)}/{len(unique_cells)} cell towers")
         return df
     
     def get_database_info(self) -> Dict:
         """Get information about available databases"""
         return {
+            'offline_index': {
+                'name': 'Offline Index (OpenCelliD dump)',
+                'url': 'https://opencellid.org/downloads.php',
+                'api_key_required': False,
+                'free': True,
+                'rate_limit': 'None (local)',
+                'coverage': f"{len(self.offline_index):,} cells (MCC 404/405)" if self.offline_index is not None else 'India (MCC 404/405)',
+                'status': 'Available' if self.offline_index is not None else 'Index not built (python offline_cell_index.py <dump.csv.gz>)'
+            },
             'mozilla_mls': {
                 'name': 'Mozilla Location Service',
                 'url': 'https://location.services.mozilla.com/',
@@ -399,7 +663,7 @@ class CellTowerDatabase:
                 'free': True,
                 'rate_limit': 'Unlimited (fair use)',
                 'coverage': 'Global',
-                'status': 'Available'
+                'status': 'Available' if 'mls' in self.providers else 'Unavailable (service shut down in 2024)'
             },
             'opencellid': {
                 'name': 'OpenCelliD',
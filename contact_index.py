@@ -0,0 +1,136 @@
+"""
+Contact Index Module
+Precomputed contact -> rows index for fast per-contact drilldowns
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ContactIndex:
+    """
+    Index of CDR rows grouped by contact
+
+    Built once per parsed frame: every row gets an integer contact code, and
+    the row positions are sorted by (code, DateTime) with an offsets array
+    marking where each contact's block starts. Any contact's rows, call
+    category counts and hourly profile are then O(k) slices instead of a
+    full-frame `df[df[col] == contact]` scan.
+
+    Row positions are positional (iloc) and stay valid for any frame with the
+    same row order as the one the index was built from.
+    """
+
+    def __init__(self, df: pd.DataFrame, contact_column: Optional[str] = None):
+        if contact_column is None:
+            contact_column = 'B_Party_Clean' if 'B_Party_Clean' in df.columns else 'Called Party Telephone Number'
+
+        self.df = df
+        self.contact_column = contact_column
+
+        # Categorical code column (-1 for missing contacts)
+        codes, contacts = pd.factorize(df[contact_column])
+        self.codes = codes
+        self.contacts = np.asarray(contacts, dtype=object)
+        self._code_lookup = {contact: code for code, contact in enumerate(self.contacts)}
+
+        # Rows sorted by contact, chronological within each contact
+        if 'DateTime' in df.columns:
+            times = df['DateTime'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+            order = np.lexsort((times, codes))
+        else:
+            order = np.argsort(codes, kind='stable')
+        self.order = order[codes[order] >= 0]
+
+        self.sizes = np.bincount(codes[codes >= 0], minlength=len(self.contacts))
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)])
+
+        # Per-row attributes used by the drilldowns
+        if 'Hour' in df.columns:
+            self.hours = pd.to_numeric(df['Hour'], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+        else:
+            self.hours = np.full(len(df), -1, dtype=np.int64)
+        if 'Call_Category' in df.columns:
+            self.category_codes, categories = pd.factorize(df['Call_Category'])
+            self.categories = np.asarray(categories, dtype=object)
+        else:
+            self.category_codes = np.full(len(df), -1, dtype=np.int64)
+            self.categories = np.array([], dtype=object)
+
+        logger.debug(f"Built contact index: {len(self.contacts)} contacts over {len(df)} rows")
+
+    def __len__(self) -> int:
+        return len(self.contacts)
+
+    def __contains__(self, contact) -> bool:
+        return contact in self._code_lookup
+
+    def code(self, contact) -> int:
+        """Integer code of a contact (-1 if unseen)"""
+        return self._code_lookup.get(contact, -1)
+
+    def rows(self, contact, mask=None) -> np.ndarray:
+        """
+        Row positions for a contact, in chronological order
+
+        Args:
+            contact: Contact number as it appears in the contact column
+            mask: Optional boolean array over the whole frame (e.g. calls only)
+        """
+        code = self.code(contact)
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+        positions = self.order[self.offsets[code]:self.offsets[code + 1]]
+        if mask is not None:
+            positions = positions[np.asarray(mask, dtype=bool)[positions]]
+        return positions
+
+    def frame(self, contact, mask=None) -> pd.DataFrame:
+        """Rows of the indexed frame for a contact"""
+        return self.df.iloc[self.rows(contact, mask)]
+
+    def count(self, contact, mask=None) -> int:
+        """Number of records for a contact"""
+        if mask is None:
+            code = self.code(contact)
+            return int(self.sizes[code]) if code >= 0 else 0
+        return len(self.rows(contact, mask))
+
+    def counts(self, mask=None) -> pd.Series:
+        """Records per contact, most frequent first (ties keep first-seen order)"""
+        if mask is None:
+            sizes = self.sizes
+        else:
+            selected = self.codes[np.asarray(mask, dtype=bool)]
+            sizes = np.bincount(selected[selected >= 0], minlength=len(self.contacts))
+        counts = pd.Series(sizes, index=self.contacts, name='count')
+        return counts[counts > 0].sort_values(ascending=False, kind='mergesort')
+
+    def top_contacts(self, n: int = 10, mask=None) -> List:
+        """The n most frequent contacts"""
+        return self.counts(mask).head(n).index.tolist()
+
+    def category_counts(self, contact, mask=None) -> Dict[str, int]:
+        """Call_Category counts for a contact"""
+        positions = self.rows(contact, mask)
+        codes = self.category_codes[positions]
+        codes = codes[codes >= 0]
+        if len(codes) == 0:
+            return {}
+        counts = np.bincount(codes, minlength=len(self.categories))
+        return {self.categories[i]: int(c) for i, c in enumerate(counts) if c > 0}
+
+    def hourly_profile(self, contact, mask=None) -> np.ndarray:
+        """Records per hour of day (length-24 array) for a contact"""
+        hours = self.hours[self.rows(contact, mask)]
+        return np.bincount(hours[(hours >= 0) & (hours < 24)], minlength=24)
+
+    def hourly_matrix(self, contacts: List, mask=None) -> np.ndarray:
+        """Stacked hourly profiles, one row per contact"""
+        if len(contacts) == 0:
+            return np.zeros((0, 24), dtype=np.int64)
+        return np.vstack([self.hourly_profile(contact, mask) for contact in contacts])
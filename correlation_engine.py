@@ -0,0 +1,253 @@
+"""
+Correlation Engine Module
+Common-contact and co-location correlation across many target CDRs
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+from lazy_imports import lazy_import
+
+sparse = lazy_import('scipy.sparse')
+
+logger = logging.getLogger(__name__)
+
+
+class CorrelationEngine:
+    """
+    Correlate many parsed CDRs (one per target)
+
+    Common contacts: every CDR becomes a row of a sparse target x contact
+    incidence matrix, and one sparse product B @ B.T gives the number of
+    shared contacts for all target pairs at once.
+
+    Co-location: all fixes are sorted by (CGI, time) and swept with a
+    widening lag, pairing fixes of different targets on the same CGI that
+    fall within the time window. No cross join is ever materialised.
+    """
+
+    def __init__(self, contact_column: str = 'B_Party_Clean', cgi_column: str = 'First CGI'):
+        self.contact_column = contact_column
+        self.cgi_column = cgi_column
+        self.targets: List[str] = []
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._incidence = None
+
+    def add_cdr(self, target: str, df: pd.DataFrame):
+        """Register a parsed CDR under a target name (re-adding replaces it)"""
+        target = str(target)
+        if target not in self._frames:
+            self.targets.append(target)
+        self._frames[target] = df
+        self._incidence = None
+
+    def _contact_series(self, df: pd.DataFrame) -> pd.Series:
+        column = self.contact_column if self.contact_column in df.columns else 'Called Party Telephone Number'
+        contacts = df[column].dropna().astype(str)
+        return contacts[contacts != 'Unknown']
+
+    # ===== COMMON CONTACTS =====
+
+    def build_incidence(self):
+        """
+        Sparse target x contact matrix of interaction counts
+
+        Returns:
+            (csr_matrix, contacts array)
+        """
+        if self._incidence is not None:
+            return self._incidence
+
+        parts = [self._contact_series(self._frames[t]) for t in self.targets]
+        lengths = [len(p) for p in parts]
+        all_contacts = pd.concat(parts, ignore_index=True) if parts else pd.Series(dtype=str)
+        contact_codes, contacts = pd.factorize(all_contacts)
+        target_codes = np.repeat(np.arange(len(self.targets)), lengths)
+
+        # Duplicate (target, contact) entries are summed into interaction counts
+        matrix = sparse.coo_matrix(
+            (np.ones(len(contact_codes), dtype=np.int64), (target_codes, contact_codes)),
+            shape=(len(self.targets), len(contacts))
+        ).tocsr()
+        matrix.sum_duplicates()
+
+        self._incidence = (matrix, np.asarray(contacts, dtype=object))
+        return self._incidence
+
+    def common_contacts(self, min_shared: int = 1) -> pd.DataFrame:
+        """
+        All target pairs ranked by number of shared contacts
+
+        Columns: target_a, target_b, shared_contacts, jaccard,
+        interactions_a, interactions_b (calls each target made to the shared set)
+        """
+        columns = ['target_a', 'target_b', 'shared_contacts', 'jaccard', 'interactions_a', 'interactions_b']
+        matrix, _ = self.build_incidence()
+        if matrix.shape[0] < 2:
+            return pd.DataFrame(columns=columns)
+
+        binary = (matrix > 0).astype(np.int64)
+        shared = sparse.triu(binary @ binary.T, k=1).tocoo()
+        keep = shared.data >= min_shared
+        rows, cols, counts = shared.row[keep], shared.col[keep], shared.data[keep]
+
+        degree = np.asarray(binary.sum(axis=1)).ravel()
+        jaccard = counts / (degree[rows] + degree[cols] - counts)
+
+        # Calls from each side into the shared contacts: A_i . B_j and A_j . B_i
+        weighted = (matrix @ binary.T).tocsr()
+        interactions_a = np.asarray(weighted[rows, cols]).ravel()
+        interactions_b = np.asarray(weighted[cols, rows]).ravel()
+
+        names = np.asarray(self.targets, dtype=object)
+        result = pd.DataFrame({
+            'target_a': names[rows],
+            'target_b': names[cols],
+            'shared_contacts': counts.astype(int),
+            'jaccard': jaccard.astype(float),
+            'interactions_a': interactions_a.astype(int),
+            'interactions_b': interactions_b.astype(int),
+        }, columns=columns)
+        return result.sort_values(['shared_contacts', 'jaccard'], ascending=False).reset_index(drop=True)
+
+    def shared_contacts_between(self, target_a: str, target_b: str) -> List[str]:
+        """Contacts common to two targets"""
+        matrix, contacts = self.build_incidence()
+        a = self.targets.index(str(target_a))
+        b = self.targets.index(str(target_b))
+        both = matrix[a].multiply(matrix[b])
+        return contacts[both.nonzero()[1]].tolist()
+
+    def contacts_across_targets(self, min_targets: int = 2) -> pd.DataFrame:
+        """
+        Contacts reached by several targets (likely hubs of the group)
+
+        Columns: contact, target_count, total_interactions, targets
+        """
+        columns = ['contact', 'target_count', 'total_interactions', 'targets']
+        matrix, contacts = self.build_incidence()
+        if matrix.shape[1] == 0:
+            return pd.DataFrame(columns=columns)
+
+        by_contact = matrix.T.tocsr()
+        target_count = np.diff(by_contact.indptr)
+        hubs = np.flatnonzero(target_count >= min_targets)
+        total = np.asarray(by_contact.sum(axis=1)).ravel()
+
+        names = np.asarray(self.targets, dtype=object)
+        result = pd.DataFrame({
+            'contact': contacts[hubs],
+            'target_count': target_count[hubs].astype(int),
+            'total_interactions': total[hubs].astype(int),
+            'targets': [
+                ', '.join(names[by_contact.indices[by_contact.indptr[h]:by_contact.indptr[h + 1]]])
+                for h in hubs
+            ],
+        }, columns=columns)
+        return result.sort_values(['target_count', 'total_interactions'], ascending=False).reset_index(drop=True)
+
+    # ===== CO-LOCATION =====
+
+    def _location_events(self) -> pd.DataFrame:
+        """(target, cgi, time) for every fix of every target"""
+        parts = []
+        for code, target in enumerate(self.targets):
+            df = self._frames[target]
+            if self.cgi_column not in df.columns or 'DateTime' not in df.columns:
+                continue
+            cgi = df[self.cgi_column].astype(str).str.strip().str.strip("'\"")
+            valid = df['DateTime'].notna().to_numpy() & ~cgi.isin(['', 'nan', 'None', '---']).to_numpy()
+            parts.append(pd.DataFrame({
+                'target': code,
+                'cgi': cgi.to_numpy()[valid],
+                'time': df['DateTime'].to_numpy(dtype='datetime64[ns]')[valid].astype('datetime64[s]').astype(np.int64),
+            }))
+        if not parts:
+            return pd.DataFrame({'target': [], 'cgi': [], 'time': []})
+        return pd.concat(parts, ignore_index=True)
+
+    def find_colocations(self, window_minutes: int = 15, max_lag: Optional[int] = None) -> pd.DataFrame:
+        """
+        Pairs of fixes from different targets on the same CGI within the window
+
+        Args:
+            window_minutes: Maximum time gap between the two fixes
+            max_lag: Optional cap on how many neighbours each fix is compared
+                     with (guards against extremely busy towers)
+
+        Columns: target_a, target_b, cgi, time_a, time_b, gap_seconds
+        """
+        columns = ['target_a', 'target_b', 'cgi', 'time_a', 'time_b', 'gap_seconds']
+        events = self._location_events()
+        if len(events) < 2:
+            return pd.DataFrame(columns=columns)
+
+        cgi_codes, cgis = pd.factorize(events['cgi'])
+        times = events['time'].to_numpy()
+        targets = events['target'].to_numpy()
+        order = np.lexsort((times, cgi_codes))
+        cgi_codes, times, targets = cgi_codes[order], times[order], targets[order]
+
+        window = window_minutes * 60
+        left, right = [], []
+        lag = 1
+        while lag < len(times) and (max_lag is None or lag <= max_lag):
+            same_cgi = cgi_codes[lag:] == cgi_codes[:-lag]
+            close = (times[lag:] - times[:-lag]) <= window
+            in_window = same_cgi & close
+            # Sorted by time within a CGI: once no pair at this lag is in the window, none further are
+            if not in_window.any():
+                break
+            hit = np.flatnonzero(in_window & (targets[lag:] != targets[:-lag]))
+            left.append(hit)
+            right.append(hit + lag)
+            lag += 1
+
+        if not left:
+            return pd.DataFrame(columns=columns)
+        i = np.concatenate(left)
+        j = np.concatenate(right)
+        if len(i) == 0:
+            return pd.DataFrame(columns=columns)
+
+        # Orient every pair so target_a < target_b
+        swap = targets[i] > targets[j]
+        i, j = np.where(swap, j, i), np.where(swap, i, j)
+
+        names = np.asarray(self.targets, dtype=object)
+        result = pd.DataFrame({
+            'target_a': names[targets[i]],
+            'target_b': names[targets[j]],
+            'cgi': np.asarray(cgis, dtype=object)[cgi_codes[i]],
+            'time_a': pd.to_datetime(times[i], unit='s'),
+            'time_b': pd.to_datetime(times[j], unit='s'),
+            'gap_seconds': np.abs(times[j] - times[i]).astype(int),
+        }, columns=columns)
+        return result.sort_values(['time_a', 'target_a', 'target_b']).reset_index(drop=True)
+
+    def colocation_summary(self, window_minutes: int = 15, pairs: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Target pairs ranked by co-location evidence
+
+        `pairs` can pass in find_colocations(window_minutes) when the caller
+        already has it, so the events are not computed twice.
+
+        Columns: target_a, target_b, colocations, distinct_cgis, days, first_seen, last_seen
+        """
+        if pairs is None:
+            pairs = self.find_colocations(window_minutes)
+        columns = ['target_a', 'target_b', 'colocations', 'distinct_cgis', 'days', 'first_seen', 'last_seen']
+        if pairs.empty:
+            return pd.DataFrame(columns=columns)
+
+        pairs = pairs.assign(day=pairs['time_a'].dt.date)
+        summary = pairs.groupby(['target_a', 'target_b']).agg(
+            colocations=('cgi', 'size'),
+            distinct_cgis=('cgi', 'nunique'),
+            days=('day', 'nunique'),
+            first_seen=('time_a', 'min'),
+            last_seen=('time_a', 'max'),
+        ).reset_index()
+        return summary.sort_values(['days', 'distinct_cgis', 'colocations'], ascending=False).reset_index(drop=True)
@@ -0,0 +1,206 @@
+"""
+Lazy Imports Module
+Defer heavy dependencies to first use and report where startup time goes
+"""
+
+import argparse
+import ast
+import importlib
+import os
+import re
+import subprocess
+import sys
+import time
+import types
+from collections import defaultdict
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds spent importing each deferred module on first use
+LOAD_TIMES: Dict[str, float] = {}
+
+# Top-level packages grouped into the subsystems shown by the startup report
+SUBSYSTEMS = {
+    'ui': ['streamlit', 'plotly', 'folium', 'streamlit_folium', 'branca', 'jinja2', 'altair', 'tornado'],
+    'data': ['pandas', 'numpy', 'pyarrow', 'duckdb', 'dateutil', 'pytz'],
+    'documents': ['docx', 'openpyxl', 'bs4', 'lxml', 'soupsieve', 'py7zr'],
+    'network': ['requests', 'urllib3', 'ipwhois', 'dns', 'certifi', 'charset_normalizer', 'idna', 'geopy'],
+    'graph': ['networkx', 'scipy'],
+}
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access
+
+    `px = lazy_import('plotly.express')` costs nothing at startup; the first
+    `px.bar(...)` imports plotly and, from then on, attribute lookups hit the
+    real module's namespace copied into the proxy.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            started = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            LOAD_TIMES[self.__name__] = time.perf_counter() - started
+            logger.debug(f"Loaded {self.__name__} on first use in {LOAD_TIMES[self.__name__]:.3f}s")
+            self.__dict__.update(module.__dict__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'deferred'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+class LazyAttribute:
+    """
+    Stand-in for `from module import name`, resolved on first call or attribute access
+
+    Covers the callables and enums the app imports by name (Document, Pt,
+    WD_ALIGN_PARAGRAPH, folium_static, ...).
+    """
+
+    def __init__(self, module: str, name: str):
+        self.__dict__['_module'] = module
+        self.__dict__['_name'] = name
+        self.__dict__['_target'] = None
+
+    def _resolve(self):
+        if self._target is None:
+            self.__dict__['_target'] = getattr(lazy_import(self._module), self._name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(), name)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._module}.{self._name}>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """The module if it is already imported, otherwise a LazyModule for it"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def lazy_from(module: str, name: str) -> LazyAttribute:
+    """Deferred `from module import name`"""
+    return LazyAttribute(module, name)
+
+
+def is_loaded(name: str) -> bool:
+    """True once `name` has really been imported (a pending LazyModule does not count)"""
+    return name in sys.modules
+
+
+# ---------------------------------------------------------------------- #
+# Startup report
+# ---------------------------------------------------------------------- #
+
+def startup_imports(script: str) -> List[str]:
+    """Modules a script imports at top level (what runs before its first line of UI)"""
+    with open(script, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=script)
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+def subsystem_of(package: str) -> str:
+    """Report group of a top-level package; modules of this repo are 'app'"""
+    for subsystem, packages in SUBSYSTEMS.items():
+        if package in packages:
+            return subsystem
+    if os.path.exists(os.path.join(HERE, f"{package}.py")):
+        return 'app'
+    if package in getattr(sys, 'stdlib_module_names', ()):
+        return 'stdlib'
+    return 'other'
+
+
+def import_time_report(modules: List[str], python: str = sys.executable) -> Dict:
+    """
+    `python -X importtime` of `modules` in a fresh interpreter
+
+    Returns total seconds, seconds per subsystem and the slowest top-level
+    packages (self time summed over each package's submodules).
+    """
+    statement = '; '.join(f"import {name}" for name in modules)
+    result = subprocess.run([python, '-X', 'importtime', '-c', statement], cwd=HERE,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+
+    packages: Dict[str, float] = defaultdict(float)
+    total = 0.0
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            seconds = int(match.group(1)) / 1e6
+            packages[match.group(4).split('.')[0]] += seconds
+            total += seconds
+
+    subsystems: Dict[str, float] = defaultdict(float)
+    for package, seconds in packages.items():
+        subsystems[subsystem_of(package)] += seconds
+    return {
+        'total': total,
+        'subsystems': dict(sorted(subsystems.items(), key=lambda item: -item[1])),
+        'packages': sorted(packages.items(), key=lambda item: -item[1]),
+    }
+
+
+def format_report(report: Dict, top: int = 15) -> str:
+    lines = [f"Total import time: {report['total']:.3f}s", "", "By subsystem:"]
+    lines += [f"  {name:<10} {seconds:8.3f}s" for name, seconds in report['subsystems'].items()]
+    lines += ["", f"Slowest packages (top {top}):"]
+    lines += [f"  {name:<24} {seconds:8.3f}s  [{subsystem_of(name)}]"
+              for name, seconds in report['packages'][:top]]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report what an app imports at startup and how long it takes")
+    parser.add_argument('scripts', nargs='*', default=['app.py', 'cdr_app.py'], help="Streamlit entry scripts")
+    parser.add_argument('--budget', type=float, default=None, help="Fail when a script's imports exceed this many seconds")
+    args = parser.parse_args()
+
+    over_budget = False
+    for script in args.scripts:
+        modules = startup_imports(os.path.join(HERE, script))
+        report = import_time_report(modules)
+        print(f"\n📦 {script}: {', '.join(modules)}\n")
+        print(format_report(report))
+        if args.budget is not None and report['total'] > args.budget:
+            print(f"❌ {script} startup imports took {report['total']:.3f}s (budget {args.budget:.3f}s)")
+            over_budget = True
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,38 +4,92 @@ Location intelligence and movement pattern analysis
 """
 
 import pandas as pd
-from typing import Dict, List, Tuple
+import numpy as np
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from spatial_clustering import SpatialClusterer
+from place_inference import SignificantPlaceDetector
+from movement_timeline import MovementTimeline
+from cdr_dataset import shared_frame
+
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371
+
 
 class LocationAnalyzer:
     """Analyze location patterns from tower data"""
     
+    # Faster than any ground travel; hops above this between fixes are flagged
+    MAX_PLAUSIBLE_SPEED_KMH = 250
+    
     def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
+        self.df = shared_frame(df)
         # Filter valid coordinates
         self.valid_df = df.dropna(subset=['First_Lat', 'First_Long'])
+        self._trajectory = None
+        self._spatial_cache = {}
+        self._timeline = None
+        
+    def get_location_clusters(self, radius_km: float = 0.5, min_points: int = 1) -> List[Dict]:
+        """
+        Get clusters of frequently visited locations
         
-    def get_location_clusters(self) -> List[Dict]:
-        """Get clusters of frequently visited locations"""
+        Towers within `radius_km` of each other are merged into one place
+        (see SpatialClusterer). Each cluster reports its centroid, fix count
+        and share, plus towers, visits, dwell time and active days.
+        """
         if len(self.valid_df) == 0:
             return []
         
-        location_counts = self.valid_df.groupby(['First_Lat', 'First_Long']).size()
-        location_counts = location_counts.sort_values(ascending=False)
-        
-        clusters = []
-        for (lat, lon), count in location_counts.items():
-            clusters.append({
-                'lat': float(lat),
-                'lon': float(lon),
-                'count': int(count),
-                'percentage': float(count / len(self.valid_df) * 100)
-            })
-        
-        return clusters
+        summary = self.get_cluster_summary(radius_km, min_points)
+        return [
+            {
+                'lat': float(row.lat),
+                'lon': float(row.lon),
+                'count': int(row.count),
+                'percentage': float(row.percentage),
+                'towers': int(row.towers),
+                'visits': int(row.visits),
+                'dwell_minutes': float(row.dwell_minutes),
+                'days': int(row.days),
+                'radius_km': float(row.radius_km),
+            }
+            for row in summary.itertuples(index=False)
+        ]
+    
+    def get_fix_clusters(self, radius_km: float = 0.5, min_points: int = 1) -> np.ndarray:
+        """Cluster label for every row of valid_df (-1 = noise), cached per parameters"""
+        key = (radius_km, min_points)
+        if key not in self._spatial_cache:
+            clusterer = SpatialClusterer(radius_km, min_points)
+            self._spatial_cache[key] = clusterer.fit_predict(
+                self.valid_df['First_Lat'].to_numpy(), self.valid_df['First_Long'].to_numpy()
+            )
+        return self._spatial_cache[key]
+    
+    def get_cluster_summary(self, radius_km: float = 0.5, min_points: int = 1) -> pd.DataFrame:
+        """Per-cluster centroid, counts, visits and dwell as a DataFrame"""
+        return SpatialClusterer(radius_km, min_points).summarize(
+            self.valid_df['First_Lat'].to_numpy(),
+            self.valid_df['First_Long'].to_numpy(),
+            self.valid_df['DateTime'].to_numpy(dtype='datetime64[ns]'),
+            labels=self.get_fix_clusters(radius_km, min_points),
+        )
+    
+    def get_significant_places(self, radius_km: float = 0.5, max_gap_hours: float = 2.0) -> pd.DataFrame:
+        """
+        Home / work / transit / significant places with dwell and confidence
+        (see SignificantPlaceDetector), cached per parameters
+        """
+        key = ('places', radius_km, max_gap_hours)
+        if key not in self._spatial_cache:
+            detector = SignificantPlaceDetector(radius_km=radius_km, max_gap_hours=max_gap_hours)
+            self._spatial_cache[key] = detector.detect(
+                self.valid_df['First_Lat'], self.valid_df['First_Long'], self.valid_df['DateTime']
+            )
+        return self._spatial_cache[key]
     
     def get_time_based_locations(self) -> Dict:
         """Get locations by time of day"""
@@ -74,36 +128,172 @@ class LocationAnalyzer:
         
         return locations
     
+    def get_timeline(self) -> MovementTimeline:
+        """Columnar chronological movement history (cached)"""
+        if self._timeline is None:
+            self._timeline = MovementTimeline.from_frame(self.valid_df)
+        return self._timeline
+    
     def get_movement_timeline(self) -> List[Dict]:
         """Get chronological movement data"""
         if len(self.valid_df) == 0:
             return []
         
-        timeline = []
-        sorted_df = self.valid_df.sort_values('DateTime')
-        
-        for _, row in sorted_df.iterrows():
-            timeline.append({
-                'datetime': row['DateTime'].strftime('%Y-%m-%d %H:%M:%S'),
-                'lat': float(row['First_Lat']),
-                'lon': float(row['First_Long']),
-                'call_type': row['Call_Category'],
-                'contact': row['B_Party_Clean']
-            })
-        
-        return timeline
+        return self.get_timeline().records()
     
     def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate approximate distance between two coordinates (in km)"""
-        from math import radians, sin, cos, sqrt, atan2
+        return float(self.haversine(lat1, lon1, lat2, lon2))
+    
+    # ===== VECTORIZED DISTANCE / TRAJECTORY =====
+    
+    @staticmethod
+    def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+        """
+        Great-circle distance in km, element-wise over scalars or arrays
+        
+        NaN coordinates give NaN distances.
+        """
+        lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
+    @classmethod
+    def consecutive_distances(cls, lat, lon) -> np.ndarray:
+        """Distance (km) from each fix to the next; length n - 1"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        if len(lat) < 2:
+            return np.empty(0)
+        return cls.haversine(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    
+    @classmethod
+    def path_length(cls, lat, lon) -> float:
+        """Total distance (km) along a sequence of fixes"""
+        return float(np.nansum(cls.consecutive_distances(lat, lon)))
+    
+    @classmethod
+    def major_movement_indices(cls, lat, lon, min_distance_km: float = 5.0, chunk: int = 4096) -> np.ndarray:
+        """
+        Positions of fixes that are more than `min_distance_km` from the
+        previously kept fix (the first fix is always kept)
+        
+        Each step jumps straight to the next qualifying fix by scanning the
+        distances from the current anchor a chunk at a time, so the Python
+        loop runs once per *kept* fix rather than once per fix.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        n = len(lat)
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        
+        kept = [0]
+        anchor, start = 0, 1
+        while start < n:
+            stop = min(start + chunk, n)
+            far = cls.haversine(lat[anchor], lon[anchor], lat[start:stop], lon[start:stop]) > min_distance_km
+            if far.any():
+                anchor = start + int(np.argmax(far))
+                kept.append(anchor)
+                start = anchor + 1
+            else:
+                start = stop
+        return np.asarray(kept, dtype=np.int64)
+    
+    def get_trajectory(self) -> pd.DataFrame:
+        """
+        Chronological fixes with per-hop distance, elapsed time and speed
+        
+        Columns: DateTime, lat, lon, distance_km, elapsed_s, speed_kmh,
+        impossible_travel. The hop columns describe the move *into* each fix
+        (NaN/False for the first one). Computed once and cached.
+        """
+        if self._trajectory is not None:
+            return self._trajectory
+        
+        sorted_df = self.valid_df.sort_values('DateTime', kind='mergesort')
+        lat = sorted_df['First_Lat'].to_numpy(dtype=np.float64)
+        lon = sorted_df['First_Long'].to_numpy(dtype=np.float64)
+        times = sorted_df['DateTime'].to_numpy(dtype='datetime64[ns]')
+        
+        distance = np.concatenate([[np.nan], self.consecutive_distances(lat, lon)])
+        elapsed = np.concatenate([[np.nan], np.diff(times).astype('timedelta64[s]').astype(np.float64)]) if len(times) else np.empty(0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            speed = distance / (elapsed / 3600)
+        # Same-second hops to a different place are infinitely fast
+        speed = np.where((elapsed == 0) & (distance > 0), np.inf, speed)
+        speed = np.where((elapsed == 0) & (distance == 0), 0.0, speed)
+        
+        self._trajectory = pd.DataFrame({
+            'DateTime': times,
+            'lat': lat,
+            'lon': lon,
+            'distance_km': distance,
+            'elapsed_s': elapsed,
+            'speed_kmh': speed,
+            'impossible_travel': speed > self.MAX_PLAUSIBLE_SPEED_KMH,
+        }, index=sorted_df.index)
+        return self._trajectory
+    
+    def get_total_distance(self) -> float:
+        """Approximate distance travelled (km) along the chronological fixes"""
+        return float(np.nansum(self.get_trajectory()['distance_km'].to_numpy()))
+    
+    def get_impossible_travel(self, max_speed_kmh: Optional[float] = None,
+                              min_distance_km: float = 5.0) -> pd.DataFrame:
+        """
+        Hops faster than any plausible ground travel
+        
+        `min_distance_km` ignores short jumps that are usually tower
+        hand-overs between neighbouring sites rather than real movement.
+        """
+        if max_speed_kmh is None:
+            max_speed_kmh = self.MAX_PLAUSIBLE_SPEED_KMH
+        trajectory = self.get_trajectory()
+        flagged = (trajectory['speed_kmh'] > max_speed_kmh) & (trajectory['distance_km'] >= min_distance_km)
+        previous = trajectory.shift(1)
+        return pd.DataFrame({
+            'from_time': previous['DateTime'][flagged],
+            'to_time': trajectory['DateTime'][flagged],
+            'from_lat': previous['lat'][flagged],
+            'from_lon': previous['lon'][flagged],
+            'to_lat': trajectory['lat'][flagged],
+            'to_lon': trajectory['lon'][flagged],
+            'distance_km': trajectory['distance_km'][flagged],
+            'elapsed_s': trajectory['elapsed_s'][flagged],
+            'speed_kmh': trajectory['speed_kmh'][flagged],
+        }).reset_index(drop=True)
+    
+    def get_dwell_segments(self, radius_km: float = 1.0, min_duration_minutes: float = 0) -> pd.DataFrame:
+        """
+        Runs of consecutive fixes that stay within `radius_km` of each other
         
-        R = 6371  # Earth's radius in km
+        A new segment starts whenever a hop is longer than the radius.
+        Columns: start, end, duration_minutes, fixes, lat, lon (centroid).
+        """
+        columns = ['start', 'end', 'duration_minutes', 'fixes', 'lat', 'lon']
+        trajectory = self.get_trajectory()
+        if len(trajectory) == 0:
+            return pd.DataFrame(columns=columns)
         
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        moved = trajectory['distance_km'].to_numpy() > radius_km
+        segment = np.cumsum(moved)
+        starts = np.flatnonzero(np.concatenate([[True], np.diff(segment) != 0]))
+        fixes = np.diff(np.concatenate([starts, [len(segment)]]))
         
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
+        times = trajectory['DateTime'].to_numpy()
+        ends = starts + fixes - 1
+        lat = np.bincount(segment, weights=trajectory['lat'].to_numpy()) / fixes
+        lon = np.bincount(segment, weights=trajectory['lon'].to_numpy()) / fixes
+        duration = (times[ends] - times[starts]).astype('timedelta64[s]').astype(np.float64) / 60
         
-        return R * c
+        segments = pd.DataFrame({
+            'start': times[starts],
+            'end': times[ends],
+            'duration_minutes': duration,
+            'fixes': fixes,
+            'lat': lat,
+            'lon': lon,
+        }, columns=columns)
+        return segments[segments['duration_minutes'] >= min_duration_minutes].reset_index(drop=True)
@@ -44,6 +44,14 @@ python -m PyInstaller --noconfirm ^
     --name "ISP_Letter_Gen" ^
     --add-data "app.py;." ^
     --add-data "backend.py;." ^
+    --add-data "lazy_imports.py;." ^
+    --add-data "session_matching.py;." ^
+    --add-data "reply_correlation.py;." ^
+    --add-data "cell_tower_db.py;." ^
+    --add-data "cell_tower_cache.py;." ^
+    --add-data "offline_cell_index.py;." ^
+    --add-data "reply_grid.py;." ^
+    --add-data "zip_bundle.py;." ^
     --add-data "JIO Template.docx;." ^
     --add-data "Airtel Template.docx;." ^
     --add-data "VI Template.docx;." ^
@@ -55,6 +63,10 @@ python -m PyInstaller --noconfirm ^
     --hidden-import "docx" ^
     --hidden-import "bs4" ^
     --hidden-import "ipwhois" ^
+    --hidden-import "requests" ^
+    --hidden-import "pyarrow" ^
+    --hidden-import "ipaddress" ^
+    --hidden-import "sqlite3" ^
     --copy-metadata streamlit ^
     run_app.py
 
@@ -0,0 +1,192 @@
+"""
+Movement Timeline Module
+Columnar, chronologically sorted movement history with path simplification
+"""
+
+import heapq
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from spatial_clustering import project_km
+
+logger = logging.getLogger(__name__)
+
+# Hour-of-day bands used by the animated movement map
+TIME_PERIOD_BANDS = (
+    (0, 6, 'Late Night'),
+    (6, 12, 'Morning'),
+    (12, 18, 'Afternoon'),
+    (18, 22, 'Evening'),
+    (22, 24, 'Night'),
+)
+
+
+class MovementTimeline:
+    """
+    Movement history as parallel NumPy columns
+
+    Holds epoch seconds, lat, lon and integer codes for call category and
+    contact (with their lookup tables), sorted by time. Filtering and
+    downsampling are index operations on the arrays; display strings are
+    only produced on demand, for the rows actually shown.
+    """
+
+    def __init__(self, seconds: np.ndarray, lat: np.ndarray, lon: np.ndarray,
+                 category_codes: np.ndarray, categories: np.ndarray,
+                 contact_codes: np.ndarray, contacts: np.ndarray):
+        self.seconds = seconds
+        self.lat = lat
+        self.lon = lon
+        self.category_codes = category_codes
+        self.categories = categories
+        self.contact_codes = contact_codes
+        self.contacts = contacts
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'MovementTimeline':
+        """Fixes with valid coordinates and time, in chronological order"""
+        lat = df['First_Lat'].to_numpy(dtype=np.float64)
+        lon = df['First_Long'].to_numpy(dtype=np.float64)
+        times = df['DateTime'].to_numpy(dtype='datetime64[ns]')
+        valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnat(times))
+
+        seconds = times[valid].astype('datetime64[s]').astype(np.int64)
+        order = np.argsort(seconds, kind='stable')
+
+        category_codes, categories = pd.factorize(df['Call_Category']) if 'Call_Category' in df.columns \
+            else (np.full(len(df), -1, dtype=np.int64), [])
+        contact_column = 'B_Party_Clean' if 'B_Party_Clean' in df.columns else 'Called Party Telephone Number'
+        contact_codes, contacts = pd.factorize(df[contact_column]) if contact_column in df.columns \
+            else (np.full(len(df), -1, dtype=np.int64), [])
+
+        return cls(
+            seconds[order],
+            lat[valid][order],
+            lon[valid][order],
+            category_codes[valid][order],
+            np.asarray(categories, dtype=object),
+            contact_codes[valid][order],
+            np.asarray(contacts, dtype=object),
+        )
+
+    def __len__(self) -> int:
+        return len(self.seconds)
+
+    def take(self, positions) -> 'MovementTimeline':
+        """Sub-timeline from a boolean mask or positions (lookup tables are shared)"""
+        return MovementTimeline(
+            self.seconds[positions], self.lat[positions], self.lon[positions],
+            self.category_codes[positions], self.categories,
+            self.contact_codes[positions], self.contacts,
+        )
+
+    def category_mask(self, categories: Sequence[str]) -> np.ndarray:
+        """Rows whose call category is one of `categories`"""
+        wanted = np.isin(self.categories, list(categories))
+        return np.append(wanted, False)[self.category_codes]
+
+    # ===== LAZY COLUMNS =====
+
+    @property
+    def datetimes(self) -> np.ndarray:
+        return self.seconds.astype('datetime64[s]')
+
+    @property
+    def hours(self) -> np.ndarray:
+        return (self.seconds % 86400) // 3600
+
+    def datetime_strings(self, unit: str = 's') -> np.ndarray:
+        """'YYYY-MM-DD HH:MM:SS' strings ('D' for the date only)"""
+        return np.char.replace(np.datetime_as_string(self.datetimes, unit=unit), 'T', ' ')
+
+    def time_periods(self) -> np.ndarray:
+        """Time-of-day band label for every fix"""
+        hours = self.hours
+        return np.select([(hours >= lo) & (hours < hi) for lo, hi, _ in TIME_PERIOD_BANDS],
+                         [label for _, _, label in TIME_PERIOD_BANDS], default='Night')
+
+    def category_labels(self) -> np.ndarray:
+        return np.append(self.categories, None)[self.category_codes]
+
+    def contact_labels(self) -> np.ndarray:
+        return np.append(self.contacts, None)[self.contact_codes]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materialise display columns (call on the rows that will be shown)"""
+        return pd.DataFrame({
+            'DateTime': self.datetimes.astype('datetime64[ns]'),
+            'DateTimeStr': self.datetime_strings(),
+            'First_Lat': self.lat,
+            'First_Long': self.lon,
+            'Call_Category': self.category_labels(),
+            'B_Party_Clean': self.contact_labels(),
+            'TimePeriodColor': self.time_periods(),
+            'Sequence': np.arange(len(self)),
+        })
+
+    def records(self) -> List[Dict]:
+        """List-of-dicts form (datetime, lat, lon, call_type, contact)"""
+        return [
+            {'datetime': dt, 'lat': float(lat), 'lon': float(lon), 'call_type': category, 'contact': contact}
+            for dt, lat, lon, category, contact in zip(
+                self.datetime_strings().tolist(), self.lat, self.lon,
+                self.category_labels().tolist(), self.contact_labels().tolist()
+            )
+        ]
+
+    # ===== DOWNSAMPLING =====
+
+    def simplify_indices(self, max_points: int, tolerance_km: Optional[float] = None) -> np.ndarray:
+        """
+        Positions to keep so the path keeps its shape with at most `max_points` fixes
+
+        Douglas-Peucker driven by a max-heap: the segment whose farthest
+        point deviates most is split first, so stopping after `max_points`
+        splits keeps the most important turns. `tolerance_km` stops earlier
+        once every remaining deviation is smaller. Each split is one
+        vectorized distance computation over the segment.
+        """
+        n = len(self)
+        if n <= 2 or (n <= max_points and tolerance_km is None):
+            return np.arange(n)
+
+        xy = project_km(self.lat, self.lon)
+        x, y = np.ascontiguousarray(xy[:, 0]), np.ascontiguousarray(xy[:, 1])
+        kept = [0, n - 1]
+        heap = []
+
+        def push(lo: int, hi: int):
+            if hi - lo < 2:
+                return
+            deviation_sq = self._segment_distance_sq(x[lo + 1:hi], y[lo + 1:hi], x[lo], y[lo], x[hi], y[hi])
+            k = int(np.argmax(deviation_sq))
+            heapq.heappush(heap, (-float(np.sqrt(deviation_sq[k])), lo, hi, lo + 1 + k))
+
+        push(0, n - 1)
+        while heap and len(kept) < max_points:
+            negative_deviation, lo, hi, split = heapq.heappop(heap)
+            if tolerance_km is not None and -negative_deviation <= tolerance_km:
+                break
+            kept.append(split)
+            push(lo, split)
+            push(split, hi)
+        return np.sort(np.asarray(kept, dtype=np.int64))
+
+    def simplify(self, max_points: int, tolerance_km: Optional[float] = None) -> 'MovementTimeline':
+        """Downsampled timeline (see simplify_indices)"""
+        return self.take(self.simplify_indices(max_points, tolerance_km))
+
+    @staticmethod
+    def _segment_distance_sq(x: np.ndarray, y: np.ndarray, x0: float, y0: float,
+                             x1: float, y1: float) -> np.ndarray:
+        """Squared distance from each point to the segment (x0, y0)-(x1, y1), planar km"""
+        dx, dy = x1 - x0, y1 - y0
+        px, py = x - x0, y - y0
+        length_sq = dx * dx + dy * dy
+        if length_sq == 0:
+            return px * px + py * py
+        t = np.clip((px * dx + py * dy) / length_sq, 0.0, 1.0)
+        ex, ey = px - t * dx, py - t * dy
+        return ex * ex + ey * ey
@@ -4,31 +4,399 @@ Analyzes contact networks and relationships from CDR data
 """
 
 import pandas as pd
-import networkx as nx
-from typing import Dict, List, Tuple
+import numpy as np
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from contact_index import ContactIndex
+from cdr_parser import CDRParser
+from lazy_imports import lazy_import
+
+# networkx / scipy are loaded when the first graph is built
+nx = lazy_import('networkx')
+sparse = lazy_import('scipy.sparse')
+
 logger = logging.getLogger(__name__)
 
 
+
+INCOMING_CATEGORIES = ('Incoming Call', 'SMS Received')
+
+
+def identify_target(df: pd.DataFrame, default: str = 'Target') -> str:
+    """Get target number - use metadata if available, otherwise use first calling party"""
+    target = default
+    if 'Target No' in df.columns and len(df) > 0:
+        target = df['Target No'].iloc[0]
+    elif 'Calling Party Telephone Number' in df.columns and len(df) > 0:
+        # For Jio format, get the most common calling party (likely the target)
+        target = df['Calling Party Telephone Number'].mode()[0]
+    return target
+
+
+def _contact_column(df: pd.DataFrame) -> Optional[str]:
+    if 'B_Party_Clean' in df.columns:
+        return 'B_Party_Clean'
+    if 'Called Party Telephone Number' in df.columns:
+        return 'Called Party Telephone Number'
+    return None
+
+
+class ContactGraph:
+    """
+    Weighted, directed multi-target contact graph
+
+    Nodes are integer ids (names and types kept in side arrays) and edges live
+    in a scipy CSR matrix, so graph metrics are sparse linear algebra rather
+    than walks over string-keyed dicts. Edge direction follows the call:
+    target -> contact for outgoing calls/SMS, contact -> target for incoming.
+
+    Every ingest bumps `version`; metrics are cached per version.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.is_target = np.zeros(0, dtype=bool)
+        self._node_ids: Dict[str, int] = {}
+        self._edge_parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._matrix = None
+        self._cache: Dict = {}
+        self.version = 0
+
+    # ===== CONSTRUCTION =====
+
+    def _node_ids_for(self, names: np.ndarray) -> np.ndarray:
+        """Map names to node ids, adding unseen names"""
+        uniques, inverse = np.unique(names.astype(str), return_inverse=True)
+        ids = np.empty(len(uniques), dtype=np.int64)
+        for i, name in enumerate(uniques.tolist()):
+            node = self._node_ids.get(name)
+            if node is None:
+                node = len(self.names)
+                self._node_ids[name] = node
+                self.names.append(name)
+            ids[i] = node
+        if len(self.is_target) < len(self.names):
+            self.is_target = np.concatenate([
+                self.is_target, np.zeros(len(self.names) - len(self.is_target), dtype=bool)
+            ])
+        return ids[inverse]
+
+    def add_cdr(self, df: pd.DataFrame, target: Optional[str] = None, min_interactions: int = 1):
+        """Ingest one target's CDR"""
+        contact_column = _contact_column(df)
+        if contact_column is None:
+            logger.warning("Could not identify a contact column; CDR not added to the graph.")
+            return
+
+        if target is None:
+            target = identify_target(df)
+        target = CDRParser._clean_phone_number(target)
+        target_id = self._node_ids_for(np.array([target]))[0]
+        self.is_target[target_id] = True
+
+        contacts = df[contact_column].astype(str)
+        valid = (contacts != 'Unknown').to_numpy() & df[contact_column].notna().to_numpy()
+        if 'Call_Category' in df.columns:
+            incoming = df['Call_Category'].isin(INCOMING_CATEGORIES).to_numpy()[valid]
+        else:
+            incoming = np.zeros(valid.sum(), dtype=bool)
+
+        # Interactions per (contact, direction)
+        counts = pd.DataFrame({'contact': contacts.to_numpy()[valid], 'incoming': incoming}) \
+            .groupby(['contact', 'incoming'], sort=False).size().reset_index(name='weight')
+        if min_interactions > 1:
+            total = counts.groupby('contact')['weight'].transform('sum')
+            counts = counts[total >= min_interactions]
+
+        contact_ids = self._node_ids_for(counts['contact'].to_numpy())
+        inc = counts['incoming'].to_numpy(dtype=bool)
+        src = np.where(inc, contact_ids, target_id)
+        dst = np.where(inc, target_id, contact_ids)
+        self._edge_parts.append((src, dst, counts['weight'].to_numpy(dtype=np.float64)))
+
+        self._matrix = None
+        self._cache = {}
+        self.version += 1
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.names)
+
+    @property
+    def matrix(self) -> 'sparse.csr_matrix':
+        """Directed weighted adjacency (row = source, column = destination)"""
+        if self._matrix is None:
+            n = self.n_nodes
+            if self._edge_parts:
+                src = np.concatenate([p[0] for p in self._edge_parts])
+                dst = np.concatenate([p[1] for p in self._edge_parts])
+                weight = np.concatenate([p[2] for p in self._edge_parts])
+            else:
+                src = dst = np.empty(0, dtype=np.int64)
+                weight = np.empty(0)
+            self._matrix = sparse.coo_matrix((weight, (src, dst)), shape=(n, n)).tocsr()
+        return self._matrix
+
+    @property
+    def undirected(self) -> 'sparse.csr_matrix':
+        """Symmetric weighted adjacency"""
+        return self._cached('undirected', lambda: (self.matrix + self.matrix.T).tocsr())
+
+    def _cached(self, key, builder):
+        if key not in self._cache:
+            self._cache[key] = builder()
+        return self._cache[key]
+
+    def _top(self, scores: np.ndarray, n: int, contacts_only: bool = False) -> Dict[str, float]:
+        candidates = np.flatnonzero(~self.is_target) if contacts_only else np.arange(self.n_nodes)
+        top = candidates[np.argsort(-scores[candidates], kind='stable')[:n]]
+        return {self.names[i]: float(scores[i]) for i in top}
+
+    # ===== METRICS =====
+
+    def degree_centrality(self) -> np.ndarray:
+        """Fraction of other nodes each node is connected to (ignoring direction)"""
+        def build():
+            n = self.n_nodes
+            if n <= 1:
+                return np.zeros(n)
+            degree = np.diff((self.undirected > 0).astype(np.int8).tocsr().indptr)
+            return degree / (n - 1)
+        return self._cached('degree', build)
+
+    def pagerank(self, alpha: float = 0.85, tol: float = 1e-8, max_iter: int = 100) -> np.ndarray:
+        """Weighted PageRank by sparse power iteration"""
+        def build():
+            n = self.n_nodes
+            if n == 0:
+                return np.zeros(0)
+            out_weight = np.asarray(self.matrix.sum(axis=1)).ravel()
+            dangling = out_weight == 0
+            inv = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+            transition_t = (sparse.diags(inv) @ self.matrix).T.tocsr()
+
+            rank = np.full(n, 1.0 / n)
+            for _ in range(max_iter):
+                new_rank = alpha * (transition_t @ rank + rank[dangling].sum() / n) + (1 - alpha) / n
+                if np.abs(new_rank - rank).sum() < n * tol:
+                    rank = new_rank
+                    break
+                rank = new_rank
+            return rank / rank.sum()
+        return self._cached(('pagerank', alpha, tol, max_iter), build)
+
+    def betweenness(self, sample_size: Optional[int] = None, seed: int = 0,
+                    batch_size: int = 64) -> np.ndarray:
+        """
+        Normalized betweenness centrality (undirected, unweighted hops)
+
+        Brandes' algorithm run level-synchronously for a batch of sources at a
+        time: each BFS level is expanded through the CSR arrays in one
+        vectorized step, so a batch costs O(batch * (n + m)). With
+        `sample_size`, only that many random pivot sources are used and the
+        result is rescaled (approximate betweenness for large graphs).
+        """
+        def build():
+            n = self.n_nodes
+            if n <= 2:
+                return np.zeros(n)
+            adjacency = (self.undirected > 0).tocsr()
+            indptr, indices = adjacency.indptr, adjacency.indices
+
+            def expand(keys):
+                """Neighbours of flat (source, node) keys -> (parent position, neighbour key)"""
+                batch_row, node = np.divmod(keys, n)
+                starts = indptr[node]
+                degree = indptr[node + 1] - starts
+                parent = np.repeat(np.arange(len(keys)), degree)
+                offset = np.arange(degree.sum()) - np.repeat(np.cumsum(degree) - degree, degree)
+                return parent, batch_row[parent] * n + indices[starts[parent] + offset]
+
+            sources = np.arange(n)
+            if sample_size is not None and sample_size < n:
+                sources = np.random.default_rng(seed).choice(n, sample_size, replace=False)
+
+            centrality = np.zeros(n)
+            for start in range(0, len(sources), batch_size):
+                batch = sources[start:start + batch_size]
+                k = len(batch)
+                sigma = np.zeros(k * n)
+                depth = np.full(k * n, -1, dtype=np.int64)
+                frontier = np.arange(k) * n + batch
+                sigma[frontier] = 1.0
+                depth[frontier] = 0
+                levels = [frontier]
+
+                # Forward BFS: count shortest paths level by level
+                while True:
+                    parent, reached = expand(frontier)
+                    new = depth[reached] < 0
+                    if not new.any():
+                        break
+                    parent, reached = parent[new], reached[new]
+                    keys, inverse = np.unique(reached, return_inverse=True)
+                    sigma[keys] = np.bincount(inverse, weights=sigma[frontier][parent])
+                    depth[keys] = len(levels)
+                    frontier = keys
+                    levels.append(frontier)
+
+                # Backward accumulation of dependencies
+                delta = np.zeros(k * n)
+                for level in range(len(levels) - 1, 0, -1):
+                    nodes = levels[level]
+                    coeff = (1.0 + delta[nodes]) / sigma[nodes]
+                    parent, reached = expand(nodes)
+                    is_pred = depth[reached] == level - 1
+                    keys, inverse = np.unique(reached[is_pred], return_inverse=True)
+                    delta[keys] += sigma[keys] * np.bincount(inverse, weights=coeff[parent[is_pred]])
+                delta[np.arange(k) * n + batch] = 0.0
+                centrality += delta.reshape(k, n).sum(axis=0)
+
+            # Undirected: each pair counted from both ends; rescale for sampling
+            centrality /= 2.0
+            centrality *= n / len(sources)
+            return centrality * (2.0 / ((n - 1) * (n - 2)))
+        return self._cached(('betweenness', sample_size, seed), build)
+
+    def bridges(self) -> pd.DataFrame:
+        """
+        Contacts linking two or more targets
+
+        Columns: contact, targets_linked, total_interactions, targets
+        """
+        def build():
+            columns = ['contact', 'targets_linked', 'total_interactions', 'targets']
+            target_ids = np.flatnonzero(self.is_target)
+            if len(target_ids) < 2:
+                return pd.DataFrame(columns=columns)
+            # Columns restricted to targets: how strongly each node touches each target
+            to_targets = self.undirected[:, target_ids].tocsr()
+            linked = np.diff(to_targets.indptr)
+            candidates = np.flatnonzero((linked >= 2) & ~self.is_target)
+            weight = np.asarray(to_targets.sum(axis=1)).ravel()
+            names = np.asarray(self.names, dtype=object)
+            result = pd.DataFrame({
+                'contact': names[candidates],
+                'targets_linked': linked[candidates].astype(int),
+                'total_interactions': weight[candidates].astype(int),
+                'targets': [
+                    ', '.join(names[target_ids[to_targets.indices[to_targets.indptr[c]:to_targets.indptr[c + 1]]]])
+                    for c in candidates
+                ],
+            }, columns=columns)
+            return result.sort_values(['targets_linked', 'total_interactions'], ascending=False).reset_index(drop=True)
+        return self._cached('bridges', build)
+
+    def communities(self, max_iter: int = 50, seed: int = 0) -> np.ndarray:
+        """
+        Community label per node via weighted label propagation
+
+        Nodes are updated in two random halves per round (semi-synchronous),
+        which avoids the label oscillation plain synchronous propagation has
+        on star-shaped (bipartite) CDR graphs.
+        """
+        def build():
+            n = self.n_nodes
+            labels = np.arange(n)
+            if n == 0:
+                return labels
+            adjacency = self.undirected.tocoo()
+            src, dst, weight = adjacency.row, adjacency.col, adjacency.data
+            has_neighbours = np.diff(self.undirected.indptr) > 0
+            rng = np.random.default_rng(seed)
+
+            for _ in range(max_iter):
+                changed = False
+                half = rng.random(n) < 0.5
+                for group in (half, ~half):
+                    scores = sparse.coo_matrix((weight, (src, labels[dst])), shape=(n, n)).tocsr()
+                    best = np.asarray(scores.argmax(axis=1)).ravel()
+                    best_score = scores.max(axis=1).toarray().ravel()
+                    current_score = np.asarray(scores[np.arange(n), labels]).ravel()
+                    update = group & has_neighbours & (current_score < best_score)
+                    if update.any():
+                        labels[update] = best[update]
+                        changed = True
+                if not changed:
+                    break
+
+            # Renumber communities by size (0 = largest)
+            _, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+            rank = np.empty(len(sizes), dtype=np.int64)
+            rank[np.argsort(-sizes, kind='stable')] = np.arange(len(sizes))
+            return rank[inverse]
+        return self._cached(('communities', max_iter, seed), build)
+
+    def get_metrics(self, top_n: int = 10, betweenness_sample: Optional[int] = None) -> Dict:
+        """
+        Summary metrics for the whole graph (cached per graph version)
+
+        Betweenness is sampled automatically above 2,000 nodes unless a
+        sample size is given.
+        """
+        n = self.n_nodes
+        if betweenness_sample is None and n > 2000:
+            betweenness_sample = 256
+
+        def build():
+            edges = self.matrix.nnz
+            communities = self.communities()
+            community_sizes = np.bincount(communities) if n else np.zeros(0, dtype=np.int64)
+            return {
+                'total_nodes': n,
+                'total_edges': int(edges),
+                'total_targets': int(self.is_target.sum()),
+                'density': float(edges / (n * (n - 1))) if n > 1 else 0.0,
+                'top_central_contacts': self._top(self.degree_centrality(), top_n),
+                'top_pagerank': self._top(self.pagerank(), top_n, contacts_only=True),
+                'top_betweenness': self._top(self.betweenness(betweenness_sample), top_n, contacts_only=True),
+                'bridges': self.bridges().head(top_n).to_dict('records'),
+                'communities': {
+                    'count': int(len(community_sizes)),
+                    'largest_sizes': community_sizes[:top_n].astype(int).tolist(),
+                },
+            }
+        return self._cached(('metrics', top_n, betweenness_sample), build)
+
+    def community_members(self, community: int) -> List[str]:
+        """Node names in one community"""
+        return [self.names[i] for i in np.flatnonzero(self.communities() == community)]
+
+    def to_networkx(self, min_weight: float = 0) -> 'nx.DiGraph':
+        """Export for plotting (integer matrix converted to named nodes)"""
+        coo = self.matrix.tocoo()
+        keep = coo.data >= min_weight
+        G = nx.DiGraph()
+        for i, name in enumerate(self.names):
+            G.add_node(name, node_type='target' if self.is_target[i] else 'contact')
+        G.add_weighted_edges_from(
+            (self.names[u], self.names[v], float(w))
+            for u, v, w in zip(coo.row[keep], coo.col[keep], coo.data[keep])
+        )
+        return G
+
 class NetworkAnalyzer:
     """Analyze contact networks from CDR data"""
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, contact_index: Optional[ContactIndex] = None):
         self.df = df
         self.graph = None
+        self.contact_graph = None
+        self._contact_index = contact_index
+    
+    @property
+    def contact_index(self) -> ContactIndex:
+        """Contact index over self.df (shared with CDRAnalyzer when passed in)"""
+        if self._contact_index is None:
+            self._contact_index = ContactIndex(self.df)
+        return self._contact_index
         
-    def build_network_graph(self, min_interactions: int = 1) -> nx.Graph:
+    def build_network_graph(self, min_interactions: int = 1) -> 'nx.Graph':
         """Build network graph of contacts"""
         G = nx.Graph()
         
-        # Get target number - use metadata if available, otherwise use first calling party
-        target = 'Target' # Default target name
-        if 'Target No' in self.df.columns and len(self.df) > 0:
-            target = self.df['Target No'].iloc[0]
-        elif 'Calling Party Telephone Number' in self.df.columns and len(self.df) > 0:
-            # For Jio format, get the most common calling party (likely the target)
-            target = self.df['Calling Party Telephone Number'].mode()[0]
+        target = identify_target(self.df)
         
         # Add target as central node
         G.add_node(target, node_type='target', size=100)
@@ -57,27 +425,33 @@ class NetworkAnalyzer:
         self.graph = G
         return G
     
-    def get_network_metrics(self) -> Dict:
-        """Calculate network metrics"""
-        if self.graph is None:
-            self.build_network_graph()
-        
-        metrics = {
-            'total_nodes': self.graph.number_of_nodes(),
-            'total_edges': self.graph.number_of_edges(),
-            'density': nx.density(self.graph),
-        }
+    def build_contact_graph(self, other_cdrs: Optional[Dict[str, pd.DataFrame]] = None,
+                            min_interactions: int = 1) -> ContactGraph:
+        """
+        Build the multi-target contact graph
         
-        # Degree centrality
-        if self.graph.number_of_nodes() > 0:
-            degree_cent = nx.degree_centrality(self.graph)
-            metrics['top_central_contacts'] = dict(sorted(
-                degree_cent.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:10])
+        Args:
+            other_cdrs: Optional {target number: parsed CDR} for the other targets
+            min_interactions: Drop contacts with fewer interactions with a target
+        """
+        graph = ContactGraph()
+        graph.add_cdr(self.df, min_interactions=min_interactions)
+        for target, other_df in (other_cdrs or {}).items():
+            graph.add_cdr(other_df, target=target, min_interactions=min_interactions)
+        self.contact_graph = graph
+        return graph
+    
+    def get_network_metrics(self) -> Dict:
+        """
+        Calculate network metrics
         
-        return metrics
+        Uses the multi-target contact graph (built from this CDR alone if
+        build_contact_graph() has not been called): degree centrality,
+        PageRank, betweenness, bridges between targets and communities.
+        """
+        if self.contact_graph is None:
+            self.build_contact_graph()
+        return self.contact_graph.get_metrics()
     
     def find_common_contacts(self, other_cdr_df: pd.DataFrame) -> List[str]:
         """Find contacts common between two CDRs"""
@@ -93,11 +467,8 @@ class NetworkAnalyzer:
     
     def get_contact_timeline(self, contact: str) -> pd.DataFrame:
         """Get timeline of interactions with a specific contact"""
-        # Determine contact column
-        contact_col = 'B_Party_Clean' if 'B_Party_Clean' in self.df.columns else 'Called Party Telephone Number'
-        
-        contact_df = self.df[self.df[contact_col] == contact].copy()
-        contact_df = contact_df.sort_values('DateTime')
+        # Index rows are already in chronological order
+        contact_df = self.contact_index.frame(contact)
         
         # Return available columns
         cols = ['DateTime', 'Call Type', 'Dur(s)']
@@ -0,0 +1,169 @@
+"""
+Offline Cell Index Module
+Compact on-disk cell tower index built from an OpenCelliD CSV dump
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Optional, Sequence, Tuple
+import argparse
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+INDIAN_MCCS = (404, 405)
+
+# Packed key layout (63 bits): [mcc is 405: 1][mnc: 10][lac/tac: 24][cell id: 28]
+MNC_BITS = 10
+LAC_BITS = 24
+CID_BITS = 28
+
+INDEX_DTYPE = np.dtype([
+    ('key', '<i8'),
+    ('lat', '<f4'),
+    ('lon', '<f4'),
+    ('range', '<i4'),
+])
+
+# OpenCelliD dump columns (cell_towers.csv / <mcc>.csv.gz)
+OPENCELLID_COLUMNS = ['radio', 'mcc', 'net', 'area', 'cell', 'unit', 'lon', 'lat', 'range',
+                      'samples', 'changeable', 'created', 'updated', 'averageSignal']
+
+
+def pack_cell_keys(mcc, mnc, lac, cell_id) -> np.ndarray:
+    """
+    Pack (mcc, mnc, lac, cell id) arrays into sortable int64 keys
+
+    Only the Indian MCCs fit the layout; anything else (or out-of-range
+    fields, e.g. 36-bit 5G NR cell ids) packs to -1.
+    """
+    mcc = np.asarray(mcc, dtype=np.int64)
+    mnc = np.asarray(mnc, dtype=np.int64)
+    lac = np.asarray(lac, dtype=np.int64)
+    cell_id = np.asarray(cell_id, dtype=np.int64)
+
+    packable = (
+        np.isin(mcc, INDIAN_MCCS)
+        & (mnc >= 0) & (mnc < (1 << MNC_BITS))
+        & (lac >= 0) & (lac < (1 << LAC_BITS))
+        & (cell_id >= 0) & (cell_id < (1 << CID_BITS))
+    )
+    keys = (
+        ((mcc == 405).astype(np.int64) << (MNC_BITS + LAC_BITS + CID_BITS))
+        | (mnc << (LAC_BITS + CID_BITS))
+        | (lac << CID_BITS)
+        | cell_id
+    )
+    return np.where(packable, keys, -1)
+
+
+class OfflineCellIndex:
+    """
+    Sorted, memory-mapped array of cell tower positions
+
+    The index is a NumPy structured array (key, lat, lon, range) sorted by
+    packed key and saved as .npy; it is opened with mmap so only the pages
+    touched by a lookup are read. A batch of lookups is a single
+    np.searchsorted over the key column.
+    """
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self.table = np.load(index_path, mmap_mode='r')
+        self.keys = self.table['key']
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @classmethod
+    def build_from_csv(cls, csv_path: str, index_path: str, mccs: Sequence[int] = INDIAN_MCCS,
+                       chunksize: int = 1_000_000) -> 'OfflineCellIndex':
+        """
+        Import an OpenCelliD-style CSV (plain or .gz) into a sorted index
+
+        The dump is streamed in chunks and filtered to `mccs`. When a cell
+        appears more than once, the row with the most samples is kept.
+        """
+        # Full dumps have a header row; some per-MCC exports do not
+        has_header = 'mcc' in pd.read_csv(csv_path, nrows=0).columns
+        reader = pd.read_csv(
+            csv_path,
+            header=0 if has_header else None,
+            names=None if has_header else OPENCELLID_COLUMNS,
+            usecols=['mcc', 'net', 'area', 'cell', 'lon', 'lat', 'range', 'samples'],
+            chunksize=chunksize,
+        )
+
+        parts = []
+        skipped = 0
+        for chunk in reader:
+            chunk = chunk[chunk['mcc'].isin(mccs)]
+            keys = pack_cell_keys(chunk['mcc'], chunk['net'], chunk['area'], chunk['cell'])
+            skipped += int((keys < 0).sum())
+            keep = keys >= 0
+            part = np.empty(int(keep.sum()), dtype=INDEX_DTYPE)
+            part['key'] = keys[keep]
+            part['lat'] = chunk['lat'].to_numpy(dtype=np.float32)[keep]
+            part['lon'] = chunk['lon'].to_numpy(dtype=np.float32)[keep]
+            part['range'] = chunk['range'].fillna(0).to_numpy(dtype=np.int32)[keep]
+            parts.append((part, chunk['samples'].fillna(0).to_numpy(dtype=np.int64)[keep]))
+
+        table = np.concatenate([p for p, _ in parts]) if parts else np.empty(0, dtype=INDEX_DTYPE)
+        samples = np.concatenate([s for _, s in parts]) if parts else np.empty(0, dtype=np.int64)
+
+        # Sort by key, best-sampled duplicate first, then keep one row per key
+        order = np.lexsort((-samples, table['key']))
+        table = table[order]
+        first = np.concatenate([[True], table['key'][1:] != table['key'][:-1]]) if len(table) else np.empty(0, dtype=bool)
+        table = table[first]
+
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        # Write through a handle so np.save keeps the exact file name
+        with open(index_path, 'wb') as f:
+            np.save(f, table)
+        logger.info(f"Built offline cell index: {len(table)} cells ({skipped} unpackable rows skipped) -> {index_path}")
+        return cls(index_path)
+
+    def lookup_many(self, mcc, mnc, lac, cell_id) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Batched lookup
+
+        Returns:
+            (found mask, lat, lon, range) arrays; lat/lon are NaN where not found
+        """
+        keys = pack_cell_keys(mcc, mnc, lac, cell_id)
+        lat = np.full(len(keys), np.nan)
+        lon = np.full(len(keys), np.nan)
+        tower_range = np.zeros(len(keys), dtype=np.int64)
+        if len(self.keys) == 0:
+            return np.zeros(len(keys), dtype=bool), lat, lon, tower_range
+
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = (keys >= 0) & (np.asarray(self.keys[positions]) == keys)
+
+        rows = self.table[positions[found]]
+        lat[found] = rows['lat']
+        lon[found] = rows['lon']
+        tower_range[found] = rows['range']
+        return found, lat, lon, tower_range
+
+    def lookup(self, mcc: int, mnc: int, lac: int, cell_id: int) -> Optional[Tuple[float, float]]:
+        """(lat, lon) of one cell, or None"""
+        found, lat, lon, _ = self.lookup_many([mcc], [mnc], [lac], [cell_id])
+        return (float(lat[0]), float(lon[0])) if found[0] else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline cell tower index from an OpenCelliD CSV dump")
+    parser.add_argument('csv_path', help="OpenCelliD cell_towers.csv(.gz) or per-MCC dump")
+    parser.add_argument('index_path', nargs='?', default='cell_tower_index.npy', help="Output .npy index")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    index = OfflineCellIndex.build_from_csv(args.csv_path, args.index_path)
+    print(f"✅ Indexed {len(index):,} cells into {args.index_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Place Inference Module
+Home / work / significant-place inference from stay segments
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Sequence, Tuple
+import logging
+
+from spatial_clustering import SpatialClusterer
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+# 1970-01-01 (epoch 0) was a Thursday; shift so week offsets start on Monday
+EPOCH_WEEKDAY = 3
+
+
+class SignificantPlaceDetector:
+    """
+    Label home, work and transit places from time-ordered tower fixes
+
+    1. Fixes are clustered into places (SpatialClusterer).
+    2. Consecutive fixes in the same place form a stay, lasting until the
+       next fix elsewhere but at most `max_gap_hours` past its last fix.
+    3. The time each stay overlaps the night window and the weekday working
+       window is computed in closed form: for a periodic window the covered
+       time up to t is full_periods * window_length + g(t mod period), with g
+       piecewise linear, so overlap = F(end) - F(start) for all stays at once.
+    4. Dwell is summed per place with bincount and places are labelled:
+       home = most night dwell, work = most weekday-day dwell elsewhere,
+       transit = visited often but only ever seen briefly (the observed span
+       of each visit, first to last fix, is short), significant = any other place
+       holding a meaningful share of total dwell.
+
+    Confidence combines the place's share of the relevant dwell with how
+    consistently it recurs (share of observed nights / workdays it appears on).
+    """
+
+    def __init__(self, radius_km: float = 0.5, max_gap_hours: float = 2.0,
+                 night_hours: Tuple[int, int] = (22, 6), work_hours: Tuple[int, int] = (9, 18),
+                 transit_min_visits: int = 3, transit_max_minutes: float = 30.0,
+                 significant_share: float = 0.05):
+        self.clusterer = SpatialClusterer(radius_km=radius_km)
+        self.max_gap = max_gap_hours * HOUR
+        self.night_windows = self._daily_windows(*night_hours)
+        self.work_windows = [
+            (day * DAY + start, day * DAY + end)
+            for day in range(5)
+            for start, end in self._daily_windows(*work_hours)
+        ]
+        self.transit_min_visits = transit_min_visits
+        self.transit_max_minutes = transit_max_minutes
+        self.significant_share = significant_share
+
+    @staticmethod
+    def _daily_windows(start_hour: int, end_hour: int) -> List[Tuple[int, int]]:
+        """Seconds-of-day windows, splitting ones that wrap midnight"""
+        if start_hour <= end_hour:
+            return [(start_hour * HOUR, end_hour * HOUR)]
+        return [(0, end_hour * HOUR), (start_hour * HOUR, DAY)]
+
+    @staticmethod
+    def _covered(t: np.ndarray, windows: Sequence[Tuple[int, int]], period: int, offset: int = 0) -> np.ndarray:
+        """Seconds of [0, t) that fall inside the periodic windows"""
+        breakpoints = [0]
+        covered = [0.0]
+        for start, end in sorted(windows):
+            breakpoints += [start, end]
+            covered += [covered[-1], covered[-1] + (end - start)]
+        breakpoints.append(period)
+        covered.append(covered[-1])
+
+        shifted = t + offset
+        full, rest = np.divmod(shifted, period)
+        return full * covered[-1] + np.interp(rest, breakpoints, covered)
+
+    def segment_stays(self, times: np.ndarray, labels: np.ndarray) -> pd.DataFrame:
+        """
+        Stays from time-sorted epoch seconds and place labels
+
+        Columns: place, start, end (epoch seconds), observed (seconds from
+        the stay's first to last fix), fixes
+        """
+        run_start = np.concatenate([[True], labels[1:] != labels[:-1]]) if len(labels) else np.empty(0, dtype=bool)
+        first = np.flatnonzero(run_start)
+        last = np.concatenate([first[1:], [len(labels)]]) - 1
+        next_first = np.concatenate([times[first[1:]], [times[-1]]]) if len(first) else np.empty(0)
+
+        end = np.minimum(next_first, times[last] + self.max_gap)
+        stays = pd.DataFrame({
+            'place': labels[first],
+            'start': times[first],
+            'end': np.maximum(end, times[first]),
+            'observed': times[last] - times[first],
+            'fixes': last - first + 1,
+        })
+        return stays[stays['place'] >= 0].reset_index(drop=True)
+
+    def detect(self, lat, lon, times) -> pd.DataFrame:
+        """
+        One row per place with dwell breakdown, label and confidence
+
+        Columns: place, lat, lon, label, confidence, dwell_hours,
+        night_hours, workday_hours, visits, nights, workdays, fixes
+        """
+        columns = ['place', 'lat', 'lon', 'label', 'confidence', 'dwell_hours', 'night_hours',
+                   'workday_hours', 'visits', 'nights', 'workdays', 'fixes']
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        times = np.asarray(times, dtype='datetime64[ns]')
+        valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnat(times))
+        seconds = times.astype('datetime64[s]').astype(np.int64)
+        lat, lon, seconds = lat[valid], lon[valid], seconds[valid]
+        if len(seconds) == 0:
+            return pd.DataFrame(columns=columns)
+
+        order = np.argsort(seconds, kind='stable')
+        lat, lon, seconds = lat[order], lon[order], seconds[order]
+        labels = self.clusterer.fit_predict(lat, lon)
+        stays = self.segment_stays(seconds, labels)
+        if stays.empty:
+            return pd.DataFrame(columns=columns)
+
+        n_places = int(labels.max()) + 1
+        place = stays['place'].to_numpy()
+        start = stays['start'].to_numpy().astype(np.float64)
+        end = stays['end'].to_numpy().astype(np.float64)
+        week_offset = EPOCH_WEEKDAY * DAY
+
+        dwell = np.bincount(place, weights=end - start, minlength=n_places)
+        night = np.bincount(place, weights=self._covered(end, self.night_windows, DAY)
+                            - self._covered(start, self.night_windows, DAY), minlength=n_places)
+        work = np.bincount(place, weights=self._covered(end, self.work_windows, WEEK, week_offset)
+                           - self._covered(start, self.work_windows, WEEK, week_offset), minlength=n_places)
+        visits = np.bincount(place, minlength=n_places)
+        observed = np.bincount(place, weights=stays['observed'].to_numpy(), minlength=n_places)
+        fixes = np.bincount(labels[labels >= 0], minlength=n_places)
+
+        # Recurrence: distinct nights (a night belongs to the day it starts, hence the 12h shift)
+        # and distinct weekdays with a fix at each place
+        night_day = (seconds - 12 * HOUR) // DAY
+        seconds_of_day = seconds % DAY
+        at_night = np.zeros(len(seconds), dtype=bool)
+        for window_start, window_end in self.night_windows:
+            at_night |= (seconds_of_day >= window_start) & (seconds_of_day < window_end)
+        weekday = ((seconds // DAY) + EPOCH_WEEKDAY) % 7 < 5
+        nights = self._distinct_per_place(labels, night_day, at_night, n_places)
+        workdays = self._distinct_per_place(labels, seconds // DAY, weekday, n_places)
+        total_nights = len(np.unique(night_day[at_night]))
+        total_workdays = len(np.unique((seconds // DAY)[weekday]))
+
+        lat_sum = np.bincount(labels[labels >= 0], weights=lat[labels >= 0], minlength=n_places)
+        lon_sum = np.bincount(labels[labels >= 0], weights=lon[labels >= 0], minlength=n_places)
+
+        places = pd.DataFrame({
+            'place': np.arange(n_places),
+            'lat': lat_sum / np.maximum(fixes, 1),
+            'lon': lon_sum / np.maximum(fixes, 1),
+            'label': 'other',
+            'confidence': 0.0,
+            'dwell_hours': dwell / HOUR,
+            'night_hours': night / HOUR,
+            'workday_hours': work / HOUR,
+            'visits': visits,
+            'nights': nights,
+            'workdays': workdays,
+            'fixes': fixes,
+        }, columns=columns)
+        self._label_places(places, observed / np.maximum(visits, 1) / 60, total_nights, total_workdays)
+        return places.sort_values(['confidence', 'dwell_hours'], ascending=False, kind='mergesort').reset_index(drop=True)
+
+    @staticmethod
+    def _distinct_per_place(labels: np.ndarray, day: np.ndarray, mask: np.ndarray, n_places: int) -> np.ndarray:
+        """Number of distinct days per place among masked fixes"""
+        keep = mask & (labels >= 0)
+        if not keep.any():
+            return np.zeros(n_places, dtype=np.int64)
+        day = day[keep] - day[keep].min()
+        keys = np.unique(labels[keep] * (int(day.max()) + 1) + day)
+        return np.bincount(keys // (int(day.max()) + 1), minlength=n_places)
+
+    def _label_places(self, places: pd.DataFrame, observed_minutes_per_visit: np.ndarray,
+                      total_nights: int, total_workdays: int):
+        """Assign home / work / transit / significant labels in place"""
+        label = places['label'].to_numpy(dtype=object).copy()
+        confidence = places['confidence'].to_numpy(dtype=np.float64).copy()
+
+        night = places['night_hours'].to_numpy()
+        work = places['workday_hours'].to_numpy()
+        dwell = places['dwell_hours'].to_numpy()
+        visits = places['visits'].to_numpy()
+
+        home = -1
+        if night.sum() > 0:
+            home = int(np.argmax(night))
+            label[home] = 'home'
+            coverage = places['nights'].iat[home] / max(total_nights, 1)
+            confidence[home] = 0.5 * night[home] / night.sum() + 0.5 * coverage
+
+        candidates = work.copy()
+        if home >= 0:
+            candidates[home] = 0
+        if candidates.sum() > 0:
+            work_place = int(np.argmax(candidates))
+            label[work_place] = 'work'
+            coverage = places['workdays'].iat[work_place] / max(total_workdays, 1)
+            confidence[work_place] = 0.5 * work[work_place] / work.sum() + 0.5 * coverage
+
+        unlabelled = label == 'other'
+        transit = (unlabelled & (visits >= self.transit_min_visits)
+                   & (observed_minutes_per_visit <= self.transit_max_minutes))
+        label[transit] = 'transit'
+        total_visits = max(int(visits.sum()), 1)
+        confidence[transit] = np.minimum(1.0, visits[transit] / total_visits * 10)
+
+        share = dwell / max(dwell.sum(), 1e-9)
+        significant = (label == 'other') & (share >= self.significant_share)
+        label[significant] = 'significant'
+        confidence[significant] = share[significant]
+
+        places['label'] = label
+        places['confidence'] = np.clip(confidence, 0.0, 1.0)
+
+    def detect_batch(self, frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Run detect() for many targets; one concatenated frame with a 'target' column
+        """
+        results = []
+        for target, df in frames.items():
+            places = self.detect(df['First_Lat'], df['First_Long'], df['DateTime'])
+            places.insert(0, 'target', str(target))
+            results.append(places)
+        if not results:
+            return pd.DataFrame()
+        return pd.concat(results, ignore_index=True)
@@ -0,0 +1,79 @@
+"""
+Render Cache Module
+Per-session cache of analyzer results and built figures for the Streamlit apps
+"""
+
+import hashlib
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Content hash of a DataFrame (shape, columns, dtypes and every value)
+
+    Two frames with the same data get the same fingerprint, so a re-upload
+    of the same CDR reuses cached results.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((df.shape, list(df.columns), [str(t) for t in df.dtypes])).encode())
+    if len(df):
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Small LRU of computed results keyed on (dataset fingerprint, name, params)
+
+    Render functions call get(df, name, builder, *params): the builder only
+    runs when that dataset / name / widget-parameter combination has not
+    been seen (or was evicted), so a rerun caused by an unrelated widget
+    reuses analyzer objects, aggregates and Plotly figures. Fingerprints
+    are hashed once per DataFrame object and remembered while it lives.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._fingerprints: Dict[int, Tuple[weakref.ref, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fingerprint(self, df: pd.DataFrame) -> str:
+        known = self._fingerprints.get(id(df))
+        if known is not None and known[0]() is df:
+            return known[1]
+        fingerprint = dataset_fingerprint(df)
+        # Drop entries for frames that have been garbage collected
+        self._fingerprints = {k: v for k, v in self._fingerprints.items() if v[0]() is not None}
+        self._fingerprints[id(df)] = (weakref.ref(df), fingerprint)
+        return fingerprint
+
+    def get(self, df: pd.DataFrame, name: str, builder: Callable[[], Any], *params: Hashable) -> Any:
+        """Cached result of builder() for this dataset, name and params"""
+        key = (self.fingerprint(df), name, params)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        value = builder()
+        self._entries[key] = value
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self._fingerprints.clear()
@@ -0,0 +1,400 @@
+"""
+Reply Correlation Module
+Time-window join between ISP IPDR reply hits and parsed CDRs
+"""
+
+import re
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from cell_tower_db import CellTowerDatabase
+
+logger = logging.getLogger(__name__)
+
+# Reply column names per field, across Airtel (old/new IPDR), Jio and VI layouts
+IPDR_COLUMNS = {
+    'msisdn': ['MSISDN_userID', 'Landline/MSISDN/MDN/Leased Circuit ID for Internet Access',
+               'MSISDN', 'DSL_User_ID', 'Contact No.'],
+    'imei': ['IMEI'],
+    'cgi': ['CGI', 'CELL ID', 'Cell ID', 'Cell_ID', 'CELL_ID', 'First Cell ID'],
+    'start': ['Session_Start_Time', 'Event_Start_Time', 'Start Date/Time of Public IP allocation',
+              'Start Date of Public IP Address allocation (dd/mm/yyyy)', 'Start_Time', 'Start Time'],
+    'end': ['Session_End_Time', 'End Date/Time of Public IP allocation',
+            'End Date of Public IP Address allocation (dd/mm/yyyy)', 'End_Time', 'End Time'],
+    'ip': ['Source_Public_IPv4', 'Source_Public_IPv6', 'Source IP Address'],
+}
+
+# CDR column names per field (Airtel / Jio parser output)
+CDR_COLUMNS = {
+    'msisdn': ['Target No', 'Calling Party Telephone Number'],
+    'contact': ['B_Party_Clean'],
+    'imei': ['IMEI'],
+    'cgi': ['First CGI', 'First Cell ID'],
+}
+
+# How much a match on each key counts when ranking
+KEY_WEIGHTS = {'msisdn': 3.0, 'imei': 3.0, 'contact': 2.0, 'cgi': 1.0}
+
+# Session length classes for interval_overlaps (seconds, x4 apart; the last class is unbounded)
+LENGTH_CLASSES = np.array([900, 3600, 4 * 3600, 16 * 3600, 64 * 3600, 256 * 3600], dtype=np.int64)
+
+# Candidate (query, session) pairs expanded at once by interval_overlaps
+MAX_CANDIDATES = 2_000_000
+
+
+def find_column(df: pd.DataFrame, candidates: Sequence[str]) -> Optional[str]:
+    """First candidate present in df (case / whitespace insensitive)"""
+    lookup = {re.sub(r'\s+', ' ', str(c)).strip().lower(): c for c in df.columns}
+    for name in candidates:
+        column = lookup.get(re.sub(r'\s+', ' ', name).strip().lower())
+        if column is not None:
+            return column
+    return None
+
+
+def _clean_text(series: pd.Series) -> pd.Series:
+    """Strings with quotes / whitespace stripped; placeholders become NA"""
+    text = series.astype(str).str.strip().str.strip("'\"").str.strip()
+    return text.where(~text.isin(['', 'nan', 'NaN', 'None', 'NaT', '---', '-']))
+
+
+def normalize_msisdn(series: pd.Series) -> pd.Series:
+    """Last 10 digits of a phone number (NA when shorter)"""
+    digits = _clean_text(series).str.replace(r'\D', '', regex=True)
+    return digits.str[-10:].where(digits.str.len() >= 10)
+
+
+def normalize_imei(series: pd.Series) -> pd.Series:
+    """First 14 digits of an IMEI, i.e. without the check digit (NA when shorter)"""
+    digits = _clean_text(series).str.replace(r'\D', '', regex=True)
+    return digits.str[:14].where(digits.str.len() >= 14)
+
+
+def normalize_cgi(series: pd.Series) -> pd.Series:
+    """MCC-MNC-LAC-CID for recognisable cell IDs, else the upper-cased raw value"""
+    codes, uniques = pd.factorize(_clean_text(series))
+    text = pd.Series(uniques, dtype=object).astype(str)
+    parsed = CellTowerDatabase.parse_cell_ids(text)
+    valid = parsed['valid'].to_numpy(dtype=bool)
+    keys = text.str.upper()
+    if valid.any():
+        fields = parsed.loc[valid, ['mcc', 'mnc', 'lac', 'cell_id']].astype('int64').astype(str)
+        keys[valid] = fields['mcc'] + '-' + fields['mnc'] + '-' + fields['lac'] + '-' + fields['cell_id']
+    # One key per distinct value, spread back over the rows (-1 = missing)
+    keys = np.append(keys.to_numpy(dtype=object), None)
+    return pd.Series(keys[codes], index=series.index, dtype='str')
+
+
+def parse_times(series: pd.Series) -> pd.Series:
+    """
+    Timestamps from reply / CDR text, day-first
+
+    Leading dd-mm-yyyy / dd/mm/yyyy dates are rewritten to ISO order so the
+    whole column goes through the fast ISO 8601 parser; anything else is
+    retried with day-first format inference.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    text = _clean_text(series)
+    iso = text.str.replace(r'^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})', r'\3-\2-\1', regex=True)
+    parsed = pd.to_datetime(iso, format='ISO8601', errors='coerce')
+    retry = parsed.isna() & text.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(text[retry], dayfirst=True, errors='coerce', format='mixed')
+    return parsed
+
+
+def _epoch_seconds(times: pd.Series) -> np.ndarray:
+    """int64 seconds since the epoch (NaT -> int64 minimum)"""
+    values = times.to_numpy(dtype='datetime64[ns]')
+    seconds = values.astype('datetime64[s]').astype(np.int64)
+    seconds[np.isnat(values)] = np.iinfo(np.int64).min
+    return seconds
+
+
+def _time_text(df: pd.DataFrame, field: str) -> Optional[pd.Series]:
+    """
+    Session start / end as text, joining Jio-style separate date and time columns
+    """
+    column = find_column(df, IPDR_COLUMNS[field])
+    if column is None:
+        return None
+    values = df[column].astype(str)
+    if 'date' in column.lower() and 'time' not in column.lower():
+        prefix = 'start' if field == 'start' else 'end'
+        time_column = next((c for c in df.columns
+                            if prefix in c.lower() and 'time' in c.lower() and 'date' not in c.lower()), None)
+        if time_column is not None:
+            values = values + ' ' + df[time_column].astype(str)
+    return values
+
+
+def interval_overlaps(q_code: np.ndarray, q_start: np.ndarray, q_end: np.ndarray,
+                      s_code: np.ndarray, s_start: np.ndarray, s_end: np.ndarray,
+                      max_candidates: int = MAX_CANDIDATES):
+    """
+    Every (query, session) pair on the same key whose intervals overlap
+
+    Inputs are int64 codes (>= 0) and epoch seconds; a session ending
+    before it starts is an instant. Returns (query positions, session
+    positions), sorted by query then session.
+
+    Sessions are split into length classes (LENGTH_CLASSES, x4 apart) and
+    each class is searched on its own (key, start) axis: a query only scans
+    sessions of that class starting between (query start - longest session
+    of the class on its key) and the query end, so one multi-day or
+    garbage-ended session no longer widens the scan for every query on its
+    key. Candidate ranges are expanded at most `max_candidates` pairs at a
+    time, which bounds the working memory to the chunk plus the output.
+    """
+    if len(q_code) == 0 or len(s_code) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    s_end = np.maximum(s_end, s_start)
+    length_class = np.searchsorted(LENGTH_CLASSES, s_end - s_start, 'left')
+    n_keys = int(max(q_code.max(initial=-1), s_code.max(initial=-1))) + 1
+    span = np.int64(1) << 33
+    q_found: List[np.ndarray] = []
+    s_found: List[np.ndarray] = []
+
+    for cls in np.unique(length_class):
+        members = np.flatnonzero(length_class == cls)
+        members = members[np.lexsort((s_start[members], s_code[members]))]
+        c_code, c_start, c_end = s_code[members], s_start[members], s_end[members]
+
+        # Longest session of this class per key bounds how far back an overlap can start
+        longest = np.zeros(n_keys, dtype=np.int64)
+        np.maximum.at(longest, c_code, c_end - c_start)
+
+        # Composite (key, start) axis so one searchsorted handles every key;
+        # offsets are clipped into the axis (exact checks happen on expansion)
+        base = min(c_start.min(), (q_start - longest[q_code]).min())
+
+        def position(code, t):
+            return code.astype(np.int64) * span + np.clip(t - base, 0, span - 1)
+
+        axis = position(c_code, c_start)
+        lo = np.searchsorted(axis, position(q_code, q_start - longest[q_code]), 'left')
+        hi = np.searchsorted(axis, position(q_code, q_end), 'right')
+
+        # Expand the candidate ranges in chunks of about max_candidates pairs
+        counts = hi - lo
+        cumulative = np.cumsum(counts)
+        bounds = np.searchsorted(cumulative, np.arange(max_candidates, cumulative[-1] if len(counts) else 0,
+                                                       max_candidates), 'left')
+        for first, last in zip(np.concatenate([[0], bounds + 1]), np.append(bounds + 1, len(counts))):
+            chunk = counts[first:last]
+            if chunk.sum() == 0:
+                continue
+            query_pos = np.repeat(np.arange(first, last), chunk)
+            offsets = np.arange(chunk.sum()) - np.repeat(np.cumsum(chunk) - chunk, chunk)
+            session_pos = np.repeat(lo[first:last], chunk) + offsets
+            keep = (c_end[session_pos] >= q_start[query_pos]) & (c_start[session_pos] <= q_end[query_pos])
+            q_found.append(query_pos[keep])
+            s_found.append(members[session_pos[keep]])
+
+    if not q_found:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    query_pos, session_pos = np.concatenate(q_found), np.concatenate(s_found)
+    order = np.lexsort((session_pos, query_pos))
+    return query_pos[order], session_pos[order]
+
+
+def normalize_ipdr(hits_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reply hits in the common schema: row, msisdn, imei, cgi, start, end, ip
+
+    Sessions without an end time are treated as instants at their start.
+    """
+    n = len(hits_df)
+    result = pd.DataFrame({'row': np.arange(n)}, index=hits_df.index)
+    for field, normalizer in [('msisdn', normalize_msisdn), ('imei', normalize_imei), ('cgi', normalize_cgi)]:
+        column = find_column(hits_df, IPDR_COLUMNS[field])
+        result[field] = normalizer(hits_df[column]) if column is not None else pd.Series(pd.NA, index=hits_df.index, dtype=object)
+
+    start = _time_text(hits_df, 'start')
+    end = _time_text(hits_df, 'end')
+    result['start'] = parse_times(start) if start is not None else pd.NaT
+    result['end'] = parse_times(end) if end is not None else pd.NaT
+    result['end'] = result['end'].where(result['end'] >= result['start'], result['start'])
+
+    ip_column = find_column(hits_df, IPDR_COLUMNS['ip'])
+    result['ip'] = _clean_text(hits_df[ip_column]) if ip_column is not None else pd.NA
+    if 'Source_File' in hits_df.columns:
+        result['source_file'] = hits_df['Source_File'].to_numpy()
+    return result.reset_index(drop=True)
+
+
+def normalize_cdr(df: pd.DataFrame, target_number: Optional[str] = None) -> pd.DataFrame:
+    """
+    Parsed CDR in the common schema: row, msisdn, contact, imei, cgi, start, end
+
+    The call interval is [DateTime, DateTime + duration]. target_number
+    fills msisdn when the CDR has no A-party column.
+    """
+    result = pd.DataFrame({'row': np.arange(len(df))}, index=df.index)
+    column = find_column(df, CDR_COLUMNS['msisdn'])
+    if column is not None:
+        result['msisdn'] = normalize_msisdn(df[column])
+    else:
+        result['msisdn'] = normalize_msisdn(pd.Series(target_number, index=df.index, dtype=object))
+    for field, normalizer in [('contact', normalize_msisdn), ('imei', normalize_imei), ('cgi', normalize_cgi)]:
+        column = find_column(df, CDR_COLUMNS[field])
+        result[field] = normalizer(df[column]) if column is not None else pd.Series(pd.NA, index=df.index, dtype=object)
+
+    result['start'] = parse_times(df['DateTime'])
+    duration = pd.to_numeric(df['Dur(s)'], errors='coerce').fillna(0) if 'Dur(s)' in df.columns else 0
+    result['end'] = result['start'] + pd.to_timedelta(duration, unit='s')
+    return result.reset_index(drop=True)
+
+
+class ReplyCorrelator:
+    """
+    Link IPDR sessions from ISP replies to CDR events
+
+    Both sides are normalised to a common schema (MSISDN, IMEI, CGI, time
+    interval). For each join key every CDR event is paired with all
+    sessions on its key that come within the window of it, using
+    interval_overlaps (sorted range search per session-length class,
+    expanded in bounded chunks). Nothing is cross-joined, so both sides can
+    hold millions of rows, and a few multi-day sessions do not blow up the
+    candidate set.
+
+    Per-key matches are merged into one row per (CDR event, session) pair
+    and ranked by the keys they share (KEY_WEIGHTS) and then by time gap.
+
+    With a cdr_sql.CDRSqlBackend the per-key interval join runs in DuckDB
+    instead (CDRSqlBackend.interval_join), over the events' and sessions'
+    keys and intervals stored as tables; the matches are the same.
+    """
+
+    def __init__(self, window_minutes: float = 5, keys: Sequence[str] = ('msisdn', 'contact', 'imei', 'cgi'),
+                 sql_backend=None):
+        self.window_seconds = int(window_minutes * 60)
+        self.keys = list(keys)
+        self.sql_backend = sql_backend
+        self.timings: Dict[str, float] = {}
+
+    def join_on(self, cdr: pd.DataFrame, ipdr: pd.DataFrame, key: str) -> pd.DataFrame:
+        """
+        Interval matches on one key: every session within the window of each CDR event
+
+        `key` names the CDR field; 'contact' (the CDR B party) is matched
+        against the reply MSISDN. Columns: cdr_row, ipdr_row, gap_seconds
+        """
+        columns = ['cdr_row', 'ipdr_row', 'gap_seconds']
+        reply_key = 'msisdn' if key == 'contact' else key
+        if key not in cdr.columns or reply_key not in ipdr.columns:
+            return pd.DataFrame(columns=columns)
+
+        nat = np.iinfo(np.int64).min
+        # Integer key codes shared by both sides (NA -> -1)
+        codes, _ = pd.factorize(pd.concat([cdr[key], ipdr[reply_key]], ignore_index=True))
+        c_code, i_code = codes[:len(cdr)], codes[len(cdr):]
+        c_start, c_end = _epoch_seconds(cdr['start']), _epoch_seconds(cdr['end'])
+        i_start, i_end = _epoch_seconds(ipdr['start']), _epoch_seconds(ipdr['end'])
+
+        events = np.flatnonzero((c_code >= 0) & (c_start != nat))
+        sessions = np.flatnonzero((i_code >= 0) & (i_start != nat))
+        if len(events) == 0 or len(sessions) == 0:
+            return pd.DataFrame(columns=columns)
+
+        e_start = c_start[events]
+        e_end = np.maximum(c_end[events], e_start)
+        s_start = i_start[sessions]
+        s_end = np.maximum(i_end[sessions], s_start)
+        if self.sql_backend is not None:
+            pairs = self.sql_backend.interval_join(
+                pd.DataFrame({'row': np.arange(len(events)), 'code': c_code[events], 'start': e_start, 'end': e_end}),
+                pd.DataFrame({'row': np.arange(len(sessions)), 'code': i_code[sessions], 'start': s_start, 'end': s_end}),
+                self.window_seconds,
+            )
+            event_pos = pairs['event_row'].to_numpy(dtype=np.int64)
+            session_pos = pairs['session_row'].to_numpy(dtype=np.int64)
+        else:
+            # Sessions overlapping the event widened by the window on both sides
+            event_pos, session_pos = interval_overlaps(
+                c_code[events], e_start - self.window_seconds, e_end + self.window_seconds,
+                i_code[sessions], s_start, s_end,
+            )
+
+        gap = np.maximum.reduce([np.zeros(len(event_pos), dtype=np.int64),
+                                 s_start[session_pos] - e_end[event_pos],
+                                 e_start[event_pos] - s_end[session_pos]])
+        return pd.DataFrame({
+            'cdr_row': cdr['row'].to_numpy()[events[event_pos]],
+            'ipdr_row': ipdr['row'].to_numpy()[sessions[session_pos]],
+            'gap_seconds': gap,
+        })
+
+    def correlate(self, cdr_df: pd.DataFrame, hits_df: pd.DataFrame,
+                  target_number: Optional[str] = None) -> pd.DataFrame:
+        """
+        Ranked CDR event <-> IPDR session matches
+
+        Columns: rank, score, matched_on, gap_seconds, cdr_time, cdr_end,
+        session_start, session_end, msisdn, contact, imei, cgi, ip,
+        source_file, cdr_row, ipdr_row (rows are positions in the inputs)
+        """
+        started = time.perf_counter()
+        cdr = normalize_cdr(cdr_df, target_number)
+        ipdr = normalize_ipdr(hits_df)
+        self.timings = {'normalize': time.perf_counter() - started}
+
+        started = time.perf_counter()
+        # One bit per matched key (a key yields each (CDR event, session) pair
+        # at most once), so the keys a pair shares add up to a bitmask
+        parts: List[pd.DataFrame] = []
+        bits: Dict[str, int] = {}
+        for key in self.keys:
+            part = self.join_on(cdr, ipdr, key)
+            if not part.empty:
+                bits[key] = 1 << len(bits)
+                parts.append(part.assign(bit=bits[key], weight=KEY_WEIGHTS.get(key, 1.0)))
+        self.timings['join'] = time.perf_counter() - started
+
+        columns = ['rank', 'score', 'matched_on', 'gap_seconds', 'cdr_time', 'cdr_end', 'session_start',
+                   'session_end', 'msisdn', 'contact', 'imei', 'cgi', 'ip', 'source_file', 'cdr_row', 'ipdr_row']
+        if not parts:
+            return pd.DataFrame(columns=columns)
+
+        started = time.perf_counter()
+        matches = pd.concat(parts, ignore_index=True)
+        pairs = matches.groupby(['cdr_row', 'ipdr_row'], sort=False).agg(
+            weight=('weight', 'sum'),
+            gap_seconds=('gap_seconds', 'min'),
+            bits=('bit', 'sum'),
+        ).reset_index()
+        labels = np.array(['+'.join(key for key, bit in bits.items() if mask & bit)
+                           for mask in range(1 << len(bits))], dtype=object)
+        pairs['matched_on'] = labels[pairs['bits'].to_numpy()]
+        pairs['score'] = (pairs['weight'] - pairs['gap_seconds'] / (self.window_seconds + 1)).round(3)
+        pairs = pairs.sort_values(['score', 'cdr_row'], ascending=[False, True], kind='stable').reset_index(drop=True)
+
+        cdr_rows = pairs['cdr_row'].to_numpy()
+        ipdr_rows = pairs['ipdr_row'].to_numpy()
+        result = pd.DataFrame({
+            'rank': np.arange(1, len(pairs) + 1),
+            'score': pairs['score'].to_numpy(),
+            'matched_on': pairs['matched_on'].to_numpy(),
+            'gap_seconds': pairs['gap_seconds'].to_numpy(),
+            'cdr_time': cdr['start'].array.take(cdr_rows),
+            'cdr_end': cdr['end'].array.take(cdr_rows),
+            'session_start': ipdr['start'].array.take(ipdr_rows),
+            'session_end': ipdr['end'].array.take(ipdr_rows),
+            'msisdn': ipdr['msisdn'].array.take(ipdr_rows),
+            'contact': cdr['contact'].array.take(cdr_rows),
+            'imei': ipdr['imei'].array.take(ipdr_rows),
+            'cgi': ipdr['cgi'].array.take(ipdr_rows),
+            'ip': ipdr['ip'].array.take(ipdr_rows),
+            'source_file': ipdr['source_file'].array.take(ipdr_rows) if 'source_file' in ipdr.columns else None,
+            'cdr_row': cdr_rows,
+            'ipdr_row': ipdr_rows,
+        }, columns=columns)
+        self.timings['rank'] = time.perf_counter() - started
+        logger.info(f"Correlated {len(cdr):,} CDR events with {len(ipdr):,} IPDR sessions: "
+                    f"{len(result):,} matches in {sum(self.timings.values()):.2f}s")
+        return result
@@ -0,0 +1,253 @@
+"""
+Reply Grid Module
+Windowed, disk-backed data source for browsing large ISP reply hits
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows parsed for an evidence file preview
+PREVIEW_ROWS = 1000
+
+# Sort orders / filter results kept per store (each is one index array over the reply)
+CACHE_ENTRIES = 4
+
+# Header markers of Airtel IPDR CSVs (old DSL format and new MSISDN format)
+AIRTEL_HEADER_MARKERS = ("DSL_User_ID", "MSISDN_userID")
+
+
+class ReplyStore:
+    """
+    Reply hits stored once as an Arrow IPC file and read through a memory map
+
+    Analysis writes the hits DataFrame to disk and drops it; the session
+    keeps only this handle. Reading a row window takes just those rows out
+    of the mapped file, so the pages of a multi-million-row reply stay in
+    the OS page cache instead of the Python heap. Sort orders and filter
+    results are computed with Arrow kernels on the needed column only and
+    kept in a small per-store LRU, so paging through a sorted / filtered
+    grid is a slice of a cached index array.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._table: Optional[pa.Table] = None
+        self._orders: "OrderedDict[Tuple[str, bool], np.ndarray]" = OrderedDict()
+        self._filters: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._distinct: Dict[Tuple[str, ...], pd.DataFrame] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, directory: str, name: str) -> 'ReplyStore':
+        """
+        Write `df` to a new file in `directory` and return a store over it
+
+        Nothing else in `directory` is touched; callers give each session its
+        own directory and remove their previous store with `delete()`.
+        """
+        os.makedirs(directory, exist_ok=True)
+        # Reply CSVs mix numbers and text in one column; store object columns as strings
+        text = {c: 'string' for c in df.columns if df[c].dtype == object}
+        table = pa.Table.from_pandas(df.astype(text) if text else df, preserve_index=False)
+        path = os.path.join(directory, f"{name}_{time.time_ns()}.arrow")
+        with pa.OSFile(path, 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=64 * 1024)
+        logger.info(f"Stored {len(df):,} reply rows in {path}")
+        return cls(path)
+
+    def delete(self):
+        """Drop the mapped table and remove the file (left in place if still open elsewhere)"""
+        self._table = None
+        self._orders.clear()
+        self._filters.clear()
+        self._distinct.clear()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    @property
+    def table(self) -> pa.Table:
+        if self._table is None:
+            self._table = ipc.open_file(pa.memory_map(self.path, 'r')).read_all()
+        return self._table
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def columns(self) -> List[str]:
+        return self.table.column_names
+
+    def frame(self, columns: Optional[List[str]] = None, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Columns (default all) of the given row positions (default all) as a DataFrame"""
+        table = self.table if columns is None else self.table.select([c for c in columns if c in self.columns])
+        if rows is not None:
+            table = table.take(pa.array(rows, type=pa.int64()))
+        return table.to_pandas()
+
+    def distinct(self, columns: List[str]) -> pd.DataFrame:
+        """Unique combinations of `columns`, in order of first appearance (grouped once per store)"""
+        key = tuple(columns)
+        if key not in self._distinct:
+            # Group order depends on the Arrow build and string type; sort on each group's first row
+            table = self.table.select(list(columns))
+            table = table.append_column('_row', pa.array(np.arange(table.num_rows, dtype=np.int64)))
+            groups = table.group_by(list(columns)).aggregate([('_row', 'min')]).sort_by('_row_min')
+            self._distinct[key] = groups.select(list(columns)).to_pandas()
+        return self._distinct[key]
+
+    @staticmethod
+    def _cached(cache: OrderedDict, key: Tuple, compute) -> np.ndarray:
+        """`cache[key]`, computing it on a miss and keeping only the last CACHE_ENTRIES keys"""
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = cache[key] = compute()
+        while len(cache) > CACHE_ENTRIES:
+            cache.popitem(last=False)
+        return value
+
+    def sort_order(self, column: str, ascending: bool = True) -> np.ndarray:
+        """Row positions sorted by `column` (missing values last)"""
+        def compute():
+            order = pc.array_sort_indices(self.table[column], order='ascending' if ascending else 'descending',
+                                          null_placement='at_end')
+            return order.to_numpy()
+        return self._cached(self._orders, (column, ascending), compute)
+
+    def filter_rows(self, column: str, text: str) -> np.ndarray:
+        """Sorted row positions whose `column` contains `text` (case-insensitive)"""
+        def compute():
+            values = pc.cast(self.table[column], pa.string())
+            matched = pc.match_substring(values, text, ignore_case=True)
+            return np.flatnonzero(matched.fill_null(False).to_numpy(zero_copy_only=False))
+        return self._cached(self._filters, (column, text), compute)
+
+    def view(self, sort_by: Optional[str] = None, ascending: bool = True,
+             filter_column: Optional[str] = None, text: str = "",
+             columns: Optional[List[str]] = None) -> 'GridView':
+        """Rows matching the filter, in the requested order (windows read `columns`, default all)"""
+        rows = None
+        if sort_by:
+            rows = self.sort_order(sort_by, ascending)
+        if filter_column and text:
+            selected = self.filter_rows(filter_column, text)
+            if rows is None:
+                rows = selected
+            else:
+                keep = np.zeros(len(self), dtype=bool)
+                keep[selected] = True
+                rows = rows[keep[rows]]
+        return GridView(self, rows, columns)
+
+
+class GridView:
+    """A sorted / filtered row order over a ReplyStore, read one window at a time"""
+
+    def __init__(self, store: ReplyStore, rows: Optional[np.ndarray] = None, columns: Optional[List[str]] = None):
+        self.store = store
+        self.rows = rows
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.store) if self.rows is None else len(self.rows)
+
+    def window(self, start: int, stop: int) -> pd.DataFrame:
+        """Rows [start, stop) of the view, indexed by their position in the reply"""
+        stop = min(stop, len(self))
+        rows = np.arange(start, stop) if self.rows is None else self.rows[start:stop]
+        page = self.store.frame(self.columns, rows)
+        page.index = rows
+        return page
+
+
+def _read_preview(path: str, kind: str, max_rows: int) -> Tuple[Optional[pd.DataFrame], str]:
+    if kind != 'airtel':
+        # Read all columns as strings to prevent Arrow serialization errors
+        return pd.read_csv(path, on_bad_lines='skip', encoding='latin1', low_memory=False,
+                           dtype=str, nrows=max_rows), ""
+
+    # Airtel files carry a preamble; find the header line without reading the whole file
+    head = []
+    header_idx = -1
+    with open(path, "r", encoding="latin1") as f:
+        for i, line in enumerate(f):
+            if len(head) < 20:
+                head.append(line)
+            if any(marker in line for marker in AIRTEL_HEADER_MARKERS):
+                header_idx = i
+                break
+    if header_idx == -1:
+        return None, "".join(head)
+
+    options = dict(skiprows=header_idx, header=0, encoding='latin1', quotechar="'",
+                   skipinitialspace=True, engine='python', nrows=max_rows)
+    try:
+        sub_df = pd.read_csv(path, on_bad_lines='skip', **options)
+    except Exception:
+        sub_df = pd.read_csv(path, **options)
+
+    # Filter footer for both formats
+    if 'DSL_User_ID' in sub_df.columns:
+        sub_df = sub_df[~sub_df['DSL_User_ID'].astype(str).str.contains("System generated", case=False, na=False)]
+        sub_df = sub_df[~sub_df['MSISDN_userID'].astype(str).str.contains("System generated|This is System", case=False, na=False)]
+    return sub_df, ""
+
+
+def _count_rows(path: str, kind: str) -> int:
+    """Data rows of an evidence CSV: non-blank lines after the header, without the Airtel footer"""
+    markers = [marker.encode() for marker in AIRTEL_HEADER_MARKERS]
+    header_found = False
+    rows = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if not header_found:
+                header_found = kind != 'airtel' or any(marker in line for marker in markers)
+                continue
+            if kind == 'airtel' and (b"system generated" in line.lower() or b"this is system" in line.lower()):
+                continue
+            rows += 1
+    return rows
+
+
+@lru_cache(maxsize=32)
+def _cached_row_count(path: str, kind: str, size: int, mtime_ns: int) -> int:
+    return _count_rows(path, kind)
+
+
+@lru_cache(maxsize=32)
+def _cached_preview(path: str, kind: str, max_rows: int, size: int, mtime_ns: int):
+    return _read_preview(path, kind, max_rows)
+
+
+def evidence_preview(path: str, kind: str = 'jio', max_rows: int = PREVIEW_ROWS) -> Tuple[Optional[pd.DataFrame], str]:
+    """
+    First rows of a raw evidence CSV, parsed once per file version
+
+    kind='airtel' locates the Airtel header line and drops the
+    "System generated" footer; anything else is read as a plain CSV.
+    Returns (DataFrame, "") or (None, first lines) when no header is found;
+    evidence_row_count gives the file's full row count.
+    """
+    stat = os.stat(path)
+    return _cached_preview(os.path.abspath(path), kind, max_rows, stat.st_size, stat.st_mtime_ns)
+
+
+def evidence_row_count(path: str, kind: str = 'jio') -> int:
+    """Data rows in a raw evidence CSV (as evidence_preview reads it), counted once per file version"""
+    stat = os.stat(path)
+    return _cached_row_count(os.path.abspath(path), kind, stat.st_size, stat.st_mtime_ns)
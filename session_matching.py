@@ -0,0 +1,253 @@
+"""
+Session Matching Module
+Match requested (IP, time +/- window) lookups against ISP reply sessions
+"""
+
+import datetime
+import ipaddress
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from reply_correlation import (IPDR_COLUMNS, find_column, interval_overlaps, normalize_imei, normalize_msisdn,
+                               parse_times)
+
+logger = logging.getLogger(__name__)
+
+# Reply columns carrying the public IP of a session (a row may have both families)
+IP_COLUMNS = ['Source_Public_IPv4', 'Source_Public_IPv6', 'Source IP Address', 'Public IP Address', 'IP Address']
+
+
+def ip_key(ip: str, ipv6_prefix: int = 64) -> Optional[str]:
+    """
+    Canonical lookup key for an IP address
+
+    IPv4 addresses are compared exactly. IPv6 addresses are compared by
+    network prefix (default /64), because operators allocate a prefix per
+    subscriber and replies often print it with the host bits zeroed.
+    """
+    text = str(ip).strip().strip("'\"").strip()
+    if not text or text.lower() in ('nan', 'none'):
+        return None
+    try:
+        address = ipaddress.ip_address(text.split('/')[0])
+    except ValueError:
+        return None
+    if address.version == 6:
+        network = ipaddress.ip_network(f"{address}/{ipv6_prefix}", strict=False)
+        return f"{network.network_address}/{ipv6_prefix}"
+    return str(address)
+
+
+def ip_keys(values: pd.Series, ipv6_prefix: int = 64) -> np.ndarray:
+    """ip_key over a column, evaluated once per distinct value"""
+    codes, uniques = pd.factorize(values)
+    keys = np.array([ip_key(v, ipv6_prefix) for v in uniques] + [None], dtype=object)
+    return keys[codes]
+
+
+def build_requests(entries: Iterable[Dict], window_minutes: float = 5) -> pd.DataFrame:
+    """
+    Requested lookups from Generator entries ({'ip', 'datetime'} or raw {'ip', 'timestamp'})
+
+    Raw Google timestamps ("YYYY-MM-DD HH:MM:SS Z", UTC) are converted to
+    IST the same way ISPProcessor.process_data does.
+
+    Columns: request_id, ip, isp, time, window_start, window_end
+    """
+    rows = []
+    for entry in entries:
+        when = entry.get('datetime')
+        if when is None:
+            try:
+                when = datetime.datetime.strptime(str(entry.get('timestamp', '')).replace(" Z", ""),
+                                                  "%Y-%m-%d %H:%M:%S") + datetime.timedelta(hours=5, minutes=30)
+            except ValueError:
+                when = None
+        rows.append({'ip': entry.get('ip'), 'isp': entry.get('isp'), 'time': when})
+
+    requests = pd.DataFrame(rows, columns=['ip', 'isp', 'time'])
+    requests['time'] = pd.to_datetime(requests['time'], errors='coerce')
+    window = pd.Timedelta(minutes=window_minutes)
+    requests['window_start'] = requests['time'] - window
+    requests['window_end'] = requests['time'] + window
+    requests.insert(0, 'request_id', np.arange(len(requests)))
+    return requests
+
+
+def requests_from_grouped(grouped_data: Dict[str, List[Dict]], isp: Optional[str] = None,
+                          window_minutes: float = 5) -> pd.DataFrame:
+    """Requests from ISPProcessor.process_data output, optionally for one ISP"""
+    entries = [dict(entry, isp=name) for name, items in grouped_data.items()
+               if isp is None or name == isp for entry in items]
+    return build_requests(entries, window_minutes)
+
+
+def session_columns(columns: Iterable[str]) -> List[str]:
+    """The reply columns sessions_from_hits reads, out of `columns`"""
+    probe = pd.DataFrame(columns=list(columns))
+    names = [find_column(probe, IPDR_COLUMNS[field]) for field in ('start', 'end', 'msisdn', 'imei')]
+    names += [find_column(probe, [name]) for name in IP_COLUMNS + ['Source_File']]
+    return list(dict.fromkeys(name for name in names if name is not None))
+
+
+def sessions_from_hits(hits_df: pd.DataFrame, ipv6_prefix: int = 64) -> pd.DataFrame:
+    """
+    Reply sessions keyed by IP: hit_row, ip_key, start, end, msisdn, imei, source_file
+
+    A row with both an IPv4 and an IPv6 address yields one session per
+    address. Sessions without an end are instants at their start; rows
+    without a session start fall back to the event time.
+    """
+    columns = ['hit_row', 'ip_key', 'start', 'end', 'msisdn', 'imei', 'source_file']
+    if hits_df is None or hits_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    start_column = find_column(hits_df, IPDR_COLUMNS['start'])
+    end_column = find_column(hits_df, IPDR_COLUMNS['end'])
+    start = parse_times(hits_df[start_column]) if start_column else pd.Series(pd.NaT, index=hits_df.index)
+    end = parse_times(hits_df[end_column]) if end_column else start
+    end = end.where(end >= start, start)
+    msisdn_column = find_column(hits_df, IPDR_COLUMNS['msisdn'])
+    imei_column = find_column(hits_df, IPDR_COLUMNS['imei'])
+
+    base = pd.DataFrame({
+        'hit_row': np.arange(len(hits_df)),
+        'start': start.to_numpy(),
+        'end': end.to_numpy(),
+        'msisdn': normalize_msisdn(hits_df[msisdn_column]).to_numpy() if msisdn_column else None,
+        'imei': normalize_imei(hits_df[imei_column]).to_numpy() if imei_column else None,
+        'source_file': hits_df['Source_File'].to_numpy() if 'Source_File' in hits_df.columns else None,
+    })
+    parts = []
+    for name in IP_COLUMNS:
+        column = find_column(hits_df, [name])
+        if column is not None:
+            parts.append(base.assign(ip_key=ip_keys(hits_df[column], ipv6_prefix)))
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    sessions = pd.concat(parts, ignore_index=True)
+    sessions = sessions[sessions['ip_key'].notna() & sessions['start'].notna()]
+    return sessions[columns].reset_index(drop=True)
+
+
+class SessionMatcher:
+    """
+    Which requested (IP, time window) lookups hit which reply sessions
+
+    Request windows and sessions are joined on the IP key with
+    reply_correlation.interval_overlaps: binary searches over sessions
+    sorted by (IP key, start), per session-length class, with the candidate
+    ranges expanded in bounded chunks. Every overlapping session is reported
+    (a shared CGNAT IPv4 can map to several subscribers), with no
+    per-request Python loop.
+    """
+
+    def __init__(self, requests: pd.DataFrame, sessions: pd.DataFrame, ipv6_prefix: int = 64):
+        self.requests = requests.reset_index(drop=True)
+        self.sessions = sessions.reset_index(drop=True)
+        self.ipv6_prefix = ipv6_prefix
+        self.timings: Dict[str, float] = {}
+        self._matches: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_reply(cls, requests: pd.DataFrame, hits_df: pd.DataFrame, ipv6_prefix: int = 64) -> 'SessionMatcher':
+        return cls(requests, sessions_from_hits(hits_df, ipv6_prefix), ipv6_prefix)
+
+    def matches(self) -> pd.DataFrame:
+        """
+        Every (request, session) pair whose intervals overlap
+
+        Columns: request_id, ip, request_time, session_start, session_end,
+        msisdn, imei, source_file, hit_row
+        """
+        if self._matches is not None:
+            return self._matches
+        started = time.perf_counter()
+        columns = ['request_id', 'ip', 'request_time', 'session_start', 'session_end',
+                   'msisdn', 'imei', 'source_file', 'hit_row']
+        requests, sessions = self.requests, self.sessions
+        if requests.empty or sessions.empty:
+            self._matches = pd.DataFrame(columns=columns)
+            return self._matches
+
+        # Shared integer codes for the IP keys of both sides
+        request_keys = ip_keys(requests['ip'], self.ipv6_prefix)
+        codes, _ = pd.factorize(np.concatenate([sessions['ip_key'].to_numpy(dtype=object), request_keys]))
+        session_codes, request_codes = codes[:len(sessions)], codes[len(sessions):]
+
+        s_start = sessions['start'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        s_end = sessions['end'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+        valid = (request_codes >= 0) & requests['time'].notna().to_numpy()
+        r_index = np.flatnonzero(valid)
+        ws = requests['window_start'].to_numpy(dtype='datetime64[s]').astype(np.int64)[valid]
+        we = requests['window_end'].to_numpy(dtype='datetime64[s]').astype(np.int64)[valid]
+        request_pos, session_pos = interval_overlaps(request_codes[valid], ws, we, session_codes, s_start, s_end)
+
+        request_rows = r_index[request_pos]
+        self._matches = pd.DataFrame({
+            'request_id': requests['request_id'].to_numpy()[request_rows],
+            'ip': requests['ip'].to_numpy()[request_rows],
+            'request_time': requests['time'].to_numpy()[request_rows],
+            'session_start': sessions['start'].to_numpy()[session_pos],
+            'session_end': sessions['end'].to_numpy()[session_pos],
+            'msisdn': sessions['msisdn'].to_numpy()[session_pos],
+            'imei': sessions['imei'].to_numpy()[session_pos],
+            'source_file': sessions['source_file'].to_numpy()[session_pos],
+            'hit_row': sessions['hit_row'].to_numpy()[session_pos],
+        }, columns=columns).drop_duplicates(['request_id', 'hit_row']).reset_index(drop=True)
+        self.timings['match'] = time.perf_counter() - started
+        logger.info(f"Matched {len(requests):,} requests against {len(sessions):,} sessions: "
+                    f"{self._matches['request_id'].nunique():,} hit in {self.timings['match']:.3f}s")
+        return self._matches
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per request: hit, sessions, subscribers (MSISDNs), imeis
+
+        Columns: request_id, ip, time, hit, sessions, subscribers, imeis
+        """
+        matches = self.matches()
+        result = self.requests[['request_id', 'ip', 'time']].copy()
+        if matches.empty:
+            result['hit'] = False
+            result['sessions'] = 0
+            result['subscribers'] = ''
+            result['imeis'] = ''
+            return result
+
+        def joined(values):
+            return ', '.join(sorted({v for v in values if isinstance(v, str)}))
+
+        grouped = matches.groupby('request_id').agg(
+            sessions=('hit_row', 'size'),
+            subscribers=('msisdn', joined),
+            imeis=('imei', joined),
+        )
+        result = result.join(grouped, on='request_id')
+        result['hit'] = result['sessions'].notna()
+        result['sessions'] = result['sessions'].fillna(0).astype(int)
+        result['subscribers'] = result['subscribers'].fillna('')
+        result['imeis'] = result['imeis'].fillna('')
+        return result[['request_id', 'ip', 'time', 'hit', 'sessions', 'subscribers', 'imeis']]
+
+    def hit_matrix(self) -> pd.DataFrame:
+        """
+        Request x subscriber matrix of overlapping session counts
+
+        Rows are every request (misses are all-zero rows), columns the
+        MSISDNs seen in matching sessions.
+        """
+        matches = self.matches()
+        index = pd.MultiIndex.from_frame(self.requests[['request_id', 'ip', 'time']])
+        if matches.empty:
+            return pd.DataFrame(index=index)
+        subscribers = matches['msisdn'].fillna('(no MSISDN)')
+        matrix = pd.crosstab(matches['request_id'], subscribers)
+        matrix = matrix.reindex(self.requests['request_id'], fill_value=0)
+        matrix.index = index
+        matrix.columns.name = 'subscriber'
+        return matrix
@@ -0,0 +1,215 @@
+"""
+Spatial Clustering Module
+Radius-based (DBSCAN-like) clustering of tower fixes over a KD-tree index
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Optional
+import logging
+
+from lazy_imports import lazy_from, lazy_import
+
+# scipy is loaded when the first clustering runs
+sparse = lazy_import('scipy.sparse')
+connected_components = lazy_from('scipy.sparse.csgraph', 'connected_components')
+cKDTree = lazy_from('scipy.spatial', 'cKDTree')
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371
+
+
+def project_km(lat, lon, ref_lat: Optional[float] = None) -> np.ndarray:
+    """
+    Equirectangular projection to planar kilometres around `ref_lat`
+
+    Accurate to well under 1% over the few hundred kilometres a CDR spans,
+    which is plenty for radius queries of a few hundred metres.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    if ref_lat is None:
+        ref_lat = float(np.mean(lat)) if len(lat) else 0.0
+    x = np.radians(lon) * np.cos(np.radians(ref_lat)) * EARTH_RADIUS_KM
+    y = np.radians(lat) * EARTH_RADIUS_KM
+    return np.column_stack([x, y])
+
+
+def coordinate_codes(lat: np.ndarray, lon: np.ndarray):
+    """
+    Integer code per distinct (lat, lon) pair, via hashing rather than a sort
+
+    Returns:
+        (codes, coords) where coords[codes] reproduces the input pairs
+    """
+    lat_codes, lat_values = pd.factorize(lat)
+    lon_codes, lon_values = pd.factorize(lon)
+    codes, packed = pd.factorize(lat_codes.astype(np.int64) * len(lon_values) + lon_codes)
+    coords = np.column_stack([
+        np.asarray(lat_values, dtype=np.float64)[packed // len(lon_values)],
+        np.asarray(lon_values, dtype=np.float64)[packed % len(lon_values)],
+    ])
+    return codes, coords
+
+
+class SpatialClusterer:
+    """
+    DBSCAN-style clustering of (lat, lon) fixes with a fixed radius
+
+    Fixes are first collapsed to unique coordinates (one per tower), weighted
+    by how many fixes hit them, and indexed in a KD-tree. A coordinate is a
+    core point when the fixes within `radius_km` of it (itself included)
+    number at least `min_points`; cores within the radius of each other are
+    joined via connected components, border points join their nearest core
+    and the rest are noise (label -1). With the default min_points=1 every
+    tower is a core and this is single-linkage clustering at `radius_km`.
+
+    Building the index and all radius queries is O(u log u) in the number of
+    unique coordinates u, which is far smaller than the number of fixes.
+    """
+
+    def __init__(self, radius_km: float = 0.5, min_points: int = 1):
+        self.radius_km = radius_km
+        self.min_points = min_points
+
+    def fit_predict(self, lat, lon) -> np.ndarray:
+        """
+        Cluster label for every fix (-1 for noise or missing coordinates)
+
+        Labels are numbered by cluster size, so label 0 is the busiest place.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        labels = np.full(len(lat), -1, dtype=np.int64)
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        if not valid.any():
+            return labels
+
+        inverse, coords = coordinate_codes(lat[valid], lon[valid])
+        weights = np.bincount(inverse, minlength=len(coords)).astype(np.float64)
+
+        unique_labels = self._cluster_unique(coords, weights)
+
+        # Renumber by total fixes, busiest first
+        clustered = unique_labels >= 0
+        if clustered.any():
+            sizes = np.bincount(unique_labels[clustered], weights=weights[clustered])
+            rank = np.empty(len(sizes), dtype=np.int64)
+            rank[np.argsort(-sizes, kind='stable')] = np.arange(len(sizes))
+            unique_labels = np.where(clustered, rank[np.maximum(unique_labels, 0)], -1)
+
+        labels[valid] = unique_labels[inverse]
+        return labels
+
+    def _cluster_unique(self, coords: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Labels for weighted unique coordinates"""
+        n = len(coords)
+        xy = project_km(coords[:, 0], coords[:, 1])
+        pairs = cKDTree(xy).query_pairs(self.radius_km, output_type='ndarray')
+        i, j = (pairs[:, 0], pairs[:, 1]) if len(pairs) else (np.empty(0, np.int64), np.empty(0, np.int64))
+
+        # Fixes within the radius of each coordinate, including its own
+        density = weights + np.bincount(i, weights=weights[j], minlength=n) + np.bincount(j, weights=weights[i], minlength=n)
+        core = density >= self.min_points
+
+        # Core-core links form the clusters
+        link = core[i] & core[j]
+        graph = sparse.coo_matrix((np.ones(int(link.sum())), (i[link], j[link])), shape=(n, n))
+        _, components = connected_components(graph, directed=False)
+        labels = np.where(core, components, -1)
+
+        # Border points take the label of their nearest core neighbour
+        border_i = np.concatenate([i[core[j] & ~core[i]], j[core[i] & ~core[j]]])
+        border_core = np.concatenate([j[core[j] & ~core[i]], i[core[i] & ~core[j]]])
+        if len(border_i):
+            distance = np.linalg.norm(xy[border_i] - xy[border_core], axis=1)
+            order = np.lexsort((distance, border_i))
+            border_i, border_core = border_i[order], border_core[order]
+            first = np.concatenate([[True], border_i[1:] != border_i[:-1]])
+            labels[border_i[first]] = components[border_core[first]]
+
+        # Compact the component ids actually used
+        used = labels >= 0
+        if used.any():
+            _, compact = np.unique(labels[used], return_inverse=True)
+            labels[used] = compact.ravel()
+        return labels
+
+    def summarize(self, lat, lon, times, labels: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        One row per cluster, busiest first
+
+        Visits are runs of consecutive (time-ordered) fixes in the same
+        cluster; dwell is the time from the first to the last fix of each
+        visit, summed per cluster. Fixes without a position or a time are
+        left out.
+
+        Columns: cluster, lat, lon, count, percentage, towers, visits,
+        dwell_minutes, days, first_seen, last_seen, radius_km
+        """
+        columns = ['cluster', 'lat', 'lon', 'count', 'percentage', 'towers', 'visits',
+                   'dwell_minutes', 'days', 'first_seen', 'last_seen', 'radius_km']
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        times = np.asarray(times, dtype='datetime64[ns]')
+        valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnat(times))
+        lat, lon, times = lat[valid], lon[valid], times[valid]
+        if labels is None:
+            labels = self.fit_predict(lat, lon)
+        else:
+            labels = np.asarray(labels)[valid]
+
+        order = np.argsort(times, kind='stable')
+        lat, lon, times, labels = lat[order], lon[order], times[order], labels[order]
+        keep = labels >= 0
+        total = int(keep.sum())
+        if total == 0:
+            return pd.DataFrame(columns=columns)
+
+        # Visits: runs of the same label in time order (noise breaks a run)
+        run_start = np.concatenate([[True], labels[1:] != labels[:-1]])
+        run_label = labels[run_start]
+        run_first = np.flatnonzero(run_start)
+        run_last = np.concatenate([run_first[1:], [len(labels)]]) - 1
+        run_dwell = (times[run_last] - times[run_first]).astype('timedelta64[s]').astype(np.float64) / 60
+        in_cluster = run_label >= 0
+
+        n_clusters = int(labels.max()) + 1
+        lab, la, lo, ti = labels[keep], lat[keep], lon[keep], times[keep]
+        count = np.bincount(lab, minlength=n_clusters)
+        centroid_lat = np.bincount(lab, weights=la, minlength=n_clusters) / np.maximum(count, 1)
+        centroid_lon = np.bincount(lab, weights=lo, minlength=n_clusters) / np.maximum(count, 1)
+        visits = np.bincount(run_label[in_cluster], minlength=n_clusters)
+        dwell = np.bincount(run_label[in_cluster], weights=run_dwell[in_cluster], minlength=n_clusters)
+
+        spread = project_km(la, lo) - project_km(centroid_lat[lab], centroid_lon[lab], ref_lat=float(np.mean(la)))
+        radius = np.zeros(n_clusters)
+        np.maximum.at(radius, lab, np.linalg.norm(spread, axis=1))
+
+        # Distinct towers and days per cluster from unique (cluster, key) rows
+        tower_codes, tower_coords = coordinate_codes(la, lo)
+        tower_keys = np.unique(lab * len(tower_coords) + tower_codes)
+        towers = np.bincount(tower_keys // len(tower_coords), minlength=n_clusters)
+        day_keys = np.unique(lab * 1_000_000 + ti.astype('datetime64[D]').astype(np.int64))
+        days = np.bincount(day_keys // 1_000_000, minlength=n_clusters)
+
+        grouped = pd.DataFrame({'cluster': lab, 'time': ti}).groupby('cluster')
+        first_seen = grouped['time'].min().reindex(range(n_clusters))
+        last_seen = grouped['time'].max().reindex(range(n_clusters))
+
+        summary = pd.DataFrame({
+            'cluster': np.arange(n_clusters),
+            'lat': centroid_lat,
+            'lon': centroid_lon,
+            'count': count,
+            'percentage': count / total * 100,
+            'towers': towers,
+            'visits': visits,
+            'dwell_minutes': dwell,
+            'days': days,
+            'first_seen': first_seen.to_numpy(),
+            'last_seen': last_seen.to_numpy(),
+            'radius_km': radius,
+        }, columns=columns)
+        return summary[summary['count'] > 0].sort_values('count', ascending=False, kind='mergesort').reset_index(drop=True)
@@ -0,0 +1,45 @@
+"""
+Synthetic CDR Fixture
+Frames shaped like CDRParser output, shared by the tests and benchmarks
+"""
+
+import numpy as np
+import pandas as pd
+
+from cdr_parser import CDRParser
+
+
+def make_synthetic_cdr(n_rows=5000, n_contacts=300, seed=0):
+    """Build a frame shaped like CDRParser output (Airtel flavour)"""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 60 * 86400, n_rows)
+    df = pd.DataFrame({'DateTime': pd.Timestamp('2025-01-01') + pd.to_timedelta(seconds, unit='s')})
+    df['Hour'] = df['DateTime'].dt.hour
+    df['DayOfWeek'] = df['DateTime'].dt.day_name()
+    df['Date_Only'] = df['DateTime'].dt.date
+    df['TimePeriod'] = df['Hour'].apply(CDRParser._classify_time_period)
+
+    # Zipf-like contact popularity so there is a clear "top contacts" list
+    contacts = np.array([f"98{i:08d}" for i in range(n_contacts)] + ['Unknown'])
+    weights = 1 / np.arange(1, len(contacts) + 1)
+    df['B_Party_Clean'] = contacts[rng.choice(len(contacts), n_rows, p=weights / weights.sum())]
+
+    call_types = np.array(['IN', 'OUT', 'SMT', 'SMO'])
+    df['Call Type'] = call_types[rng.integers(0, 4, n_rows)]
+    df['Call_Category'] = df['Call Type'].apply(CDRParser._classify_call_type)
+    df['Dur(s)'] = np.where(df['Call Type'].isin(['IN', 'OUT']), rng.integers(0, 600, n_rows), 0)
+
+    towers = rng.uniform([28.4, 76.9], [28.8, 77.3], (40, 2)).round(4)
+    fixes = towers[rng.integers(0, len(towers), n_rows)]
+    df['First_Lat'] = fixes[:, 0]
+    df['First_Long'] = fixes[:, 1]
+    df.loc[rng.random(n_rows) < 0.05, ['First_Lat', 'First_Long']] = np.nan
+
+    imeis = np.array(['350000000000011', '350000000000029', '350000000000037'])
+    df['IMEI'] = imeis[np.cumsum(rng.random(n_rows) < 0.002) % len(imeis)]
+
+    df['Is_Night'] = ((df['Hour'] >= 22) | (df['Hour'] < 6)).astype(int)
+    df['Is_Day'] = ((df['Hour'] >= 6) & (df['Hour'] < 18)).astype(int)
+    df['Is_Evening'] = ((df['Hour'] >= 18) & (df['Hour'] < 22)).astype(int)
+    df['Target No'] = '9999999999'
+    return df
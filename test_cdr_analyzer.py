@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""
+Test script for the CDR analysis engine
+Runs the analyzers against a synthetic parsed CDR
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cdr_analyzer import CDRAnalyzer
+from synthetic_cdr import make_synthetic_cdr
+
+
+def test_temporal_matches_direct_counts():
+    """Aggregate-derived temporal analysis agrees with direct pandas counts"""
+    df = make_synthetic_cdr()
+    temporal = CDRAnalyzer(df).get_temporal_analysis()
+
+    night = df[df['Is_Night'] == 1]
+    summary = temporal['night_day_summary']
+    assert summary['night_count'] == len(night)
+    assert summary['day_count'] == int(df['Is_Day'].sum())
+    assert summary['evening_count'] == int(df['Is_Evening'].sum())
+
+    expected_hours = df['Hour'].value_counts()
+    for hour in range(24):
+        assert temporal['hourly_distribution'][str(hour)] == int(expected_hours.get(hour, 0))
+
+    assert temporal['night_activity']['night_duration_total'] == int(night['Dur(s)'].sum())
+    assert temporal['night_activity']['night_call_types'] == night['Call_Category'].value_counts().to_dict()
+    assert temporal['night_activity']['late_night_00_03'] == int(df['Hour'].between(0, 2).sum())
+
+    top_night = night['B_Party_Clean'].value_counts()
+    for contact, count in temporal['night_activity']['top_night_contacts'].items():
+        assert top_night[contact] == count
+    print("✅ Temporal analysis matches direct counts")
+
+
+def test_contact_breakdown_matches_direct_counts():
+    """Per-contact IN/OUT/SMS counts come out of the shared contact table"""
+    df = make_synthetic_cdr(seed=1)
+    contact = CDRAnalyzer(df).get_contact_analysis()
+
+    assert contact['contact_frequency']['unique_contacts'] == df['B_Party_Clean'].nunique()
+    for number, breakdown in contact['contact_call_types'].items():
+        rows = df[df['B_Party_Clean'] == number]
+        assert breakdown['total'] == len(rows)
+        assert breakdown['incoming'] == int((rows['Call Type'] == 'IN').sum())
+        assert breakdown['outgoing'] == int((rows['Call Type'] == 'OUT').sum())
+        assert breakdown['sms'] == int(rows['Call Type'].str.contains('SM').sum())
+    print("✅ Contact breakdown matches direct counts")
+
+
+def test_results_are_memoized_and_invalidated():
+    """get_* results are cached until the frame changes"""
+    analyzer = CDRAnalyzer(make_synthetic_cdr(n_rows=500))
+
+    first = analyzer.get_temporal_analysis()
+    assert analyzer.get_temporal_analysis() is first
+
+    analyzer.df = make_synthetic_cdr(n_rows=800, seed=2)
+    second = analyzer.get_temporal_analysis()
+    assert second is not first
+    assert sum(second['hourly_distribution'].values()) == 800
+
+    # Value edits keep the frame's key: results refresh only after invalidate()
+    analyzer.df['Hour'] = 3
+    assert analyzer.get_temporal_analysis() is second
+    analyzer.invalidate()
+    assert analyzer.get_temporal_analysis()['hourly_distribution']['3'] == 800
+    print("✅ Memoization and invalidation work")
+
+
+def test_vectorized_helpers_match_legacy_loops():
+    """Vectorized new-contact/movement/IMEI helpers equal the old iterrows loops"""
+    from benchmark_cdr_analyzer import benchmark_cases
+
+    df = make_synthetic_cdr(n_rows=20_000, n_contacts=5000)
+    for name, legacy, vectorized in benchmark_cases(CDRAnalyzer(df)):
+        assert vectorized() == legacy(df), f"{name}: vectorized output differs from legacy loop"
+    print("✅ Vectorized helpers match legacy loops")
+
+
+def test_contact_index_slices_match_full_scans():
+    """ContactIndex drilldowns equal the old per-contact full-frame filters"""
+    df = make_synthetic_cdr(seed=3)
+    index = CDRAnalyzer(df).contact_index
+    calls_mask = df['Call_Category'].isin(['Incoming Call', 'Outgoing Call']).to_numpy()
+
+    for contact in index.top_contacts(5, mask=calls_mask):
+        expected = df[calls_mask & (df['B_Party_Clean'] == contact).to_numpy()]
+        rows = index.frame(contact, mask=calls_mask)
+        assert len(rows) == len(expected)
+        assert rows['DateTime'].is_monotonic_increasing
+        assert index.category_counts(contact, mask=calls_mask) == expected['Call_Category'].value_counts().to_dict()
+
+        hourly = expected.groupby('Hour').size()
+        assert index.hourly_profile(contact, mask=calls_mask).tolist() == [int(hourly.get(h, 0)) for h in range(24)]
+
+    assert index.count('not-a-number') == 0
+    assert len(index.rows('not-a-number')) == 0
+    print("✅ Contact index slices match full scans")
+
+
+def test_burst_detector_finds_injected_burst():
+    """A tight cluster of calls to one contact is the top-ranked burst"""
+    df = make_synthetic_cdr(seed=4)
+    burst = df.head(40).copy()
+    burst['DateTime'] = pd.Timestamp('2025-01-20 03:10') + pd.to_timedelta(np.arange(40) * 10, unit='s')
+    burst['B_Party_Clean'] = '9800000020'  # a contact with its own history
+    df = pd.concat([df, burst], ignore_index=True)
+
+    bursts = CDRAnalyzer(df).get_burst_analysis(windows=(5, 15))
+    top = bursts['intervals'][0]
+    assert top['start'] <= '2025-01-20 03:10:00' < top['end']
+    assert next(iter(top['contacts'])) == '9800000020'
+    assert bursts['contact_bursts'][0]['contact'] == '9800000020'
+    print("✅ Burst detector finds injected burst")
+
+
+def test_burst_detector_ignores_outlier_dates():
+    """Malformed 1970/2099 dates neither allocate the whole span nor change the bursts"""
+    from burst_detector import BurstDetector
+    df = make_synthetic_cdr(seed=4)
+    burst = df.head(40).copy()
+    burst['DateTime'] = pd.Timestamp('2025-01-20 03:10') + pd.to_timedelta(np.arange(40) * 10, unit='s')
+    df = pd.concat([df, burst], ignore_index=True)
+    outliers = df.head(2).copy()
+    outliers['DateTime'] = [pd.Timestamp('1970-01-01 00:00'), pd.Timestamp('2099-12-31 23:59')]
+
+    detector = BurstDetector(pd.concat([df, outliers], ignore_index=True))
+    assert detector.n_slots > 50_000_000
+    starts, ends, counts = detector.window_segments(15)
+    assert len(starts) <= 2 * len(detector.slot_ids) + 1
+    assert (ends - starts).sum() == detector.n_slots
+
+    # Brute-force rolling counts at every run start agree with the runs
+    width = detector._window_slots(15)
+    lo = np.searchsorted(detector.slots, starts)
+    hi = np.searchsorted(detector.slots, starts + width)
+    assert np.array_equal(hi - lo, counts)
+
+    top = detector.detect_intervals(15)[0]
+    assert top['start'] <= '2025-01-20 03:10:00' < top['end']
+    print("✅ Burst detector ignores outlier dates")
+
+
+def test_correlation_engine_matches_brute_force():
+    """Sparse common contacts and sweep-line co-locations equal naive joins"""
+    from correlation_engine import CorrelationEngine
+
+    engine = CorrelationEngine()
+    frames = {}
+    for seed in range(4):
+        df = make_synthetic_cdr(n_rows=2000, seed=seed)
+        rng = np.random.default_rng(seed)
+        df['First CGI'] = [f"404-10-1-{c}" for c in rng.integers(0, 50, len(df))]
+        frames[f"T{seed}"] = df
+        engine.add_cdr(f"T{seed}", df)
+
+    common = engine.common_contacts().set_index(['target_a', 'target_b'])
+    for (a, b), row in common.iterrows():
+        expected = (set(frames[a]['B_Party_Clean']) & set(frames[b]['B_Party_Clean'])) - {'Unknown'}
+        assert row['shared_contacts'] == len(expected)
+        assert set(engine.shared_contacts_between(a, b)) == expected
+
+    events = engine._location_events()
+    joined = events.merge(events, on='cgi')
+    joined = joined[(joined['target_x'] < joined['target_y']) & ((joined['time_x'] - joined['time_y']).abs() <= 600)]
+    events = engine.find_colocations(window_minutes=10)
+    assert len(events) == len(joined)
+    # Passing precomputed events gives the same summary and leaves them untouched
+    summary = engine.colocation_summary(10, pairs=events)
+    assert summary.equals(engine.colocation_summary(10)) and 'day' not in events.columns
+    print("✅ Correlation engine matches brute force")
+
+
+def test_contact_graph_metrics_match_networkx():
+    """CSR PageRank and betweenness agree with networkx on a multi-target graph"""
+    import networkx as nx
+    from network_analyzer import ContactGraph
+
+    graph = ContactGraph()
+    for seed in range(3):
+        df = make_synthetic_cdr(n_rows=1500, n_contacts=150, seed=seed)
+        shifted = pd.to_numeric(df['B_Party_Clean'].str[2:], errors='coerce') + seed * 100 + 9000000000
+        df['B_Party_Clean'] = shifted.fillna(0).astype('int64').astype(str).where(df['B_Party_Clean'] != 'Unknown', 'Unknown')
+        graph.add_cdr(df, target=f"88000000{seed:02d}")
+
+    G = graph.to_networkx()
+    pagerank = nx.pagerank(G, weight='weight', tol=1e-10)
+    betweenness = nx.betweenness_centrality(nx.Graph(G.to_undirected()))
+    for i, name in enumerate(graph.names):
+        assert abs(graph.pagerank()[i] - pagerank[name]) < 1e-4
+        assert abs(graph.betweenness()[i] - betweenness[name]) < 1e-9
+
+    bridges = graph.bridges()
+    assert len(bridges) > 0 and (bridges['targets_linked'] >= 2).all()
+    assert graph.get_metrics() is graph.get_metrics()
+    print("✅ Contact graph metrics match networkx")
+
+
+def test_graph_layout_is_cached_and_vectorized():
+    """Layouts are reused per key and edges come out as one None-separated trace"""
+    from network_analyzer import NetworkAnalyzer
+    from graph_layout import GraphLayoutService
+
+    G = NetworkAnalyzer(make_synthetic_cdr(n_rows=3000, seed=5)).build_network_graph(min_interactions=5)
+    service = GraphLayoutService()
+    layout = service.layout(G, key='demo', dim=2)
+    assert service.layout(G, key='demo', dim=2) is layout
+    assert layout['positions'].shape == (G.number_of_nodes(), 2)
+    assert np.isfinite(layout['positions']).all() and np.abs(layout['positions']).max() <= 1.0
+
+    edge_x, edge_y = GraphLayoutService.edge_coordinates(layout)
+    assert len(edge_x) == 3 * G.number_of_edges()
+    assert all(value is None for value in edge_y[2::3])
+    assert service.layout(G, key='demo', dim=3)['positions'].shape[1] == 3
+    print("✅ Graph layout is cached and vectorized")
+
+
+def test_location_trajectory_matches_scalar_distance():
+    """Vectorized haversine/trajectory agree with the scalar distance loop"""
+    from location_analyzer import LocationAnalyzer
+
+    df = make_synthetic_cdr(n_rows=2000, seed=6)
+    location = LocationAnalyzer(df)
+    trajectory = location.get_trajectory()
+    fixes = df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime', kind='mergesort')
+
+    lat, lon = fixes['First_Lat'].tolist(), fixes['First_Long'].tolist()
+    expected = sum(location.calculate_distance(lat[i], lon[i], lat[i + 1], lon[i + 1]) for i in range(len(lat) - 1))
+    assert abs(location.get_total_distance() - expected) < 1e-6
+    assert len(trajectory) == len(fixes) and trajectory['DateTime'].is_monotonic_increasing
+
+    kept, major = [0], LocationAnalyzer.major_movement_indices(lat, lon, min_distance_km=5, chunk=7)
+    for i in range(1, len(lat)):
+        if location.calculate_distance(lat[kept[-1]], lon[kept[-1]], lat[i], lon[i]) > 5:
+            kept.append(i)
+    assert major.tolist() == kept
+
+    segments = location.get_dwell_segments(radius_km=1.0)
+    assert segments['fixes'].sum() == len(fixes)
+    hops = location.get_impossible_travel()
+    assert (hops['speed_kmh'] > LocationAnalyzer.MAX_PLAUSIBLE_SPEED_KMH).all()
+    print("✅ Location trajectory matches scalar distance")
+
+
+def test_spatial_clusters_merge_nearby_towers():
+    """Towers within the radius merge into one cluster; summary counts add up"""
+    from location_analyzer import LocationAnalyzer
+    from spatial_clustering import SpatialClusterer, project_km
+    from scipy.sparse.csgraph import connected_components
+
+    df = make_synthetic_cdr(n_rows=3000, seed=7)
+    rng = np.random.default_rng(7)
+    # Sector antennas a few metres apart should not be separate places
+    df['First_Lat'] = df['First_Lat'] + rng.choice([0.0, 0.0003], len(df))
+    location = LocationAnalyzer(df)
+
+    labels = location.get_fix_clusters(radius_km=0.5)
+    coords, inverse = np.unique(location.valid_df[['First_Lat', 'First_Long']].to_numpy(), axis=0, return_inverse=True)
+    xy = project_km(coords[:, 0], coords[:, 1])
+    adjacency = np.linalg.norm(xy[:, None] - xy[None, :], axis=2) <= 0.5
+    n_expected, expected = connected_components(adjacency, directed=False)
+    assert labels.max() + 1 == n_expected
+    # Same partition, independent of numbering
+    pairs = pd.crosstab(labels, expected[inverse.ravel()])
+    assert ((pairs > 0).sum(axis=1) == 1).all() and ((pairs > 0).sum(axis=0) == 1).all()
+
+    clusters = location.get_location_clusters(radius_km=0.5)
+    assert sum(c['count'] for c in clusters) == len(location.valid_df)
+    assert all(c['towers'] >= 2 for c in clusters[:5])
+    assert all(1 <= c['visits'] <= c['count'] for c in clusters)
+    assert (SpatialClusterer(0.5, min_points=10**6).fit_predict(df['First_Lat'], df['First_Long']) == -1).all()
+
+    # Fixes with an unparseable time are left out rather than breaking the day counts
+    df.loc[df.index[:25], 'DateTime'] = pd.NaT
+    with_nat = LocationAnalyzer(df)
+    clusters = with_nat.get_location_clusters(radius_km=0.5)
+    assert sum(c['count'] for c in clusters) == with_nat.valid_df['DateTime'].notna().sum()
+    assert all(c['days'] >= 1 for c in clusters)
+    print("✅ Spatial clusters merge nearby towers")
+
+
+def test_significant_places_label_home_and_work():
+    """Night dwell marks home, weekday-day dwell marks work, brief stops are transit"""
+    from place_inference import SignificantPlaceDetector
+
+    rng = np.random.default_rng(8)
+    home, office, junction = (28.60, 77.20), (28.50, 77.05), (28.55, 77.12)
+    rows = []
+    for day in pd.date_range('2025-03-01', periods=42):
+        for hour in [0, 2, 4, 6, 21, 23]:
+            rows.append((day + pd.Timedelta(hours=hour, minutes=int(rng.integers(60))), *home))
+        if day.weekday() < 5:
+            rows.append((day + pd.Timedelta(hours=8, minutes=30), *junction))
+            for hour in [10, 12, 14, 16]:
+                rows.append((day + pd.Timedelta(hours=hour, minutes=int(rng.integers(60))), *office))
+            rows.append((day + pd.Timedelta(hours=17, minutes=30), *junction))
+    df = pd.DataFrame(rows, columns=['DateTime', 'First_Lat', 'First_Long']).sample(frac=1, random_state=0)
+
+    places = SignificantPlaceDetector().detect(df['First_Lat'], df['First_Long'], df['DateTime'])
+    labelled = places.set_index('label')
+    assert tuple(labelled.loc['home', ['lat', 'lon']].round(2)) == home
+    assert tuple(labelled.loc['work', ['lat', 'lon']].round(2)) == office
+    assert tuple(labelled.loc['transit', ['lat', 'lon']].round(2)) == junction
+    assert labelled.loc['home', 'confidence'] > 0.8 and labelled.loc['work', 'workday_hours'] > 0
+    assert labelled.loc['work', 'night_hours'] == 0
+
+    batch = SignificantPlaceDetector().detect_batch({'A': df, 'B': df})
+    assert set(batch['target']) == {'A', 'B'} and len(batch) == 2 * len(places)
+    print("✅ Significant places label home and work")
+
+
+def test_movement_timeline_is_columnar_and_simplifies():
+    """Columnar timeline matches the frame and path simplification keeps the turns"""
+    from movement_timeline import MovementTimeline
+
+    df = make_synthetic_cdr(n_rows=2000, seed=9)
+    timeline = MovementTimeline.from_frame(df)
+    fixes = df.dropna(subset=['First_Lat', 'First_Long']).sort_values('DateTime', kind='mergesort')
+    assert len(timeline) == len(fixes)
+    frame = timeline.to_frame()
+    assert frame['DateTimeStr'].tolist() == fixes['DateTime'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist()
+    assert frame['B_Party_Clean'].tolist() == fixes['B_Party_Clean'].tolist()
+
+    calls = timeline.take(timeline.category_mask(['Incoming Call', 'Outgoing Call']))
+    assert len(calls) == int(fixes['Call_Category'].isin(['Incoming Call', 'Outgoing Call']).sum())
+
+    # An L-shaped walk with jitter: simplification must keep both ends and the corner
+    n = 10_000
+    leg = np.linspace(0, 0.5, n // 2)
+    lat = np.concatenate([28.5 + leg, np.full(n // 2, 29.0)]) + np.random.default_rng(0).normal(0, 1e-4, n)
+    lon = np.concatenate([np.full(n // 2, 77.0), 77.0 + leg]) + np.random.default_rng(1).normal(0, 1e-4, n)
+    walk = MovementTimeline(np.arange(n), lat, lon, np.zeros(n, dtype=np.int64), np.array(['Outgoing Call'], dtype=object),
+                            np.zeros(n, dtype=np.int64), np.array(['9800000000'], dtype=object))
+    kept = walk.simplify_indices(max_points=50)
+    assert len(kept) == 50 and kept[0] == 0 and kept[-1] == n - 1
+    assert np.abs(kept - n // 2).min() <= 2
+    assert len(walk.simplify_indices(max_points=n, tolerance_km=0.5)) == 3
+    print("✅ Movement timeline is columnar and simplifies")
+
+
+def test_render_cache_reuses_results_per_dataset():
+    """Results are keyed on dataset content plus params and evicted least recently used first"""
+    from render_cache import RenderCache
+
+    df = make_synthetic_cdr(n_rows=500, seed=11)
+    cache = RenderCache(max_entries=3)
+    calls = []
+
+    def build(tag):
+        calls.append(tag)
+        return tag
+
+    assert cache.get(df, 'chart', lambda: build('a'), 'All') == 'a'
+    assert cache.get(df.copy(), 'chart', lambda: build('b'), 'All') == 'a'  # same content, same entry
+    assert cache.get(df, 'chart', lambda: build('c'), 'Night') == 'c'
+    changed = df.copy()
+    changed.loc[0, 'Dur(s)'] += 1
+    assert cache.get(changed, 'chart', lambda: build('d'), 'All') == 'd'
+    assert cache.get(df, 'other', lambda: build('e')) == 'e'  # evicts the oldest ('All' on df)
+    assert len(cache) == 3
+    assert cache.get(df, 'chart', lambda: build('f'), 'All') == 'f'
+    assert calls == ['a', 'c', 'd', 'e', 'f'] and cache.hits == 1
+    print("✅ Render cache reuses results per dataset")
+
+
+def test_dataset_is_shared_without_copies():
+    """Analyzers reference the parsed frame's buffers; writes stay private; views are lazy masks"""
+    from cdr_dataset import CDRDataset
+    from location_analyzer import LocationAnalyzer
+
+    df = make_synthetic_cdr(n_rows=1000, seed=12)
+    analyzer = CDRAnalyzer(df)
+    locations = LocationAnalyzer(df)
+    for frame in (analyzer.df, locations.df):
+        assert np.shares_memory(frame['Dur(s)'].to_numpy(), df['Dur(s)'].to_numpy())
+
+    # New columns stay on the handle; value writes through it never reach the caller
+    analyzer.df['Scratch'] = 1
+    assert 'Scratch' not in df.columns
+    before = df['Dur(s)'].iloc[0]
+    for frame in (analyzer.df, locations.df):
+        try:
+            frame.loc[0, 'Dur(s)'] = before + 1000
+            frame.iloc[1, frame.columns.get_loc('Dur(s)')] = before + 1000
+        except ValueError:
+            pass  # read-only shared columns (pandas without copy-on-write)
+        assert df['Dur(s)'].iloc[0] == before and df['Dur(s)'].iloc[1] != before + 1000
+    df.loc[2, 'Dur(s)'] = before
+    assert df['Dur(s)'].iloc[2] == before
+
+    dataset = CDRDataset(df)
+    calls = dataset.mask('calls')
+    assert calls is dataset.mask('calls') and not calls.flags.writeable
+    assert calls.sum() == df['Call_Category'].isin(['Incoming Call', 'Outgoing Call']).sum()
+    assert (dataset.derived('date') == df['DateTime'].dt.date.to_numpy()).all()
+    assert 'date' not in df.columns
+
+    view = dataset.view(calls).where(dataset.mask('night'))
+    expected = df[df['Call_Category'].isin(['Incoming Call', 'Outgoing Call']) & (df['Is_Night'] == 1)]
+    assert len(view) == len(expected)
+    assert view.frame(['B_Party_Clean']).equals(expected[['B_Party_Clean']])
+    print("✅ Dataset is shared without copies")
+
+
+def test_query_engine_matches_pandas_filters():
+    """Indexed Search & Filter returns the same rows as filtering the frame directly"""
+    from cdr_dataset import CDRDataset
+    from cdr_query import CDRQueryEngine
+
+    df = make_synthetic_cdr(n_rows=3000, seed=21)
+    engine = CDRQueryEngine(CDRDataset(df))
+    dates = df['DateTime'].dt.date
+    start, end = dates.min() + pd.Timedelta(days=2), dates.min() + pd.Timedelta(days=9)
+    number = df['B_Party_Clean'].iloc[0]
+
+    for text in ['', number[-2:], number[2:7], 'no-such-number']:
+        for categories in [[], ['Incoming Call', 'SMS Sent']]:
+            expected = (dates >= start) & (dates <= end) & (df['TimePeriod'] == 'Night')
+            if text:
+                expected &= df['B_Party_Clean'].str.contains(text, na=False, regex=False)
+            if categories:
+                expected &= df['Call_Category'].isin(categories)
+            view = engine.query(text, categories, ['Night'], start, end)
+            assert (view.mask == expected.to_numpy()).all(), (text, categories)
+
+    assert engine.query().mask.all()
+    print("✅ Query engine matches pandas filters")
+
+
+def test_sql_backend_matches_pandas_aggregates():
+    """DuckDB-computed aggregates feed the same analyses as the pandas path"""
+    from cdr_sql import CDRSqlBackend, duckdb_available
+    if not duckdb_available():
+        print("⏭️ duckdb not installed - skipping SQL backend check")
+        return
+
+    df = make_synthetic_cdr(n_rows=2000, seed=8)
+    df.loc[3, 'B_Party_Clean'] = None
+    df.loc[4, 'Call_Category'] = None
+    pandas_analyzer = CDRAnalyzer(df)
+    sql_analyzer = CDRAnalyzer(df, sql_backend=CDRSqlBackend())
+
+    expected, actual = pandas_analyzer.get_aggregates(), sql_analyzer.get_aggregates()
+    assert expected['contact_stats'].equals(actual['contact_stats'])
+    assert expected['daily_counts'].equals(actual['daily_counts'])
+    assert expected['dow_counts'].equals(actual['dow_counts'])
+    assert np.array_equal(expected['hour_counts'], actual['hour_counts'])
+    assert expected['period_counts'] == actual['period_counts']
+    for name in ['get_temporal_analysis', 'get_contact_analysis']:
+        assert getattr(pandas_analyzer, name)() == getattr(sql_analyzer, name)(), name
+
+    # With a database file the tables are loaded into it; the CDR <-> IPDR join agrees with pandas
+    import tempfile
+    from reply_correlation import ReplyCorrelator
+    rng = np.random.default_rng(8)
+    m = 600
+    starts = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 60 * 86400, m), unit='s')
+    hits = pd.DataFrame({
+        'MSISDN_userID': df['B_Party_Clean'].iloc[:m].to_numpy(),
+        'IMEI': np.where(rng.random(m) < 0.3, "'35000000000002'", "'35999999999999'"),
+        'Session_Start_Time': starts.strftime('%d-%m-%Y %H:%M:%S'),
+        'Session_End_Time': (starts + pd.to_timedelta(rng.integers(0, 3 * 86400, m), unit='s')).strftime('%d-%m-%Y %H:%M:%S'),
+    })
+    expected = ReplyCorrelator(window_minutes=30).correlate(df, hits)
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = CDRSqlBackend(database=os.path.join(tmp, 'cdr.duckdb'))
+        assert backend.on_disk
+        on_disk = CDRAnalyzer(df, sql_backend=backend)
+        assert on_disk.get_aggregates()['contact_stats'].equals(pandas_analyzer.get_aggregates()['contact_stats'])
+        actual = ReplyCorrelator(window_minutes=30, sql_backend=backend).correlate(df, hits)
+        assert {'cdr', 'cdr_events', 'ipdr_sessions'} <= set(backend.tables())
+        backend.close()
+    assert len(expected) > 100 and expected.equals(actual)
+    print("✅ SQL backend matches pandas aggregates")
+
+
+def test_reply_correlation_matches_brute_force():
+    """Interval join returns every (CDR event, session) pair within the window"""
+    from reply_correlation import ReplyCorrelator, normalize_cdr, normalize_ipdr
+
+    cdr = make_synthetic_cdr(n_rows=2000, seed=4)
+    rng = np.random.default_rng(4)
+    m = 400
+    starts = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 60 * 86400, m), unit='s')
+    ends = starts + pd.to_timedelta(rng.integers(0, 6 * 3600, m), unit='s')
+    hits = pd.DataFrame({
+        'MSISDN_userID': np.where(rng.random(m) < 0.5, "'919999999999'", cdr['B_Party_Clean'].iloc[:m].to_numpy()),
+        'IMEI': "'35000000000002'",
+        'Session_Start_Time': starts.strftime('%d-%m-%Y %H:%M:%S'),
+        'Session_End_Time': ends.strftime('%d-%m-%Y %H:%M:%S'),
+    })
+    correlator = ReplyCorrelator(window_minutes=10)
+    matches = correlator.correlate(cdr, hits)
+
+    events, sessions = normalize_cdr(cdr), normalize_ipdr(hits)
+    assert (sessions['start'] == starts).all() and sessions['imei'].eq('35000000000002').all()
+    for key, reply_key in [('msisdn', 'msisdn'), ('contact', 'msisdn'), ('imei', 'imei')]:
+        pairs = events.merge(sessions, left_on=key, right_on=reply_key, suffixes=('_c', '_i'))
+        gap = np.maximum(0, np.maximum((pairs['start_i'] - pairs['end_c']).dt.total_seconds(),
+                                       (pairs['start_c'] - pairs['end_i']).dt.total_seconds()))
+        within = gap <= 600
+        expected = set(zip(pairs.loc[within, 'row_c'], pairs.loc[within, 'row_i'], gap[within].astype(int)))
+        found = correlator.join_on(events, sessions, key)
+        assert len(found) == len(expected), key
+        assert set(zip(found['cdr_row'], found['ipdr_row'], found['gap_seconds'])) == expected, key
+
+    # Three subscribers on one cell during a call are all returned
+    call = pd.Timestamp('2025-01-05 10:00')
+    events = pd.DataFrame({'row': [0], 'cgi': ['404-10-1-7'], 'start': [call], 'end': [call + pd.Timedelta(minutes=3)]})
+    sessions = pd.DataFrame({'row': [0, 1, 2, 3], 'cgi': ['404-10-1-7'] * 3 + ['404-10-1-8'],
+                             'start': [call - pd.Timedelta(hours=5), call, call + pd.Timedelta(minutes=1), call],
+                             'end': [call + pd.Timedelta(hours=1), call + pd.Timedelta(minutes=1), pd.NaT, call]})
+    found = correlator.join_on(events, sessions, 'cgi')
+    assert sorted(found['ipdr_row']) == [0, 1, 2] and (found['gap_seconds'] == 0).all()
+
+    # Shared interval join: long / garbage-ended sessions and chunked expansion
+    from reply_correlation import interval_overlaps
+    q_code, s_code = rng.integers(0, 5, 300), rng.integers(0, 5, 500)
+    q_start = rng.integers(0, 10 * 86400, 300)
+    q_end = q_start + rng.integers(0, 3600, 300)
+    s_start = rng.integers(0, 10 * 86400, 500)
+    s_end = s_start + rng.integers(0, 1800, 500)
+    s_end[:5] = s_start[:5] + 7 * 86400
+    s_end[5:8] = np.iinfo(np.int64).max // 2
+    s_end[8:10] = s_start[8:10] - 60  # ends before it starts: an instant
+    truth = ((q_code[:, None] == s_code[None, :]) & (s_start[None, :] <= q_end[:, None])
+             & (np.maximum(s_end, s_start)[None, :] >= q_start[:, None]))
+    expected = np.nonzero(truth)
+    for budget in (7, 2_000_000):
+        query_pos, session_pos = interval_overlaps(q_code, q_start, q_end, s_code, s_start, s_end, budget)
+        assert np.array_equal(query_pos, expected[0]) and np.array_equal(session_pos, expected[1])
+
+    assert matches['rank'].tolist() == list(range(1, len(matches) + 1))
+    assert matches['score'].is_monotonic_decreasing
+    assert set(correlator.timings) == {'normalize', 'join', 'rank'}
+    print("✅ Reply correlation matches brute force")
+
+
+def test_session_matcher_matches_brute_force():
+    """Sorted sweep finds every reply session overlapping each requested IP window"""
+    from session_matching import SessionMatcher, build_requests, ip_key
+
+    rng = np.random.default_rng(5)
+    ips = ['49.36.10.1', '49.36.10.2', '2409:4043:2d1e:abcd::1', '10.0.0.7']
+    m, r = 600, 150
+    starts = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 2 * 86400, m), unit='s')
+    ends = starts + pd.to_timedelta(rng.integers(0, 4 * 3600, m), unit='s')
+    hits = pd.DataFrame({
+        'MSISDN_userID': [f"'91900000000{i}'" for i in rng.integers(0, 9, m)],
+        'Source_Public_IPv4': rng.choice(ips[:2] + [''], m),
+        'Source_Public_IPv6': np.where(rng.random(m) < 0.3, '2409:4043:2d1e:abcd::', ''),
+        'Session_Start_Time': starts.strftime('%d-%m-%Y %H:%M:%S'),
+        'Session_End_Time': ends.strftime('%d-%m-%Y %H:%M:%S'),
+    })
+    times = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 2 * 86400, r), unit='s')
+    requests = build_requests([{'ip': rng.choice(ips), 'datetime': t} for t in times])
+    matcher = SessionMatcher.from_reply(requests, hits)
+    found = set(zip(matcher.matches()['request_id'], matcher.matches()['hit_row']))
+
+    expected = set()
+    for _, req in requests.iterrows():
+        for row, hit in hits.iterrows():
+            if ip_key(req['ip']) in (ip_key(hit['Source_Public_IPv4']), ip_key(hit['Source_Public_IPv6'])) \
+                    and starts[row] <= req['window_end'] and ends[row] >= req['window_start']:
+                expected.add((req['request_id'], row))
+    assert found == expected and expected
+    summary = matcher.summary()
+    assert summary['hit'].sum() == len({req for req, _ in expected})
+    assert len(matcher.hit_matrix()) == len(requests)
+    print("✅ Session matcher matches brute force")
+
+
+def test_reply_grid_windows_match_pandas():
+    """Sorted / filtered windows read from the reply store match pandas on the full frame"""
+    import tempfile
+    from reply_grid import PREVIEW_ROWS, ReplyStore, evidence_preview, evidence_row_count
+
+    rng = np.random.default_rng(6)
+    n = 5000
+    hits = pd.DataFrame({
+        'MSISDN_userID': [f"'9190000{i:05d}'" for i in rng.integers(0, 3000, n)],
+        'Source_Public_IPv4': [f"49.36.{a}.{b}" for a, b in rng.integers(0, 50, (n, 2))],
+        'Bytes': np.array([1, 'x'] * (n // 2), dtype=object),
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReplyStore.from_frame(hits, tmp, 'airtel')
+        assert len(store) == n and store.columns == list(hits.columns)
+
+        view = store.view('MSISDN_userID', False, 'Source_Public_IPv4', '36.1', columns=['MSISDN_userID'])
+        expected = hits[hits['Source_Public_IPv4'].str.contains('36.1', regex=False)]
+        expected = expected.sort_values('MSISDN_userID', ascending=False, kind='stable')
+        assert len(view) == len(expected)
+        page = view.window(100, 200)
+        assert page.index.tolist() == expected.index[100:200].tolist()
+        assert page['MSISDN_userID'].tolist() == expected['MSISDN_userID'].iloc[100:200].tolist()
+        assert list(page.columns) == ['MSISDN_userID']
+
+        # Sort / filter caches keep only the most recent entries
+        for text in ['0', '1', '2', '3', '4', '5']:
+            store.filter_rows('Source_Public_IPv4', text)
+        assert list(store._filters) == [('Source_Public_IPv4', t) for t in ['2', '3', '4', '5']]
+
+        pairs = store.distinct(['MSISDN_userID', 'Bytes'])
+        expected_pairs = hits[['MSISDN_userID', 'Bytes']].astype(str).drop_duplicates()
+        assert pairs.values.tolist() == expected_pairs.values.tolist()
+        assert store.distinct(['MSISDN_userID', 'Bytes']) is pairs
+
+        # A second store in the same directory leaves the first one alone
+        other = ReplyStore.from_frame(hits.head(10), tmp, 'airtel')
+        assert os.path.exists(store.path) and other.path != store.path
+        other.delete()
+        assert not os.path.exists(other.path) and len(store) == n
+
+        evidence = os.path.join(tmp, 'ipdr.csv')
+        with open(evidence, 'w') as f:
+            f.write("Report\nMSISDN_userID,DSL_User_ID,IMEI\n'919000000001',a,'3500'\nThis is System generated,x,\n")
+        preview, _ = evidence_preview(evidence, 'airtel')
+        assert preview['MSISDN_userID'].tolist() == ['919000000001']
+        assert evidence_preview(evidence, 'airtel')[0] is preview
+        assert evidence_row_count(evidence, 'airtel') == 1
+
+        # Previews stop at PREVIEW_ROWS; the row count covers the whole file
+        large = os.path.join(tmp, 'jio.csv')
+        pd.DataFrame({'IP': ['1.2.3.4'] * (PREVIEW_ROWS + 500)}).to_csv(large, index=False)
+        assert len(evidence_preview(large)[0]) == PREVIEW_ROWS
+        assert evidence_row_count(large) == PREVIEW_ROWS + 500
+    print("✅ Reply grid windows match pandas")
+
+
+def main():
+    """Run all tests"""
+    print("\n🧪 CDR Analyzer Test Suite\n")
+    test_temporal_matches_direct_counts()
+    test_contact_breakdown_matches_direct_counts()
+    test_results_are_memoized_and_invalidated()
+    test_vectorized_helpers_match_legacy_loops()
+    test_contact_index_slices_match_full_scans()
+    test_burst_detector_finds_injected_burst()
+    test_burst_detector_ignores_outlier_dates()
+    test_correlation_engine_matches_brute_force()
+    test_contact_graph_metrics_match_networkx()
+    test_graph_layout_is_cached_and_vectorized()
+    test_location_trajectory_matches_scalar_distance()
+    test_spatial_clusters_merge_nearby_towers()
+    test_significant_places_label_home_and_work()
+    test_movement_timeline_is_columnar_and_simplifies()
+    test_render_cache_reuses_results_per_dataset()
+    test_dataset_is_shared_without_copies()
+    test_query_engine_matches_pandas_filters()
+    test_sql_backend_matches_pandas_aggregates()
+    test_reply_correlation_matches_brute_force()
+    test_session_matcher_matches_brute_force()
+    test_reply_grid_windows_match_pandas()
+    print("\n🎉 All CDR analyzer tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Test script for cell tower enrichment
+Runs the lookup engine against a local mock provider server
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cell_tower_db import CellTowerDatabase, RateLimiter
+from offline_cell_index import OfflineCellIndex
+
+
+class MockMLSHandler(BaseHTTPRequestHandler):
+    """Answers MLS-style geolocate requests; cell ids divisible by 7 are unknown"""
+
+    delay = 0.05
+    requests_seen = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        tower = body['cellTowers'][0]
+        with MockMLSHandler.lock:
+            MockMLSHandler.requests_seen += 1
+        time.sleep(self.delay)
+
+        if tower['cellId'] % 7 == 0:
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = json.dumps({'location': {'lat': 28.0 + tower['cellId'] / 1e6, 'lng': 77.0 + tower['locationAreaCode'] / 1e6}})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockMLSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/geolocate"
+
+
+def make_database(url, cache_dir, **kwargs):
+    return CellTowerDatabase(
+        cache_file=os.path.join(cache_dir, 'cell_tower_cache.json'),
+        endpoints={'mls': url},
+        providers=('mls',),
+        **kwargs
+    )
+
+
+def test_concurrent_enrichment_matches_mock_provider():
+    """Unique cells are resolved concurrently and mapped back onto every row"""
+    server, url = start_mock_server()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            db = make_database(url, cache_dir, rate_limits={'mls': 1000}, max_workers=8)
+            cells = [f"404-10-{100 + i}-{5000 + i}" for i in range(40)]
+            df = pd.DataFrame({'First CGI': cells * 5 + [None, '---']})
+
+            MockMLSHandler.requests_seen = 0
+            started = time.monotonic()
+            enriched = db.enrich_cdr_with_cell_towers(df)
+            elapsed = time.monotonic() - started
+
+            summary = db.last_enrichment_summary
+            unknown = {c for c in cells if int(c.split('-')[3]) % 7 == 0}
+            assert summary['unique_cells'] == 41
+            assert summary['resolved'] == len(cells) - len(unknown)
+            assert MockMLSHandler.requests_seen == len(cells) and summary['network_cells'] == len(cells)
+            # 40 requests x 50ms would take 2s one at a time
+            assert elapsed < 1.0, f"enrichment took {elapsed:.2f}s"
+
+            for cell, lat, source in zip(enriched['First CGI'], enriched['Cell_Tower_Lat'], enriched['Cell_Tower_Source']):
+                if cell in cells and cell not in unknown:
+                    assert abs(lat - (28.0 + int(cell.split('-')[3]) / 1e6)) < 1e-9 and source == 'mls'
+                else:
+                    assert pd.isna(lat)
+    finally:
+        server.shutdown()
+    print("✅ Concurrent enrichment matches mock provider")
+
+
+def test_cache_persists_hits_and_not_found_cells():
+    """A second run (even from a new instance) is answered from the SQLite cache, including not-found cells"""
+    server, url = start_mock_server()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with open(os.path.join(cache_dir, 'cell_tower_cache.json'), 'w') as f:
+                json.dump({'mls_404_10_999_9999': [12.5, 77.5]}, f)
+
+            cells = [f"404-10-{100 + i}-{7000 + i}" for i in range(20)] + ['404-10-999-9999']
+            df = pd.DataFrame({'First CGI': cells})
+            unknown = sum(int(c.split('-')[3]) % 7 == 0 for c in cells[:20])
+
+            db = make_database(url, cache_dir, rate_limits={'mls': 1000})
+            MockMLSHandler.requests_seen = 0
+            db.enrich_cdr_with_cell_towers(df)
+            cache_stats = db.last_enrichment_summary['cache']
+            assert MockMLSHandler.requests_seen == 20  # legacy JSON entry was imported
+            assert cache_stats['hits'] == 1 and cache_stats['misses'] == 20
+            assert db.last_enrichment_summary['network_cells'] == 20
+            assert os.path.exists(os.path.join(cache_dir, 'cell_tower_cache.json.imported'))
+
+            fresh = make_database(url, cache_dir, rate_limits={'mls': 1000})
+            MockMLSHandler.requests_seen = 0
+            enriched = fresh.enrich_cdr_with_cell_towers(df)
+            cache_stats = fresh.last_enrichment_summary['cache']
+            assert MockMLSHandler.requests_seen == 0
+            assert cache_stats == {'hits': 21 - unknown, 'negative_hits': unknown, 'misses': 0, 'writes': 0}
+            assert fresh.last_enrichment_summary['network_cells'] == 0
+            assert enriched['Cell_Tower_Lat'].notna().sum() == 21 - unknown
+
+            # A single lookup is committed right away, not left in the write buffer
+            assert fresh.lookup_cell_tower('404-10-555-8002') is not None
+            assert not fresh.cache._pending
+            again = make_database(url, cache_dir, rate_limits={'mls': 1000})
+            MockMLSHandler.requests_seen = 0
+            assert again.lookup_cell_tower('404-10-555-8002') is not None
+            assert MockMLSHandler.requests_seen == 0
+            again.cache.close()
+            again.cache.close()
+
+            # Expired negative entries are retried
+            expired = make_database(url, cache_dir, rate_limits={'mls': 1000}, negative_ttl_days=0)
+            MockMLSHandler.requests_seen = 0
+            expired.enrich_cdr_with_cell_towers(df)
+            assert MockMLSHandler.requests_seen == unknown
+    finally:
+        server.shutdown()
+    print("✅ Cache persists hits and not-found cells")
+
+
+def test_bulk_parser_matches_scalar_parser():
+    """parse_cell_ids agrees with parse_cell_id on every supported format and on junk"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        db = make_database('http://127.0.0.1:9/unused', cache_dir)
+        raw = ['404-96-290-128686112', "'404-96-290-128686112", ' 404 - 96 -290-1-extra', '404-96-290', '+404-96-290-5',
+               '4058722113210', '40587201f9011', '40587201F9011', '4041012345678', '404101234567a', '405ab22113210',
+               '40510abcdef', 4058722113210, '405872', '1234567890123', '405-xx', '---', '', None, np.nan]
+        cells = pd.Series(raw * 3, dtype=object)
+        parsed = db.parse_cell_ids(cells)
+
+        assert len(parsed) == len(cells) and (parsed.index == cells.index).all()
+        for cell, row in zip(cells, parsed.itertuples()):
+            expected = db.parse_cell_id(cell)
+            if expected is None:
+                assert not row.valid and row.mcc == -1, cell
+            else:
+                assert row.valid and (row.mcc, row.mnc, row.lac, row.cell_id) == (
+                    expected['mcc'], expected['mnc'], expected['lac'], expected['cell_id']), cell
+    print("✅ Bulk parser matches scalar parser")
+
+
+def test_rate_limiter_spaces_requests():
+    """Concurrent acquires never exceed the configured rate"""
+    limiter = RateLimiter(rate_per_second=50)
+    stamps = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(5):
+            limiter.acquire()
+            with lock:
+                stamps.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stamps.sort()
+    assert stamps[-1] - stamps[0] >= 19 / 50 * 0.95
+    print("✅ Rate limiter spaces requests")
+
+
+def test_offline_index_answers_before_network():
+    """An OpenCelliD dump is indexed for MCC 404/405 and consulted before any provider"""
+    server, url = start_mock_server()
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            dump = pd.DataFrame({
+                'radio': 'GSM',
+                'mcc': [404, 404, 405, 310, 404],
+                'net': [10, 10, 872, 260, 45],
+                'area': [290, 290, 2113, 1, 17],
+                'cell': [5001, 5001, 210, 99, 5002],
+                'unit': 0,
+                'lon': [77.21, 77.99, 72.85, -122.0, 77.59],
+                'lat': [28.61, 28.99, 19.07, 37.0, 12.97],
+                'range': [1000, 5000, 800, 100, 1500],
+                'samples': [40, 2, 10, 5, 7],
+                'changeable': 1, 'created': 0, 'updated': 0, 'averageSignal': 0,
+            })
+            csv_path = os.path.join(work_dir, 'cell_towers.csv.gz')
+            dump.to_csv(csv_path, index=False)
+            index_path = os.path.join(work_dir, 'cell_tower_index.npy')
+            index = OfflineCellIndex.build_from_csv(csv_path, index_path)
+
+            assert len(index) == 3  # US row dropped, duplicate collapsed
+            found, lat, lon, tower_range = index.lookup_many([404, 405, 404, 404], [10, 872, 45, 99], [290, 2113, 17, 1], [5001, 210, 5002, 1])
+            assert found.tolist() == [True, True, True, False]
+            assert np.allclose(lat[:3], [28.61, 19.07, 12.97], atol=1e-5) and tower_range[0] == 1000
+
+            db = make_database(url, work_dir, offline_index_path=index_path)
+            MockMLSHandler.requests_seen = 0
+            results = db.lookup_cell_towers(['404-10-290-5001', '404-45-17-5002', '404-10-300-6001'])
+            assert results['404-10-290-5001'][2] == 'offline'
+            assert results['404-45-17-5002'][2] == 'offline'
+            assert results['404-10-300-6001'][2] == 'mls'
+            assert MockMLSHandler.requests_seen == 1
+
+            # MLS is shut down: without opting in it is neither queried nor listed as available
+            default = CellTowerDatabase(cache_file=os.path.join(work_dir, 'default_cache.sqlite'),
+                                        endpoints={'mls': url}, offline_index_path=index_path)
+            default.opencellid_key = default.unwired_key = ''
+            assert default.lookup_cell_towers(['404-10-300-6001'])['404-10-300-6001'] is None
+            assert MockMLSHandler.requests_seen == 1
+            assert default.get_database_info()['mozilla_mls']['status'] != 'Available'
+            assert db.get_database_info()['mozilla_mls']['status'] == 'Available'
+            default.cache.close()
+    finally:
+        server.shutdown()
+    print("✅ Offline index answers before network")
+
+
+def main():
+    """Run all tests"""
+    print("\n🧪 Cell Tower Database Test Suite\n")
+    test_concurrent_enrichment_matches_mock_provider()
+    test_cache_persists_hits_and_not_found_cells()
+    test_bulk_parser_matches_scalar_parser()
+    test_rate_limiter_spaces_requests()
+    test_offline_index_answers_before_network()
+    print("\n🎉 All cell tower tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for app startup cost
+Imports each entry script's top-level modules in a fresh interpreter
+"""
+
+import sys
+import os
+import json
+import subprocess
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lazy_imports import HERE, import_time_report, lazy_import, startup_imports
+
+ENTRY_SCRIPTS = ['app.py', 'cdr_app.py']
+
+# Loaded on first use only; none of these may be pulled in at startup
+DEFERRED = ['bs4', 'ipwhois', 'openpyxl', 'docx', 'plotly.express',
+            'folium', 'streamlit_folium', 'networkx', 'scipy', 'duckdb', 'requests']
+
+# Seconds of import time allowed per entry script (override for slow machines)
+STARTUP_BUDGET = float(os.environ.get('STARTUP_BUDGET_SECONDS', '3.0'))
+
+
+def test_heavy_dependencies_are_deferred():
+    """Startup imports leave the heavy libraries unloaded until first use"""
+    modules = []
+    for script in ENTRY_SCRIPTS:
+        modules += startup_imports(os.path.join(HERE, script))
+    code = "; ".join(f"import {name}" for name in dict.fromkeys(modules))
+    code += f"; import sys, json; print(json.dumps([m for m in {DEFERRED!r} if m in sys.modules]))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    assert loaded == [], f"Loaded at startup: {loaded}"
+
+    proxy = lazy_import('colorsys')
+    if 'colorsys' not in sys.modules:
+        assert 'deferred' in repr(proxy)
+    assert proxy.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1.0)
+    assert 'colorsys' in sys.modules
+    print("✅ Heavy dependencies are deferred")
+
+
+def test_startup_within_budget():
+    """Each entry script's top-level imports finish within the startup budget"""
+    for script in ENTRY_SCRIPTS:
+        report = import_time_report(startup_imports(os.path.join(HERE, script)))
+        assert report['total'] <= STARTUP_BUDGET, \
+            f"{script} imports took {report['total']:.2f}s (budget {STARTUP_BUDGET:.2f}s): {report['packages'][:5]}"
+        print(f"   {script}: {report['total']:.2f}s")
+    print("✅ Startup within budget")
+
+
+def main():
+    """Run all tests"""
+    print("\n🧪 Startup Test Suite\n")
+    test_heavy_dependencies_are_deferred()
+    test_startup_within_budget()
+    print("\n🎉 All startup tests passed!")
+
+
+if __name__ == "__main__":
+    main()
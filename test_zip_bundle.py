@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the Download All ZIP bundles
+"""
+
+import sys
+import os
+import tempfile
+import time
+import zipfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import zip_bundle
+from zip_bundle import BundleBuilder
+
+
+def test_bundle_is_cached_and_stores_office_files():
+    """Same files reuse one archive; DOCX/XLSX are stored, text is deflated"""
+    with tempfile.TemporaryDirectory() as tmp:
+        letter = os.path.join(tmp, "Suspect_JIO_Request_Letter.docx")
+        notes = os.path.join(tmp, "notes.txt")
+        with open(letter, "wb") as f:
+            f.write(os.urandom(4096))
+        with open(notes, "w") as f:
+            f.write("IP request\n" * 500)
+        members = [(letter, "JIO/Suspect_JIO_Request_Letter.docx"), (notes, "notes.txt"),
+                   (os.path.join(tmp, "missing.xlsx"), "missing.xlsx")]
+
+        builder = BundleBuilder(cache_dir=os.path.join(tmp, "bundles"))
+        first = builder.build(members)
+        assert builder.build(members) == first
+
+        with zipfile.ZipFile(first) as archive:
+            infos = {info.filename: info for info in archive.infolist()}
+            assert set(infos) == {"JIO/Suspect_JIO_Request_Letter.docx", "notes.txt"}
+            assert infos["JIO/Suspect_JIO_Request_Letter.docx"].compress_type == zipfile.ZIP_STORED
+            assert infos["notes.txt"].compress_type == zipfile.ZIP_DEFLATED
+            assert archive.read("notes.txt") == b"IP request\n" * 500
+
+        # Changed content gives a new bundle
+        with open(notes, "a") as f:
+            f.write("updated\n")
+        assert builder.build(members) != first
+
+        # The digest memo is a bounded LRU
+        zip_bundle._digests.clear()
+        limit, zip_bundle.DIGEST_CACHE_ENTRIES = zip_bundle.DIGEST_CACHE_ENTRIES, 1
+        try:
+            zip_bundle.file_digest(letter)
+            zip_bundle.file_digest(notes)
+            assert list(zip_bundle._digests) == [(os.path.abspath(notes), os.path.getsize(notes),
+                                                  os.stat(notes).st_mtime_ns)]
+        finally:
+            zip_bundle.DIGEST_CACHE_ENTRIES = limit
+    print("✅ Bundle is cached and stores office files")
+
+
+def test_prune_keeps_recently_used_bundles():
+    """Only bundles beyond max_bundles that nobody used recently are removed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        builder = BundleBuilder(cache_dir=os.path.join(tmp, "bundles"), max_bundles=1, recent_seconds=60)
+        paths = []
+        for i in range(3):
+            member = os.path.join(tmp, f"letter_{i}.txt")
+            with open(member, "w") as f:
+                f.write(f"letter {i}\n")
+            paths.append(builder.build([(member, f"letter_{i}.txt")]))
+        assert all(os.path.exists(path) for path in paths)
+
+        # Age the first bundle past the recent window; the next build prunes only it
+        old = time.time() - 3600
+        os.utime(paths[0], (old, old))
+        member = os.path.join(tmp, "letter_3.txt")
+        with open(member, "w") as f:
+            f.write("letter 3\n")
+        builder.build([(member, "letter_3.txt")])
+        assert not os.path.exists(paths[0])
+        assert all(os.path.exists(path) for path in paths[1:])
+    print("✅ Prune keeps recently used bundles")
+
+
+def main():
+    """Run all tests"""
+    print("\n🧪 ZIP Bundle Test Suite\n")
+    test_bundle_is_cached_and_stores_office_files()
+    test_prune_keeps_recently_used_bundles()
+    print("\n🎉 All ZIP bundle tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+ZIP Bundle Module
+Build "Download All" archives once per result set and cache them on disk
+"""
+
+import hashlib
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Members that are already compressed containers; deflating them again costs
+# CPU for a few bytes at best
+STORED_EXTENSIONS = {'.docx', '.xlsx', '.pptx', '.pdf', '.zip', '.gz', '.png', '.jpg', '.jpeg'}
+
+CHUNK_SIZE = 1 << 20
+
+# Bundles used this recently are never pruned (another session may be about to serve one)
+RECENT_SECONDS = 15 * 60
+
+# (path, size, mtime_ns) -> content digest, so reruns don't re-read unchanged files;
+# a small LRU, so a long-running server does not keep every file it ever hashed
+DIGEST_CACHE_ENTRIES = 4096
+_digests: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+def compress_type_for(path: str) -> int:
+    """ZIP_STORED for already-compressed formats, ZIP_DEFLATED otherwise"""
+    return zipfile.ZIP_STORED if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content, memoized on (path, size, mtime)"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digests_lock:
+        digest = _digests.get(key)
+        if digest is not None:
+            _digests.move_to_end(key)
+            return digest
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _digests_lock:
+        _digests[key] = digest
+        while len(_digests) > DIGEST_CACHE_ENTRIES:
+            _digests.popitem(last=False)
+    return digest
+
+
+class BundleBuilder:
+    """
+    Content-addressed ZIP bundles for the Generator and Bank downloads
+
+    A bundle is identified by the hash of its members (archive name +
+    content digest), so the archive is written once per result set and
+    every later request for the same result set reuses the cached file.
+    Archives are written to a temp file and renamed into place. Member
+    digests are computed on a thread pool (hashlib releases the GIL on large
+    reads); the archive itself is written serially, most members being
+    already-compressed Office files that are stored as-is. Pruning runs only after a new bundle is written and never removes
+    a bundle used in the last `recent_seconds`.
+    """
+
+    def __init__(self, cache_dir: str = os.path.join("Generated_Letters", ".bundles"),
+                 max_bundles: int = 20, workers: Optional[int] = None,
+                 recent_seconds: float = RECENT_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bundles = max_bundles
+        self.recent_seconds = recent_seconds
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 4)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def bundle_key(self, members: List[Tuple[str, str]]) -> str:
+        """Hash of (archive name, content digest) over the members in order"""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            digests = list(pool.map(file_digest, [path for path, _ in members]))
+        sha = hashlib.sha256()
+        for (_, arcname), digest in zip(members, digests):
+            sha.update(f"{arcname}\0{digest}\n".encode('utf-8'))
+        return sha.hexdigest()
+
+    def build(self, members: List[Tuple[str, str]]) -> str:
+        """
+        Path of a ZIP holding `members` ([(file path, archive name)])
+
+        Missing files are skipped. The archive is reused when a bundle with
+        the same content already exists in the cache.
+        """
+        members = [(path, arcname) for path, arcname in members if os.path.exists(path)]
+        key = self.bundle_key(members)
+        target = os.path.join(self.cache_dir, f"{key}.zip")
+        if os.path.exists(target):
+            os.utime(target)  # keep recently used bundles out of pruning
+            return target
+
+        started = time.perf_counter()
+        partial = f"{target}.{os.getpid()}.part"
+        try:
+            with zipfile.ZipFile(partial, 'w') as zip_file:
+                for path, arcname in members:
+                    zip_file.write(path, arcname, compress_type=compress_type_for(path))
+            os.replace(partial, target)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        logger.info(f"Built bundle of {len(members)} files in {time.perf_counter() - started:.3f}s")
+        self.prune()
+        return target
+
+    def prune(self):
+        """Drop the least recently used bundles beyond max_bundles, keeping any used recently"""
+        bundles = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.zip'):
+                try:
+                    bundles.append((os.path.getmtime(os.path.join(self.cache_dir, name)), name))
+                except OSError:
+                    continue  # removed by another session meanwhile
+        bundles.sort(reverse=True)
+        cutoff = time.time() - self.recent_seconds
+        for mtime, name in bundles[self.max_bundles:]:
+            if mtime >= cutoff:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove bundle {path}: {e}")